@@ -0,0 +1,148 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "click>=8.0",
+# ]
+# ///
+"""
+Startup-time budget for the book CLI.
+
+Runs `python -X importtime <script> compile --help` in fresh
+interpreters and adds up the cumulative import time of the top-level
+imports, i.e. what Python spends importing before the command runs.
+Two entry points are timed: book_server.py, whose main() is the installed
+`book` command (pyproject: book = "book_server:main"), and book_cli.py,
+which `uv run book_cli.py` runs directly. The server is bypassed
+(BOOK_NO_SERVER=1), so the in-process path is what gets measured.
+Fails when the median of either over the runs is above the budget, or
+when the command imported a module it should not need (image_gen loads
+.env, init_book and restructure belong to other commands).
+
+Can be used as:
+1. Standalone: uv run bench_startup.py [--budget MS] [--runs N] [ARGS...]
+   (ARGS default to: compile --help)
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Import time allowed for `book compile --help`, in milliseconds
+DEFAULT_BUDGET_MS = 200
+DEFAULT_RUNS = 5
+DEFAULT_ARGS = ["compile", "--help"]
+
+# Scripts timed, by the command they stand for; book_server.py runs the
+# entry point of the installed `book` command
+ENTRY_POINTS = {
+    "book": "book_server.py",
+    "book_cli.py": "book_cli.py",
+}
+
+# Modules that `book compile` must not import
+FORBIDDEN_MODULES = ("image_gen", "dotenv", "init_book", "init_latex", "restructure", "google")
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Cumulative import time (microseconds) of each top-level import."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two spaces per level
+        if name.startswith("  "):
+            continue
+        times[name.strip()] = times.get(name.strip(), 0) + int(cumulative)
+    return times
+
+
+def imported_modules(stderr: str) -> set[str]:
+    """Every module imported, nested or not."""
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in stderr.splitlines()
+        if line.startswith("import time:") and "[us]" not in line
+    }
+
+
+def measure(args: list[str], cli: Path) -> tuple[float, dict[str, int], set[str]]:
+    """Run the CLI once; return (wall seconds, top-level import times, modules)."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(cli), *args],
+        capture_output=True,
+        text=True,
+        cwd=cli.parent,
+        env={**os.environ, "BOOK_NO_SERVER": "1"},
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{cli.name} {' '.join(args)} failed:\n{result.stderr[-2000:]}")
+    return wall, parse_importtime(result.stderr), imported_modules(result.stderr)
+
+
+def check(name: str, cli: Path, args: list[str], runs: int, budget: float, top: int) -> bool:
+    """Time one entry point and print its report. Returns False if it failed."""
+    walls, totals, all_times = [], [], []
+    forbidden = set()
+    for _ in range(max(1, runs)):
+        wall, times, modules = measure(args, cli)
+        walls.append(wall)
+        totals.append(sum(times.values()))
+        all_times.append(times)
+        forbidden |= {
+            module for module in modules
+            if module.split(".")[0] in FORBIDDEN_MODULES
+        }
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"{name} {' '.join(args)}: imports {median_ms:.1f} ms, process {statistics.median(walls) * 1000:.1f} ms "
+          f"(median of {len(totals)} run(s), budget {budget:g} ms)")
+
+    # Slowest top-level imports, by their median over the runs
+    names = {module for times in all_times for module in times}
+    slowest = sorted(
+        ((statistics.median(times.get(module, 0) for times in all_times) / 1000, module) for module in names),
+        reverse=True,
+    )
+    for ms, module in slowest[:top]:
+        print(f"  {ms:7.1f} ms  {module}")
+
+    passed = True
+    if args == DEFAULT_ARGS and forbidden:
+        print(f"FAIL: {name} compile imported {', '.join(sorted(forbidden))}")
+        passed = False
+    if median_ms > budget:
+        print(f"FAIL: {name} import time {median_ms:.1f} ms is over the budget of {budget:g} ms")
+        passed = False
+    return passed
+
+
+def main():
+    """Standalone entry point."""
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the book CLI")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help=f"Budget in milliseconds (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help=f"Number of runs (default: {DEFAULT_RUNS})")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="book arguments (default: compile --help)")
+    options = parser.parse_args()
+
+    cli_dir = Path(__file__).resolve().parent
+    args = options.args or DEFAULT_ARGS
+
+    failed = False
+    for name, script in ENTRY_POINTS.items():
+        if not check(name, cli_dir / script, args, options.runs, options.budget, options.top):
+            failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
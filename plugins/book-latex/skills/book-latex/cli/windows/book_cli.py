@@ -3,267 +3,141 @@ Book CLI - Command line tool for managing LaTeX book projects.
 
 Usage:
     book init               # Initialize a new book project
-    book compile [FILENAME] # Compile a LaTeX file
+    book compile [TARGETS]  # Compile one or more LaTeX files
     book compile --bib      # Compile with bibliography (biber)
+    book compile --force    # Compile even if the build is up to date
+    book compile --draft    # Fast draft preview into build/draft/
+    book compile --preview  # Build with low-resolution figure proxies
+    book compile --split    # Parallel per-chapter build with a whole-book preview
+    book watch              # Recompile the affected file on every save
+    book stats              # Show compile times and regressions
+    book resolve TARGET     # Print the file a target resolves to
+    book refs               # Check labels, references and citations
+    book lint               # Check braces, environments and subfiles
+    book find QUERY         # Find files by slug or title (fuzzy)
+    book wc [TARGET]        # Count words, figures, tables, equations, citations
+    book outline            # Write an annotated tree of latex/ to outline.md
+    book mv SOURCE [DEST]   # Move a chapter/section/part and renumber
+    book swap A B           # Exchange two chapters/sections/parts
+    book renumber [TARGET]  # Renumber after manual edits
+    book scaffold OUTLINE   # Create parts, chapters and sections from a YAML outline
+    book fill               # Apply config.yaml to the [PROMPT: ...] placeholders
+    book serve              # Keep a warm server for faster book commands
     book image new          # Generate a new image
     book image edit         # Edit an existing image
+    book image batch FILE   # Generate/edit many images from a manifest, concurrently
 
 Examples:
     book init               # Create a new LaTeX book project
     book compile            # Compiles main.tex
     book compile ch01       # Compiles ch01-*.tex (prefix match)
     book compile --bib      # Compiles main.tex with bibliography
+    book compile 2.* -j 4   # Compiles all chapters of part 2 in parallel
     book image new --path "figures/diagram.png" "A flowchart..."
     book image edit --path "figures/chart.png" "Add a legend"
 """
 
+import importlib
 import sys
 from functools import partial
 from pathlib import Path
 
 import click
 
-from compile_latex import find_tex_file, run_compile, AmbiguousTargetError
-from init_book import init_project
-from image_gen import generate_image, edit_image
-
-
-@click.group()
-def cli():
-    """Book CLI - Tools for managing LaTeX book projects."""
-    pass
-
-
-@cli.command()
-@click.argument("filename", default="main")
-@click.option("--bib", "-b", is_flag=True, help="Also compile bibliography with biber")
-def compile(filename: str, bib: bool):
-    """Compile a LaTeX file from the book.
-
-    FILENAME is the name of the .tex file without extension (default: main).
-
-    Supports:
-    - Prefix matching: 'ch01' will find 'ch01-ettersporselprognoser.tex'
-    - Numeric notation: '3.5.13' for part 3, chapter 5, section 13
-    - Appendix notation: 'A.1' for appendix 1, 'A.2.5' for appendix 2 section 5
-
-    Examples:
-
-        book compile              # Compiles main.tex
-
-        book compile ch01         # Compiles ch01-*.tex
-
-        book compile 3.5          # Compiles part03/ch05
-
-        book compile A.1          # Compiles app01 in backmatter
-
-        book compile --bib        # Compiles main.tex with bibliography
-
-        book compile main --bib   # Same as above
+from book_server import serve as serve_project, socket_path, stop_server
+
+# Subcommands as name -> "module:attribute", imported only when used
+LAZY_COMMANDS = {
+    "compile": "cli_compile:compile",
+    "resolve": "cli_compile:resolve",
+    "watch": "cli_watch:watch",
+    "stats": "cli_stats:stats",
+    "find": "cli_find:find",
+    "refs": "cli_refs:refs",
+    "lint": "cli_lint:lint",
+    "outline": "cli_outline:outline",
+    "wc": "cli_metrics:wc",
+    "metrics": "cli_metrics:wc",
+    "mv": "cli_restructure:mv",
+    "swap": "cli_restructure:swap",
+    "renumber": "cli_restructure:renumber",
+    "init": "cli_init:init",
+    "scaffold": "cli_init:scaffold",
+    "fill": "cli_init:fill",
+    "image": "cli_image:image",
+}
+
+
+class LazyGroup(click.Group):
+    """Click group that imports a subcommand's module the first time it is used.
+
+    `book compile` then only imports the compile modules, not image_gen
+    (which loads .env) or init_book.
     """
-    # Find latex directory relative to current working directory
-    cwd = Path.cwd()
-    latex_dir = cwd / "latex"
-
-    if not latex_dir.exists():
-        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
-        click.echo("Make sure you run this command from the project root.")
-        sys.exit(1)
-
-    # Check for excluded file
-    if filename == "localsettings":
-        click.secho("Error: localsettings.tex is not a standalone file and cannot be compiled.", fg="red")
-        sys.exit(1)
-
-    # Find the tex file
-    try:
-        tex_file = find_tex_file(latex_dir, filename)
-    except AmbiguousTargetError as e:
-        click.secho(f"Error: '{e.target}' matches multiple files:", fg="red")
-        for i, match in enumerate(e.matches, 1):
-            rel_path = match.relative_to(latex_dir)
-            click.echo(f"  {i}. {rel_path}")
-        if e.suggestions:
-            click.echo()
-            click.secho("Use numeric notation to specify which one:", fg="yellow")
-            for suggestion, path in e.suggestions:
-                rel_path = path.relative_to(latex_dir)
-                click.echo(f"  book compile {suggestion}  # {rel_path}")
-        sys.exit(1)
-
-    if tex_file is None:
-        click.secho(f"Error: Could not find {filename}.tex in {latex_dir}", fg="red")
-        sys.exit(1)
-
-    # Compile with click-styled output
-    return_code = run_compile(
-        tex_file,
-        latex_dir,
-        bib=bib,
-        echo=click.echo,
-        success_style=partial(click.secho, fg="green"),
-        error_style=partial(click.secho, fg="red")
-    )
-    sys.exit(return_code)
-
 
-@cli.command()
-@click.option("--title", help="Book title")
-@click.option("--subtitle", help="Book subtitle")
-@click.option("--description", help="Book description")
-@click.option("--authors", multiple=True, help="Book authors (can be specified multiple times)")
-@click.option("--year", help="Publication year")
-@click.option("--edition", help="Book edition")
-@click.option("--publisher", help="Publisher name")
-@click.option("--city", help="Publisher city")
-@click.option("--state", help="Publisher state")
-@click.option("--zip", "zip_code", help="Publisher zip code")
-@click.option("--country", help="Publisher country")
-@click.option("--language", help="Book language (e.g., english, norsk)")
-@click.option("--type", "book_type", help="Book type")
-@click.option("--theme", help="Book theme")
-def init(title, subtitle, description, authors, year, edition, publisher, city, state, zip_code, country, language, book_type, theme):
-    """Initialize a new LaTeX book project.
-
-    Creates:
-      - config.yaml with project settings
-      - latex/ folder with book template
-
-    All options are optional. When provided, they pre-fill the corresponding
-    placeholders in the generated files.
-
-    Examples:
+    def __init__(self, *args, lazy_commands: dict[str, str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
 
-        book init              # Create LaTeX book project with placeholders
-
-        book init --title "My Book" --authors "John Doe"
-
-        book init --authors "John Doe" --authors "Jane Smith" --year 2024
-    """
-    cwd = Path.cwd()
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
 
-    return_code = init_project(
-        cwd,
-        title=title,
-        subtitle=subtitle,
-        description=description,
-        authors=authors,
-        year=year,
-        edition=edition,
-        publisher=publisher,
-        city=city,
-        state=state,
-        zip_code=zip_code,
-        country=country,
-        language=language,
-        book_type=book_type,
-        theme=theme,
-        echo=click.echo,
-        success_style=partial(click.secho, fg="green"),
-        error_style=partial(click.secho, fg="red")
-    )
-    sys.exit(return_code)
+    def get_command(self, ctx: click.Context, name: str) -> click.Command | None:
+        if name in self.lazy_commands and name not in self.commands:
+            module_name, attribute = self.lazy_commands[name].split(":")
+            self.add_command(getattr(importlib.import_module(module_name), attribute), name)
+        return super().get_command(ctx, name)
 
+    def load_all(self) -> None:
+        """Import every subcommand now (used by book serve)."""
+        for name in self.lazy_commands:
+            self.get_command(None, name)
 
-@cli.group()
-def image():
-    """Image generation and editing commands.
 
-    Generate new images or edit existing ones using AI (Gemini API).
-    Requires GEMINI_API_KEY in .env file.
-    """
+@click.group(cls=LazyGroup, lazy_commands=LAZY_COMMANDS)
+def cli():
+    """Book CLI - Tools for managing LaTeX book projects."""
     pass
 
 
-@image.command()
-@click.option("--path", "-p", required=True, help="Output path for the image (e.g., figures/flowchart.png)")
-@click.option("--resolution", "-r", type=click.Choice(["1K", "2K", "4K"]), default="1K", help="Image resolution")
-@click.argument("prompt")
-def new(path: str, resolution: str, prompt: str):
-    """Generate a new image from a text prompt.
-
-    PROMPT is the text description of the image to generate.
-
-    Examples:
-
-        book image new --path "figures/flowchart.png" "A process flowchart"
-
-        book image new -p "diagrams/network.png" -r 4K "Network topology diagram"
-    """
-    return_code = generate_image(
-        prompt=prompt,
-        output_path=Path(path),
-        resolution=resolution,
-        echo=click.echo,
-        error_style=partial(click.secho, fg="red")
-    )
-    sys.exit(return_code)
-
-
-@image.command()
-@click.option("--path", "-p", required=True, help="Path to image to edit (will be overwritten)")
-@click.option("--resolution", "-r", type=click.Choice(["1K", "2K", "4K"]), default=None, help="Output resolution (auto-detected if not specified)")
-@click.argument("prompt")
-def edit(path: str, resolution: str | None, prompt: str):
-    """Edit an existing image with a text prompt.
-
-    PROMPT is the text instructions for editing the image.
-    The edited image overwrites the original file.
-
-    Examples:
-
-        book image edit --path "figures/chart.png" "Add a legend in the corner"
-
-        book image edit -p "logo.png" -r 2K "Change the color scheme to blue"
-    """
-    return_code = edit_image(
-        prompt=prompt,
-        image_path=Path(path),
-        resolution=resolution,
-        echo=click.echo,
-        error_style=partial(click.secho, fg="red")
-    )
-    sys.exit(return_code)
-
-
 @cli.command()
-def outline():
-    """Generate a visual tree structure of the latex folder.
+@click.option("--stop", is_flag=True, help="Stop the running server")
+@click.option("--idle-timeout", type=click.FloatRange(min=0), default=0, help="Stop after this many idle seconds (0: never)")
+def serve(stop: bool, idle_timeout: float):
+    """Keep a warm server that runs book commands for this project.
+
+    The server keeps the CLI, the project index and .env settings loaded
+    and listens on a Unix socket (build/serve.sock). While it runs, book
+    compile, find, lint, outline, refs, resolve, stats and wc are sent to
+    it instead of starting a fresh Python process; without it they run
+    in-process as usual. Each request runs in a process forked from the
+    server, so several run at once. Set BOOK_NO_SERVER=1 to bypass a
+    running server. Restart the server after updating the CLI.
 
-    Creates outline.md in the project root with the directory structure
-    using emoji-style formatting.
+    Examples:
 
-    Example:
+        book serve &            # Start the server in the background
 
-        book outline    # Creates outline.md with latex/ tree
+        book serve --stop       # Stop it
     """
-    import seedir as sd
-
     cwd = Path.cwd()
     latex_dir = cwd / "latex"
-    output_file = cwd / "outline.md"
+
+    if stop:
+        if stop_server(cwd):
+            click.secho(f"Stopped the server on {socket_path(cwd)}", fg="green")
+        else:
+            click.echo("No server is running for this project.")
+        return
 
     if not latex_dir.exists():
         click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
         click.echo("Make sure you run this command from the project root.")
         sys.exit(1)
 
-    # Generate tree with emoji style
-    tree_output = sd.seedir(
-        path=str(latex_dir),
-        style='emoji',
-        printout=False
-    )
-
-    # Write to outline.md
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("# Project Structure\n\n")
-        f.write("```text\n")
-        f.write(tree_output)
-        f.write("\n```")
-
-    click.secho(f"Outline saved to {output_file}", fg="green")
+    sys.exit(serve_project(cwd, idle_timeout=idle_timeout, echo=click.echo, error_style=partial(click.secho, fg="red")))
 
 
 if __name__ == "__main__":
-    cli()
+    from book_server import main
+    main()
@@ -0,0 +1,392 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "click>=8.0",
+# ]
+# ///
+"""
+Long-running book server and the thin client in front of it.
+
+`book serve` keeps the CLI, the project index and everything image_gen
+loads (including .env) in memory and listens on a Unix socket. The `book`
+entry point (main below) sends compile, find, outline, refs, resolve and
+stats commands to the server when it runs, and otherwise falls back to
+running the CLI in-process. main() only imports the standard library, so
+using the server skips importing click and the CLI modules.
+
+Protocol: the client sends one JSON line {"argv", "cwd", "color", "env"}
+and passes its stdin along with it (SCM_RIGHTS). The server runs the
+command in the client's environment and working directory, with that
+stdin and with its stdout/stderr (and thus TeX's output) redirected to
+the socket, so a served command behaves like one run in-process. It then
+sends a NUL byte followed by a JSON line {"return_code"}. Each request runs in a child forked from the warm
+server, so requests run concurrently: a second compile of a target
+reaches the build queue (and cancels or joins the running build) instead
+of waiting for the first, and a long compile does not hold up find or
+lint.
+
+Can be used as:
+1. Entry point: book = "book_server:main"
+2. Module: from book_server import serve, stop_server
+"""
+
+import hashlib
+import json
+import os
+import select
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Commands the server runs; everything else (init, image, watch, serve)
+# always runs in-process
+SERVED_COMMANDS = {"compile", "find", "lint", "metrics", "outline", "refs", "resolve", "stats", "wc"}
+
+SOCKET_NAME = "serve.sock"
+# Unix socket paths are limited to about 108 bytes
+MAX_SOCKET_PATH = 100
+
+END_MARKER = b"\0"
+
+# How long a client has to send its request line
+REQUEST_TIMEOUT = 5.0
+# How often the server reaps finished requests while idle
+REAP_INTERVAL = 1.0
+
+
+def socket_path(project_dir: Path) -> Path:
+    """Socket of the server for a project: build/serve.sock, or a temp path if too long."""
+    path = project_dir / "build" / SOCKET_NAME
+    if len(os.fsencode(path)) <= MAX_SOCKET_PATH:
+        return path
+    digest = hashlib.sha256(os.fsencode(project_dir)).hexdigest()[:16]
+    return Path(tempfile.gettempdir()) / f"book-{digest}.sock"
+
+
+def supported() -> bool:
+    """Return True if the platform has Unix sockets (and fork, for the server)."""
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "fork")
+
+
+def connect(project_dir: Path, timeout: float | None = 1.0) -> socket.socket | None:
+    """Connect to the project's server, or return None if it is not running."""
+    if not supported():
+        return None
+    path = socket_path(project_dir)
+    if not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def request(sock: socket.socket, argv: list[str], cwd: Path, color: bool, out=None, env=None, stdin=None) -> int:
+    """Send a command to the server, stream its output to out and return its exit code.
+
+    The command runs with env (default: this process's environment) and
+    reads stdin (default: this process's stdin, if it has one).
+    """
+    if out is None:
+        out = sys.stdout.buffer
+    if env is None:
+        env = dict(os.environ)
+    if stdin is None:
+        try:
+            stdin = sys.stdin.fileno()
+        except (AttributeError, OSError, ValueError):
+            pass  # No stdin: the command gets an empty one
+    line = (json.dumps({"argv": argv, "cwd": str(cwd), "color": color, "env": env}) + "\n").encode("utf-8")
+    sent = 0
+    if stdin is not None:
+        try:
+            sent = socket.send_fds(sock, [line], [stdin])
+        except OSError:
+            pass  # A closed stdin: send the request alone
+    if sent < len(line):
+        sock.sendall(line[sent:])
+
+    trailer = None
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            break
+        if trailer is not None:
+            trailer += data
+            continue
+        head, marker, tail = data.partition(END_MARKER)
+        out.write(head)
+        out.flush()
+        if marker:
+            trailer = tail
+    sock.close()
+
+    if trailer is None:
+        return 1  # The server went away in the middle of the command
+    try:
+        return int(json.loads(trailer.decode("utf-8"))["return_code"])
+    except (ValueError, KeyError, TypeError):
+        return 1
+
+
+def run_cli(argv: list[str], color: bool) -> int:
+    """Run the click CLI like the book command would, returning the exit code."""
+    import click
+    from book_cli import cli
+
+    try:
+        result = cli.main(args=argv, prog_name="book", standalone_mode=False, color=color)
+    except click.exceptions.Exit as e:
+        return e.exit_code
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.Abort:
+        click.echo("Aborted!", err=True)
+        return 1
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    return result if isinstance(result, int) else 0
+
+
+def _read_request(conn: socket.socket) -> dict | None:
+    """Read the request line of a connection, or None if it is malformed.
+
+    The client's stdin, if it sent one, is returned as req["stdin"] (a file
+    descriptor the caller closes).
+    """
+    conn.settimeout(REQUEST_TIMEOUT)
+    data = b""
+    fds: list[int] = []
+    try:
+        while not data.endswith(b"\n"):
+            chunk, received, _, _ = socket.recv_fds(conn, 65536, 1)
+            fds += received
+            if not chunk:
+                break
+            data += chunk
+        req = json.loads(data.decode("utf-8"))
+        req["argv"] = [str(arg) for arg in req["argv"]]
+        req["cwd"] = str(req["cwd"])
+        req["env"] = {str(key): str(value) for key, value in req["env"].items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        for fd in fds:
+            os.close(fd)
+        return None
+    conn.settimeout(None)
+    req["stdin"] = fds[0] if fds else None
+    for fd in fds[1:]:
+        os.close(fd)
+    return req
+
+
+def _handle(conn: socket.socket, req: dict, log) -> None:
+    """Run one request, with stdout/stderr pointing at the client."""
+    argv = req["argv"]
+    log(f"{time.strftime('%H:%M:%S')} [{os.getpid()}] book {' '.join(argv)}")
+    start = time.perf_counter()
+
+    # Point stdout/stderr at the client for the duration of the command, so
+    # click output and the output of pdflatex & co. all reach it
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    return_code = 1
+    try:
+        os.dup2(conn.fileno(), 1)
+        os.dup2(conn.fileno(), 2)
+        # The command runs as it would in the client's process
+        if req["stdin"] is not None:
+            os.dup2(req["stdin"], 0)
+        else:
+            devnull = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(devnull, 0)
+            os.close(devnull)
+        os.environ.clear()
+        os.environ.update(req["env"])
+        os.chdir(req["cwd"])
+        return_code = run_cli(argv, bool(req.get("color")))
+    except Exception as e:  # Report whatever a command does to the client
+        print(f"Error: {e}", file=sys.stderr)
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except OSError:
+            pass  # The client disconnected
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        os.close(saved[0])
+        os.close(saved[1])
+
+    try:
+        conn.sendall(END_MARKER + (json.dumps({"return_code": return_code}) + "\n").encode("utf-8"))
+    except OSError:
+        pass
+    log(f"    [{os.getpid()}] -> {return_code} in {time.perf_counter() - start:.2f}s")
+
+
+def _fork_request(server: socket.socket, conn: socket.socket, req: dict, log) -> int:
+    """Run a request in a child process; returns the child's pid."""
+    pid = os.fork()
+    if pid:
+        return pid
+    # Child: never returns into the server loop
+    status = 0
+    try:
+        server.close()
+        _handle(conn, req, log)
+    except BaseException:
+        status = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(status)
+
+
+def _reap(children: set[int]) -> int:
+    """Collect finished request processes; returns how many finished."""
+    finished = 0
+    for pid in list(children):
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            done = pid
+        if done:
+            children.discard(pid)
+            finished += 1
+    return finished
+
+
+def serve(project_dir: Path, idle_timeout: float = 0, echo=print, error_style=None) -> int:
+    """
+    Run the server for a project until stopped.
+
+    Args:
+        project_dir: Project root (the folder containing latex/)
+        idle_timeout: Stop after this many seconds without requests (0: never)
+        echo: Function for normal output
+        error_style: Function for error messages
+
+    Returns:
+        0 when stopped, 1 if the server could not start
+    """
+    if error_style is None:
+        error_style = echo
+
+    if not supported():
+        error_style("Error: book serve needs Unix sockets and fork, which this platform does not provide.")
+        return 1
+
+    path = socket_path(project_dir)
+    existing = connect(project_dir)
+    if existing is not None:
+        existing.close()
+        error_style(f"Error: a server is already running on {path}")
+        return 1
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)  # Left behind by a server that crashed
+
+    # Import every command now so requests only pay for running it
+    from book_cli import cli
+    cli.load_all()
+    from project_index import get_project_index
+    if (project_dir / "latex").exists():
+        get_project_index(project_dir / "latex")
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen()
+    echo(f"Serving {project_dir} on {path}. Press Ctrl+C to stop.")
+
+    children: set[int] = set()
+    last_active = time.monotonic()
+    try:
+        while True:
+            if _reap(children) and (project_dir / "latex").exists():
+                # Keep the index the next request inherits up to date
+                get_project_index(project_dir / "latex")
+            if children:
+                last_active = time.monotonic()
+            elif idle_timeout and time.monotonic() - last_active >= idle_timeout:
+                echo(f"No requests for {idle_timeout:g}s, stopping.")
+                break
+            ready, _, _ = select.select([server], [], [], REAP_INTERVAL)
+            if not ready:
+                continue
+            conn, _ = server.accept()
+            last_active = time.monotonic()
+            with conn:
+                req = _read_request(conn)
+                if req is None:
+                    try:
+                        conn.sendall(END_MARKER + b'{"return_code": 2}\n')
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    if req["argv"] == ["--shutdown"]:
+                        conn.sendall(END_MARKER + b'{"return_code": 0}\n')
+                        echo("Stopped by book serve --stop.")
+                        break
+                    children.add(_fork_request(server, conn, req, echo))
+                finally:
+                    # The child has its own copy of the client's stdin
+                    if req["stdin"] is not None:
+                        os.close(req["stdin"])
+    except KeyboardInterrupt:
+        echo("Stopped.")
+    finally:
+        server.close()
+        path.unlink(missing_ok=True)
+        # Requests still running finish and answer their clients
+        _reap(children)
+        if children:
+            echo(f"Waiting for {len(children)} running request(s)...")
+            for pid in children:
+                try:
+                    os.waitpid(pid, 0)
+                except (ChildProcessError, KeyboardInterrupt):
+                    pass
+    return 0
+
+
+def stop_server(project_dir: Path) -> bool:
+    """Ask a running server to stop. Returns False if none was running."""
+    sock = connect(project_dir)
+    if sock is None:
+        return False
+    request(sock, ["--shutdown"], project_dir, color=False)
+    return True
+
+
+def main():
+    """Entry point of the book command: use the server when it is running."""
+    argv = sys.argv[1:]
+    command = next((arg for arg in argv if not arg.startswith("-")), None)
+    if command in SERVED_COMMANDS and os.environ.get("BOOK_NO_SERVER") != "1":
+        cwd = Path.cwd()
+        sock = connect(cwd)
+        if sock is not None:
+            try:
+                sys.exit(request(sock, argv, cwd, color=sys.stdout.isatty()))
+            except KeyboardInterrupt:
+                sys.exit(130)
+
+    from book_cli import cli
+    cli()
+
+
+if __name__ == "__main__":
+    main()
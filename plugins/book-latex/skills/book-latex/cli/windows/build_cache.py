@@ -0,0 +1,334 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Content-hash build cache for LaTeX compiles.
+
+Collects every file a target pulls in (subfiles, inputs, graphics,
+bibliography resources and the main preamble), hashes them and stores
+a manifest in the build directory. A compile can be skipped when the
+manifest still matches the sources.
+
+The same is done for biber: the .bcf citation list and the .bib files it
+names are fingerprinted after each biber run, so biber is only run again
+when one of them changed.
+
+Can be used as:
+1. Module: from build_cache import check_manifest, write_manifest
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+
+GRAPHICS_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg", ".eps")
+
+# \command[optional]{argument} - the argument may contain one level of
+# nested braces, e.g. \addbibresource{\subfix{bib/references.bib}}
+INCLUDE_PATTERN = re.compile(
+    r"\\(subfile|input|include|includegraphics|addbibresource|documentclass|usepackage|RequirePackage)\*?"
+    r"\s*(?:\[([^\]]*)\])?\s*\{((?:[^{}]|\{[^{}]*\})*)\}"
+)
+GRAPHICSPATH_PATTERN = re.compile(r"\\graphicspath\s*\{")
+DATASOURCE_PATTERN = re.compile(r"<bcf:datasource\b[^>]*>([^<]+)</bcf:datasource>")
+SUBFIX_PATTERN = re.compile(r"\\subfix\s*\{([^{}]*)\}")
+COMMENT_PATTERN = re.compile(r"(?<!\\)%.*")
+
+
+def strip_comments(text: str) -> str:
+    """Remove LaTeX line comments (unescaped % to end of line)."""
+    return COMMENT_PATTERN.sub("", text)
+
+
+def graphics_paths(text: str, file_dir: Path, compile_dir: Path) -> list[Path]:
+    """Directories named by the \\graphicspath declarations in a text.
+
+    \\graphicspath{{\\subfix{./figures/}}{img/}} lists one directory per
+    brace group. A \\subfix{} path is relative to the file declaring it;
+    a plain one to the directory TeX runs in (that of the compiled target).
+    """
+    dirs = []
+    for match in GRAPHICSPATH_PATTERN.finditer(text):
+        depth, start = 1, match.end()
+        group = None
+        for i in range(start, len(text)):
+            char = text[i]
+            if char == "{":
+                depth += 1
+                if depth == 2:
+                    group = i + 1
+            elif char == "}":
+                depth -= 1
+                if depth == 1 and group is not None:
+                    entry = text[group:i].strip()
+                    subfix = SUBFIX_PATTERN.fullmatch(entry)
+                    if subfix:
+                        dirs.append(Path(os.path.normpath(file_dir / subfix.group(1).strip())))
+                    elif entry:
+                        dirs.append(Path(os.path.normpath(compile_dir / entry)))
+                    group = None
+                elif depth == 0:
+                    break
+    return dirs
+
+
+def _candidates(command: str, ref: str, base_dirs: list[Path]) -> list[Path]:
+    """List the paths LaTeX would try for a reference, in lookup order."""
+    ref = SUBFIX_PATTERN.sub(r"\1", ref).strip()
+    if not ref:
+        return []
+
+    if command == "includegraphics":
+        names = [ref] if Path(ref).suffix else [ref + ext for ext in GRAPHICS_EXTENSIONS]
+    elif command in ("subfile", "input", "include", "documentclass"):
+        names = [ref] if ref.endswith(".tex") else [ref + ".tex", ref]
+    elif command in ("usepackage", "RequirePackage"):
+        names = [name.strip() + ".sty" for name in ref.split(",") if name.strip()]
+    else:
+        names = [ref]
+
+    return [Path(os.path.normpath(base / name)) for base in base_dirs for name in names]
+
+
+def _resolve(command: str, ref: str, base_dirs: list[Path]) -> Path | None:
+    """Return the first existing candidate, or the first candidate if none exist."""
+    candidates = _candidates(command, ref, base_dirs)
+    for candidate in candidates:
+        if candidate.is_file():
+            return candidate
+    return candidates[0] if candidates else None
+
+
+def collect_dependencies(tex_file: Path, latex_dir: Path, preamble_only: bool = False) -> list[Path]:
+    """Collect all files a target depends on.
+
+    Follows \\subfile, \\input and \\include recursively, records
+    \\includegraphics and \\addbibresource targets and the packages of
+    the project itself (a .sty next to the file or in latex/), and for subfiles
+    scans the preamble of the parent document given in
+    \\documentclass[../main.tex]{subfiles}. Graphics are also looked up
+    in the \\graphicspath directories of the file, of the files including
+    it and of the inherited preamble. Missing files are included so
+    that their later appearance invalidates the cache. With preamble_only,
+    only what the target loads before \\begin{document} is collected.
+    """
+    seen: set[Path] = set()
+    order: list[Path] = []
+    declared_dirs: dict[Path, list[Path]] = {}
+
+    def add(path: Path) -> bool:
+        if path in seen:
+            return False
+        seen.add(path)
+        order.append(path)
+        return True
+
+    def visit(path: Path, preamble_only: bool = False, inherited: tuple[Path, ...] = ()) -> list[Path]:
+        """Visit a file; return the graphics directories it declares."""
+        if not add(path) or not path.is_file() or path.suffix not in (".tex", ".sty"):
+            return declared_dirs.get(path, [])
+
+        text = strip_comments(path.read_text(encoding="utf-8", errors="replace"))
+        if preamble_only:
+            text = text.split(r"\begin{document}", 1)[0]
+
+        base_dirs = [path.parent] if path.parent == latex_dir else [path.parent, latex_dir]
+        declared = declared_dirs[path] = graphics_paths(text, path.parent, tex_file.parent)
+        parent_dirs: list[Path] = []
+        for match in INCLUDE_PATTERN.finditer(text):
+            command, option, ref = match.groups()
+
+            if command == "documentclass":
+                # Subfiles inherit the preamble of their parent document
+                if ref.strip() == "subfiles" and option:
+                    parent = _resolve("documentclass", option, [path.parent])
+                    if parent is not None:
+                        parent_dirs = visit(parent, preamble_only=True)
+                continue
+
+            # The file's own \graphicspath first, then the inherited ones
+            graphics_dirs = tuple(dict.fromkeys([*declared, *parent_dirs, *inherited]))
+            if command in ("usepackage", "RequirePackage"):
+                # Installed packages are not part of the project
+                for package in _candidates(command, ref, base_dirs):
+                    if package.is_file():
+                        visit(package, inherited=graphics_dirs)
+                continue
+            if command == "includegraphics":
+                target = _resolve(command, ref, base_dirs + [d for d in graphics_dirs if d not in base_dirs])
+            else:
+                target = _resolve(command, ref, base_dirs)
+            if target is None:
+                continue
+            if command in ("subfile", "input", "include"):
+                visit(target, inherited=graphics_dirs)
+            else:
+                add(target)
+        return declared
+
+    visit(tex_file, preamble_only=preamble_only)
+    add(latex_dir / "localsettings.tex")
+    return order
+
+
+def file_digest(path: Path, previous: dict | None = None) -> dict:
+    """Hash a file, reusing the previous digest when size and mtime are unchanged."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return {"sha256": None}
+
+    if (
+        previous
+        and previous.get("size") == stat.st_size
+        and previous.get("mtime_ns") == stat.st_mtime_ns
+        and previous.get("sha256")
+    ):
+        return previous
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
+
+def _key(path: Path, latex_dir: Path) -> str:
+    """Manifest key for a path: relative to latex_dir when possible."""
+    try:
+        return path.relative_to(latex_dir).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def manifest_path(build_dir: Path, tex_file: Path) -> Path:
+    """Location of the cache manifest for a target."""
+    return build_dir / f"{tex_file.stem}.manifest.json"
+
+
+def load_manifest(path: Path) -> dict | None:
+    """Load a manifest, returning None if it is missing or unreadable."""
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def compute_fingerprint(tex_file: Path, latex_dir: Path, previous: dict | None = None) -> dict:
+    """Map every dependency of the target to its content digest."""
+    previous_files = (previous or {}).get("files", {})
+    fingerprint = {}
+    for dep in collect_dependencies(tex_file, latex_dir):
+        key = _key(dep, latex_dir)
+        fingerprint[key] = file_digest(dep, previous_files.get(key))
+    return fingerprint
+
+
+def check_manifest(
+    build_dir: Path, tex_file: Path, latex_dir: Path, options: dict
+) -> tuple[bool, dict]:
+    """Check whether the target's output is up to date.
+
+    Returns (up_to_date, fingerprint). The fingerprint should be passed to
+    write_manifest after a successful compile.
+    """
+    path = manifest_path(build_dir, tex_file)
+    manifest = load_manifest(path)
+    fingerprint = compute_fingerprint(tex_file, latex_dir, manifest)
+
+    if manifest is None or manifest.get("options") != options:
+        return False, fingerprint
+
+    pdf = build_dir / f"{tex_file.stem}.pdf"
+    if not pdf.exists():
+        return False, fingerprint
+
+    old_hashes = {k: v.get("sha256") for k, v in manifest.get("files", {}).items()}
+    new_hashes = {k: v.get("sha256") for k, v in fingerprint.items()}
+    return old_hashes == new_hashes, fingerprint
+
+
+def write_manifest(build_dir: Path, tex_file: Path, latex_dir: Path, options: dict, fingerprint: dict) -> None:
+    """Store the fingerprint of a successful compile."""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "target": _key(tex_file, latex_dir),
+        "options": options,
+        "files": fingerprint,
+    }
+    path = manifest_path(build_dir, tex_file)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def invalidate_manifest(build_dir: Path, tex_file: Path) -> None:
+    """Remove a target's manifest so the next compile runs in full."""
+    manifest_path(build_dir, tex_file).unlink(missing_ok=True)
+
+
+def bibliography_state_path(build_dir: Path, stem: str) -> Path:
+    """Location of the fingerprint of a target's last biber run."""
+    return build_dir / f"{stem}.biber.json"
+
+
+def load_bibliography_state(path: Path) -> dict | None:
+    """Load the fingerprint of the last biber run, or None."""
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if state.get("version") != MANIFEST_VERSION:
+        return None
+    return state
+
+
+def bibliography_fingerprint(bcf_file: Path, search_dirs: list[Path], previous: dict | None = None) -> dict | None:
+    """Digest of a .bcf citation list and of every .bib file it names.
+
+    The .bcf lists the cited keys and the datasources (\\addbibresource);
+    the .bib files are looked up in search_dirs like biber would. Returns
+    None if there is no .bcf.
+    """
+    try:
+        data = bcf_file.read_bytes()
+    except OSError:
+        return None
+
+    previous_files = (previous or {}).get("files", {})
+    files = {}
+    for name in DATASOURCE_PATTERN.findall(data.decode("utf-8", errors="replace")):
+        name = html.unescape(name.strip())
+        path = next((d / name for d in search_dirs if (d / name).is_file()), None)
+        files[name] = file_digest(path, previous_files.get(name)) if path else {"sha256": None}
+
+    return {"version": MANIFEST_VERSION, "bcf": hashlib.sha256(data).hexdigest(), "files": files}
+
+
+def bibliography_changes(previous: dict, current: dict) -> str | None:
+    """Why biber has to run again, or None if its input is unchanged."""
+    if previous.get("bcf") != current["bcf"]:
+        return "citation list changed"
+    old = {name: digest.get("sha256") for name, digest in previous.get("files", {}).items()}
+    new = {name: digest.get("sha256") for name, digest in current["files"].items()}
+    changed = sorted(name for name in old.keys() | new.keys() if old.get(name) != new.get(name))
+    if changed:
+        return f"{', '.join(Path(name).name for name in changed)} changed"
+    return None
+
+
+def write_bibliography_state(path: Path, state: dict) -> None:
+    """Store the fingerprint of a successful biber run."""
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
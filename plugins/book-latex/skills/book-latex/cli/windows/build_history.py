@@ -0,0 +1,283 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Build history and compile statistics.
+
+Every compile appends one JSON line to build/history.jsonl with the wall
+time of each engine, biber and makeindex pass, the page count and the
+PDF size. The statistics compare each target's latest build with a rolling
+baseline (the median of its previous builds) to spot regressions.
+
+Can be used as:
+1. Module: from build_history import record_build, show_stats
+2. Standalone: uv run build_history.py [TARGET] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from project_index import get_project_index
+
+HISTORY_FILENAME = "history.jsonl"
+
+DEFAULT_WINDOW = 5
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_LIMIT = 10
+
+# Slowdowns below this many seconds are noise, whatever the percentage
+MIN_REGRESSION_SECONDS = 0.5
+
+# Engine passes (pdflatex, lualatex, latexmk, ...) are summed up as "tex"
+TOOLS = ("tex", "biber", "makeindex")
+
+
+def history_path(build_root: Path) -> Path:
+    """Location of the build history of a project."""
+    return build_root / HISTORY_FILENAME
+
+
+def record_build(build_root: Path, entry: dict) -> None:
+    """Append one build to the history.
+
+    The line is written with a single O_APPEND write, so parallel compiles
+    can record their builds without interleaving.
+    """
+    entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **entry}
+    line = (json.dumps(entry) + "\n").encode("utf-8")
+    build_root.mkdir(parents=True, exist_ok=True)
+    fd = os.open(history_path(build_root), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def load_history(build_root: Path) -> list[dict]:
+    """Read all recorded builds, oldest first, skipping damaged lines."""
+    entries = []
+    try:
+        with open(history_path(build_root), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return entries
+
+
+def tool_seconds(entry: dict) -> dict[str, float]:
+    """Total time per tool of one build."""
+    totals = dict.fromkeys(TOOLS, 0.0)
+    for step in entry.get("passes", []):
+        tool = step["tool"] if step["tool"] in TOOLS else "tex"
+        totals[tool] += step.get("seconds", 0.0)
+    return totals
+
+
+def target_stats(builds: list[dict], window: int = DEFAULT_WINDOW, threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """Compare the latest successful build of a target with its baseline.
+
+    The baseline is the median build time of the previous `window`
+    successful builds. A build is a regression when it is more than
+    `threshold` (a fraction) and MIN_REGRESSION_SECONDS slower.
+    """
+    ok = [b for b in builds if b.get("status") == "ok"]
+    last = ok[-1] if ok else builds[-1]
+    previous = [b["seconds"] for b in ok[-window - 1:-1]]
+    baseline = statistics.median(previous) if previous else None
+
+    change = None
+    regression = False
+    if baseline:
+        change = last["seconds"] / baseline - 1
+        regression = change > threshold and last["seconds"] - baseline > MIN_REGRESSION_SECONDS
+
+    return {
+        "target": last["target"],
+        "draft": last.get("options", {}).get("draft", False),
+        "preview": last.get("options", {}).get("preview", False),
+        "engine": last.get("engine", "pdflatex"),
+        "builds": len(builds),
+        "failed": len(builds) - len(ok),
+        "last": last["seconds"],
+        "baseline": baseline,
+        "change": change,
+        "regression": regression,
+        "trend": [b["seconds"] for b in ok[-window:]],
+        "tools": tool_seconds(last),
+        "pages": last.get("pages"),
+        "pdf_size": last.get("pdf_size"),
+        "time": last.get("time"),
+    }
+
+
+def compute_stats(
+    history: list[dict],
+    target: str | None = None,
+    window: int = DEFAULT_WINDOW,
+    threshold: float = DEFAULT_THRESHOLD
+) -> list[dict]:
+    """Per-target statistics, slowest latest build first."""
+    by_target: dict[tuple[str, bool, bool], list[dict]] = {}
+    for entry in history:
+        if "seconds" not in entry or "target" not in entry:
+            continue
+        if target and target not in entry["target"]:
+            continue
+        # Draft and preview builds are faster, so they get their own baseline
+        options = entry.get("options", {})
+        mode = (entry["target"], options.get("draft", False), options.get("preview", False))
+        by_target.setdefault(mode, []).append(entry)
+
+    stats = [target_stats(builds, window, threshold) for builds in by_target.values()]
+    stats.sort(key=lambda s: s["last"], reverse=True)
+    return stats
+
+
+def _format_size(size: int | None) -> str:
+    if size is None:
+        return "-"
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _format_table(rows: list[tuple[str, ...]]) -> list[str]:
+    """Left-aligned columns with a separator under the header."""
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = []
+    for i, row in enumerate(rows):
+        lines.append("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+        if i == 0:
+            lines.append("  ".join("-" * width for width in widths))
+    return lines
+
+
+def show_stats(
+    latex_dir: Path,
+    target: str | None = None,
+    window: int = DEFAULT_WINDOW,
+    threshold: float = DEFAULT_THRESHOLD,
+    limit: int = DEFAULT_LIMIT,
+    as_json: bool = False,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Print build statistics from the project's history.
+
+    Args:
+        latex_dir: Path to the latex directory
+        target: Only show targets whose path contains this text
+        window: Number of previous builds in the rolling baseline
+        threshold: Slowdown (fraction) reported as a regression
+        limit: Number of targets to list (slowest first)
+        as_json: If True, print the statistics as JSON
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 if no regression was found, 1 otherwise
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    build_root = latex_dir.parent / "build"
+    history = load_history(build_root)
+    stats = compute_stats(history, target, window, threshold)
+
+    # Label targets with their numeric notation where they have one
+    index = get_project_index(latex_dir, build_root)
+    for s in stats:
+        stem = Path(s["target"]).stem
+        notation = index.notation(latex_dir / s["target"])
+        s["label"] = f"{notation} {stem}" if notation else stem
+        if s["draft"]:
+            s["label"] += " (draft)"
+        elif s["preview"]:
+            s["label"] += " (preview)"
+    regressions = [s for s in stats if s["regression"]]
+
+    if as_json:
+        echo(json.dumps(stats, indent=2))
+        return 1 if regressions else 0
+
+    if not stats:
+        echo("No builds recorded yet. Run book compile first.")
+        return 0
+
+    echo(f"{len(history)} build(s) recorded for {len(stats)} target(s); baseline: median of the previous {window}")
+    echo("-" * 50)
+
+    rows = [("Target", "Builds", "Last", "Baseline", "Change", "Engine", "TeX", "biber", "makeindex", "Pages", "Size", "Trend")]
+    for s in stats[:limit]:
+        rows.append((
+            s["label"],
+            str(s["builds"]) + (f" ({s['failed']} failed)" if s["failed"] else ""),
+            f"{s['last']:.1f}s",
+            f"{s['baseline']:.1f}s" if s["baseline"] is not None else "-",
+            f"{s['change']:+.0%}" if s["change"] is not None else "-",
+            s["engine"],
+            f"{s['tools']['tex']:.1f}s",
+            f"{s['tools']['biber']:.1f}s",
+            f"{s['tools']['makeindex']:.1f}s",
+            str(s["pages"]) if s["pages"] is not None else "-",
+            _format_size(s["pdf_size"]),
+            " ".join(f"{seconds:.1f}" for seconds in s["trend"]),
+        ))
+    for line in _format_table(rows):
+        echo(line)
+    if len(stats) > limit:
+        echo(f"... and {len(stats) - limit} more (use --limit)")
+
+    echo("-" * 50)
+    if regressions:
+        for s in regressions:
+            error_style(
+                f"Regression: {s['label']} took {s['last']:.1f}s, "
+                f"{s['change']:+.0%} over its baseline of {s['baseline']:.1f}s"
+            )
+        return 1
+    success_style("No regressions against the rolling baseline")
+    return 0
+
+
+def main():
+    """Standalone entry point."""
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Show compile time statistics from build/history.jsonl")
+    parser.add_argument("target", nargs="?", help="Only show targets whose path contains this text")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Builds in the rolling baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Slowdown reported as a regression (0.2 = 20%%)")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Number of targets to list")
+    parser.add_argument("--json", dest="as_json", action="store_true", help="Print the statistics as JSON")
+    args = parser.parse_args()
+
+    sys.exit(show_stats(
+        latex_dir, target=args.target, window=args.window, threshold=args.threshold,
+        limit=args.limit, as_json=args.as_json
+    ))
+
+
+if __name__ == "__main__":
+    main()
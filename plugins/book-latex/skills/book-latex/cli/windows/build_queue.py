@@ -0,0 +1,247 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Per-project build queue: one build per target at a time.
+
+Overlapping `book compile` runs of the same target would write the same
+.aux/.pdf files. Every compile therefore goes through run_queued, which
+keeps the queue in build/queue.json (guarded by build/queue.lock) and
+holds a per-target lock in build/locks/ while building.
+
+Requests are numbered per target. A build covers every request made
+before it started, so requests that queue up behind a running build are
+merged into a single build, and each caller gets the result of the
+latest build that covers its request. With supersede="cancel", a new
+request also stops a running build of the same target (it is out of
+date anyway) instead of waiting for it to finish.
+
+Locks are advisory file locks (flock, or msvcrt on Windows) and are
+released by the OS if a build crashes.
+
+Can be used as:
+1. Module: from build_queue import run_queued, queue_key
+2. Standalone: uv run build_queue.py  (show the queue)
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+QUEUE_FILENAME = "queue.json"
+QUEUE_LOCK_FILENAME = "queue.lock"
+LOCK_DIR = "locks"
+
+# What a new request does about a running build of the same target
+QUEUE_MODES = ("cancel", "wait")
+
+# How often a running build checks whether it has been superseded
+POLL_INTERVAL = 0.2
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, released when the process exits."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: int | None = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock. Returns False if blocking is False and it is held elsewhere."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.name == "nt":
+                # msvcrt has no blocking lock without a timeout, so poll
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise
+                        time.sleep(POLL_INTERVAL)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        """Release the lock."""
+        if self._fd is None:
+            return
+        try:
+            if os.name == "nt":
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def queue_key(build_dir: Path, tex_file: Path) -> str:
+    """Queue key of a target: its outputs, i.e. build directory and name."""
+    return (build_dir / tex_file.stem).as_posix()
+
+
+def _lock_path(build_root: Path, key: str) -> Path:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    return build_root / LOCK_DIR / f"{digest}.lock"
+
+
+def load_queue(build_root: Path) -> dict[str, dict]:
+    """Read the queue state of all targets."""
+    try:
+        return json.loads((build_root / QUEUE_FILENAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _update(build_root: Path, key: str, change=None) -> dict:
+    """Apply change to a target's queue entry under the queue lock; return a copy."""
+    with FileLock(build_root / QUEUE_LOCK_FILENAME):
+        queue = load_queue(build_root)
+        entry = queue.setdefault(key, {"requested": 0, "started": 0, "finished": 0, "cancel": 0, "pid": None, "result": None})
+        if change is not None:
+            change(entry)
+            queue_file = build_root / QUEUE_FILENAME
+            temp_file = queue_file.with_name(f"{QUEUE_FILENAME}.{os.getpid()}.tmp")
+            temp_file.write_text(json.dumps(queue, indent=2), encoding="utf-8")
+            os.replace(temp_file, queue_file)
+        return dict(entry)
+
+
+def run_queued(
+    build_root: Path,
+    key: str,
+    build,
+    cancel=None,
+    supersede: str = "cancel",
+    label: str | None = None,
+    echo=print
+) -> tuple[int, bool]:
+    """
+    Run a build through the project's queue.
+
+    Args:
+        build_root: The project's build directory (holds the queue and locks)
+        key: Queue key of the target (see queue_key)
+        build: Callable that builds the target and returns its exit code
+        cancel: Callable that stops the build in progress (called from a
+            watcher thread when a newer request supersedes it)
+        supersede: "cancel" to stop a running build of the target, "wait"
+            to let it finish first
+        label: Name of the target in messages (default: the key)
+        echo: Function for normal output
+
+    Returns:
+        (return_code, built) where built is False if the result is that of
+        a build made for another caller
+    """
+    build_root.mkdir(parents=True, exist_ok=True)
+    label = label or key
+
+    def request(entry):
+        entry["requested"] += 1
+        if supersede == "cancel" and entry["started"] > entry["finished"]:
+            entry["cancel"] = entry["requested"]
+
+    entry = _update(build_root, key, request)
+    generation = entry["requested"]
+    if entry["cancel"] == generation:
+        echo(f"Cancelling the running build of {label} (pid {entry['pid']}), superseded by this request")
+
+    target_lock = FileLock(_lock_path(build_root, key))
+    while True:
+        if not target_lock.acquire(blocking=False):
+            entry = _update(build_root, key)
+            echo(f"Waiting for the running build of {label} (pid {entry['pid']})...")
+            target_lock.acquire()
+        try:
+            entry = _update(build_root, key)
+            if entry["finished"] >= generation:
+                return entry["result"], False
+
+            # This build covers every request made so far
+            started = entry["requested"]
+
+            def start(entry):
+                entry["started"] = started
+                entry["pid"] = os.getpid()
+
+            _update(build_root, key, start)
+
+            superseded = threading.Event()
+            done = threading.Event()
+
+            def watch():
+                while not done.wait(POLL_INTERVAL):
+                    if load_queue(build_root).get(key, {}).get("cancel", 0) > started:
+                        superseded.set()
+                        if cancel is not None:
+                            cancel()
+                        return
+
+            watcher = threading.Thread(target=watch, daemon=True)
+            watcher.start()
+            try:
+                return_code = build()
+            finally:
+                done.set()
+                watcher.join()
+
+            if superseded.is_set():
+                # A newer request builds the target; its result is ours too
+                def abandon(entry):
+                    entry["started"] = entry["finished"]
+
+                _update(build_root, key, abandon)
+                echo(f"Build of {label} superseded by a newer request")
+                continue
+
+            def finish(entry):
+                entry["finished"] = started
+                entry["result"] = return_code
+
+            _update(build_root, key, finish)
+            return return_code, True
+        finally:
+            target_lock.release()
+
+
+def main():
+    """Standalone entry point: print the queue state."""
+    build_root = Path.cwd() / "build"
+    queue = load_queue(build_root)
+    if not queue:
+        print("The build queue is empty.")
+        sys.exit(0)
+    for key, entry in sorted(queue.items()):
+        state = "building" if entry["started"] > entry["finished"] else "idle"
+        print(f"{key}: {state}, {entry['requested']} request(s), last result {entry['result']}")
+
+
+if __name__ == "__main__":
+    main()
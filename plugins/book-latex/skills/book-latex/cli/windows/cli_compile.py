@@ -0,0 +1,302 @@
+"""
+The `book compile` and `book resolve` commands, and target resolution
+shared with the other commands that take compile targets.
+
+How book compile builds a target (see compile_latex.compile_with_status):
+
+- Cache: the compile is skipped when neither the file nor anything it
+  includes (subfiles, inputs, figures, .bib files, local packages) has
+  changed since the last successful build with the same options.
+- Lint: before TeX runs, the sources are linted (see book lint), so
+  unbalanced braces or environments and broken \\subfile links fail the
+  build in milliseconds.
+- Passes: biber and extra LaTeX passes only run when the log or the
+  auxiliary files show they are needed, up to --max-passes. Biber is
+  skipped, and the .bbl reused, while the cited keys and the .bib files
+  are unchanged.
+- Engine: chosen from the preamble and what is installed: pdflatex for
+  plain preambles, lualatex or xelatex for fontspec and engine-specific
+  code, tectonic as a last resort.
+- Format: the preamble is precompiled into build/fmt/ (mylatexformat) and
+  reused until the preamble or a file it loads changes.
+- Diagnostics: every build writes build/<name>.diagnostics.json with
+  errors, undefined references/citations and over/underfull boxes mapped
+  to source files and lines; --quiet prints only that summary.
+- Parallel targets: several targets are compiled at once, each in its own
+  build/<target>/ directory, followed by a summary table.
+- Queue: builds of the same target never overlap. A new compile cancels a
+  running build of that target (or waits for it with --wait), requests
+  made meanwhile are merged into one build, and every caller gets the
+  result of the latest build.
+- Draft: figures are drawn as boxes, hyperref is skipped, biber is not
+  run and output goes to build/draft/, leaving the final PDF untouched.
+- Preview: the final look, with downscaled proxies of the PNG/JPEG
+  figures made in parallel and cached in build/proxies/ by content hash;
+  output goes to build/preview/.
+- Split: every chapter is compiled on its own, in parallel, with the
+  numbering and labels of the last full build (build/main.aux), and the
+  chapters are merged into build/split/preview.pdf. Chapters whose
+  numbering may be off are stamped as stale, and a full build is started
+  in the background so the next split compile is exact again.
+- Typos: a misspelt target that clearly matches one file is compiled
+  with a note; otherwise the closest targets are listed.
+"""
+
+import json
+import sys
+from functools import partial
+from pathlib import Path
+
+import click
+
+from compile_latex import (
+    find_tex_file,
+    run_compile,
+    compile_targets,
+    expand_target_pattern,
+    is_target_pattern,
+    path_to_numeric_index,
+    suggest_targets,
+    AmbiguousTargetError,
+    DEFAULT_MAX_PASSES,
+    ENGINE_NAMES,
+)
+from split_compile import split_compile
+
+
+def resolve_compile_target(latex_dir: Path, name: str, command: str = "compile", guess: bool = False) -> Path:
+    """Resolve a compile target, printing an error and exiting if it fails.
+
+    Only a file name, name prefix or numeric notation is accepted: for a
+    typo the closest targets are listed and the command exits with 1.
+    With guess=True (book compile) an obvious fix of the typo is used
+    instead, with a warning.
+    """
+    try:
+        tex_file = find_tex_file(latex_dir, name)
+    except AmbiguousTargetError as e:
+        click.secho(f"Error: '{e.target}' matches multiple files:", fg="red")
+        for i, match in enumerate(e.matches, 1):
+            rel_path = match.relative_to(latex_dir)
+            click.echo(f"  {i}. {rel_path}")
+        if e.suggestions:
+            click.echo()
+            click.secho("Use numeric notation to specify which one:", fg="yellow")
+            for suggestion, path in e.suggestions:
+                rel_path = path.relative_to(latex_dir)
+                click.echo(f"  book {command} {suggestion}  # {rel_path}")
+        sys.exit(1)
+
+    if tex_file is None:
+        # Probably a typo: take the obvious match, or offer the closest ones
+        tex_file, results = suggest_targets(latex_dir, name)
+        if tex_file is not None and guess:
+            click.secho(f"No file named '{name}'; using {tex_file.relative_to(latex_dir)}", fg="yellow")
+            return tex_file
+        click.secho(f"Error: Could not find {name}.tex in {latex_dir}", fg="red")
+        if results:
+            click.echo()
+            click.secho("Did you mean:", fg="yellow")
+            for result in results:
+                target = result["notation"] or Path(result["file"]).stem
+                title = f" \"{result['title']}\"" if result["title"] else ""
+                click.echo(f"  book {command} {target}  # {result['file']}{title}")
+        sys.exit(1)
+
+    return tex_file
+
+
+@click.command()
+@click.argument("targets", nargs=-1)
+@click.option("--bib", "-b", is_flag=True, help="Also compile bibliography with biber")
+@click.option("--force", "-f", is_flag=True, help="Compile even if the build is up to date")
+@click.option("--max-passes", type=click.IntRange(min=1), default=DEFAULT_MAX_PASSES, show_default=True, help="Maximum number of LaTeX passes")
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=None, help="Parallel jobs for multiple targets (default: CPU count)")
+@click.option("--no-fmt", "no_fmt", is_flag=True, help="Do not use a precompiled preamble format")
+@click.option("--quiet", "-q", is_flag=True, help="Print only a JSON diagnostics summary")
+@click.option("--draft", "-d", is_flag=True, help="Fast draft build into build/draft/ (figure boxes, no biber)")
+@click.option("--preview", "-p", is_flag=True, help="Build into build/preview/ with low-resolution figure proxies")
+@click.option("--engine", "-e", type=click.Choice(("auto",) + ENGINE_NAMES), default="auto", show_default=True, help="TeX engine (auto: chosen from the preamble and what is installed)")
+@click.option("--split", is_flag=True, help="Compile every chapter in parallel and merge them into build/split/preview.pdf")
+@click.option("--no-full-build", "no_full_build", is_flag=True, help="With --split: do not start a full build in the background")
+@click.option("--wait", is_flag=True, help="Wait for a running build of the same target instead of cancelling it")
+@click.option("--no-lint", "no_lint", is_flag=True, help="Do not lint the sources before compiling")
+def compile(targets: tuple[str, ...], bib: bool, force: bool, max_passes: int, jobs: int | None, no_fmt: bool, quiet: bool, draft: bool, preview: bool, engine: str, split: bool, no_full_build: bool, wait: bool, no_lint: bool):
+    """Compile one or more LaTeX files from the book.
+
+    TARGETS are names of .tex files without extension (default: main).
+
+    Supports:
+    - Prefix matching: 'ch01' will find 'ch01-ettersporselprognoser.tex'
+    - Numeric notation: '3.5.13' for part 3, chapter 5, section 13
+    - Appendix notation: 'A.1' for appendix 1, 'A.2.5' for appendix 2 section 5
+    - Wildcards: '2.*' for every chapter in part 2, 'A.*' for every appendix
+
+    Up-to-date targets are skipped (use --force to rebuild), and the
+    sources are linted before TeX runs.
+
+    Examples:
+
+        book compile              # Compiles main.tex
+
+        book compile ch01         # Compiles ch01-*.tex
+
+        book compile 3.5          # Compiles part03/ch05
+
+        book compile A.1          # Compiles app01 in backmatter
+
+        book compile --bib        # Compiles main.tex with bibliography
+
+        book compile main --bib   # Same as above
+
+        book compile ch01 --force # Recompiles even if up to date
+
+        book compile 2.* A.* -j 4 # Compiles all chapters of part 2 and all appendices
+
+        book compile 3.5 --quiet  # Prints only the JSON diagnostics
+
+        book compile 3.5 --draft  # Fast preview in build/draft/
+
+        book compile --preview    # Final look with light figures in build/preview/
+
+        book compile --split -j 8 # Parallel whole-book preview
+
+        book compile -e latexmk   # Compiles main.tex with latexmk
+    """
+    # Find latex directory relative to current working directory
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    if split:
+        if targets or draft or preview or quiet:
+            click.secho("Error: --split compiles every chapter and cannot be combined with targets, --draft, --preview or --quiet", fg="red")
+            sys.exit(1)
+        sys.exit(split_compile(
+            latex_dir,
+            jobs=jobs,
+            bib=bib,
+            force=force,
+            max_passes=max_passes,
+            engine=engine,
+            full_build=not no_full_build,
+            lint=not no_lint,
+            echo=click.echo,
+            success_style=partial(click.secho, fg="green"),
+            error_style=partial(click.secho, fg="red")
+        ))
+
+    targets = targets or ("main",)
+
+    # Expand wildcard targets such as 2.* into numeric targets
+    names = []
+    for name in targets:
+        if is_target_pattern(name):
+            expanded = expand_target_pattern(latex_dir, name)
+            if not expanded:
+                click.secho(f"Error: '{name}' does not match any targets", fg="red")
+                sys.exit(1)
+            names.extend(expanded)
+        else:
+            names.append(name)
+
+    # Check for excluded file
+    if "localsettings" in names:
+        click.secho("Error: localsettings.tex is not a standalone file and cannot be compiled.", fg="red")
+        sys.exit(1)
+
+    # Find the tex files
+    tex_files = []
+    for name in names:
+        tex_file = resolve_compile_target(latex_dir, name, guess=True)
+        if tex_file not in tex_files:
+            tex_files.append(tex_file)
+
+    # Compile with click-styled output
+    if len(tex_files) == 1 and not any(is_target_pattern(n) for n in targets):
+        return_code = run_compile(
+            tex_files[0],
+            latex_dir,
+            bib=bib,
+            force=force,
+            max_passes=max_passes,
+            use_fmt=not no_fmt,
+            quiet=quiet,
+            draft=draft,
+            preview=preview,
+            engine=engine,
+            queue="wait" if wait else "cancel",
+            lint=not no_lint,
+            echo=click.echo,
+            success_style=partial(click.secho, fg="green"),
+            error_style=partial(click.secho, fg="red")
+        )
+    else:
+        return_code = compile_targets(
+            tex_files,
+            latex_dir,
+            jobs=jobs,
+            bib=bib,
+            force=force,
+            max_passes=max_passes,
+            use_fmt=not no_fmt,
+            quiet=quiet,
+            draft=draft,
+            preview=preview,
+            engine=engine,
+            queue="wait" if wait else "cancel",
+            lint=not no_lint,
+            echo=click.echo,
+            success_style=partial(click.secho, fg="green"),
+            error_style=partial(click.secho, fg="red")
+        )
+    sys.exit(return_code)
+
+
+@click.command()
+@click.argument("target", default="main")
+@click.option("--json", "as_json", is_flag=True, help="Print the result as JSON")
+def resolve(target: str, as_json: bool):
+    """Print the .tex file a compile target resolves to.
+
+    Accepts the same targets as book compile, including wildcards. A
+    misspelt name is not guessed: the closest targets are listed and the
+    command exits with 1.
+
+    Examples:
+
+        book resolve 3.5        # latex/200-bodymatter/part03-.../ch05-....tex
+
+        book resolve 2.* --json # All chapters of part 2 as JSON
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    names = expand_target_pattern(latex_dir, target) if is_target_pattern(target) else [target]
+    if not names:
+        click.secho(f"Error: no targets match '{target}'", fg="red")
+        sys.exit(1)
+
+    resolved = []
+    for name in names:
+        tex_file = resolve_compile_target(latex_dir, name, "resolve")
+        resolved.append({
+            "target": name,
+            "file": tex_file.relative_to(cwd).as_posix(),
+            "notation": path_to_numeric_index(tex_file, latex_dir),
+        })
+
+    if as_json:
+        click.echo(json.dumps(resolved if is_target_pattern(target) else resolved[0]))
+    else:
+        for entry in resolved:
+            click.echo(entry["file"])
@@ -0,0 +1,51 @@
+"""The `book find` command."""
+
+import json
+import sys
+from pathlib import Path
+
+import click
+
+from search_index import DEFAULT_LIMIT, format_result, search
+
+
+@click.command()
+@click.argument("query", nargs=-1, required=True)
+@click.option("--limit", "-n", type=click.IntRange(min=1), default=DEFAULT_LIMIT, show_default=True, help="Number of results")
+@click.option("--json", "as_json", is_flag=True, help="Print the results as JSON")
+def find(query: tuple[str, ...], limit: int, as_json: bool):
+    """Find files by slug or chapter/section title, tolerating typos.
+
+    Searches the slugs of all .tex files (ch05-demand-forecasting ->
+    demand-forecasting) and the first \\part/\\chapter/\\section title
+    inside each file with a trigram index, and lists the best matches with
+    their numeric notation for use with book compile.
+
+    The index is cached in build/search-index.json and only files changed
+    since the last search are read again.
+
+    Examples:
+
+        book find forecasting       # Files about forecasting
+
+        book find "demnad prognose" # Typos and partial words are fine
+
+        book find intro --json      # Machine-readable results
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    results = search(latex_dir, " ".join(query), limit=limit)
+    if as_json:
+        click.echo(json.dumps(results, indent=2))
+    elif not results:
+        click.secho(f"No matches for '{' '.join(query)}'", fg="yellow")
+    else:
+        for result in results:
+            click.echo(f"{result['score']:.2f}  {format_result(result)}")
+    sys.exit(0 if results else 1)
@@ -0,0 +1,108 @@
+"""The `book image` commands (image generation with the Gemini API)."""
+
+import sys
+from functools import partial
+from pathlib import Path
+
+import click
+
+from image_gen import generate_image, edit_image
+
+
+@click.group()
+def image():
+    """Image generation and editing commands.
+
+    Generate new images or edit existing ones using AI (Gemini API).
+    Requires GEMINI_API_KEY in .env file.
+    """
+    pass
+
+
+@image.command()
+@click.option("--path", "-p", required=True, help="Output path for the image (e.g., figures/flowchart.png)")
+@click.option("--resolution", "-r", type=click.Choice(["1K", "2K", "4K"]), default="1K", help="Image resolution")
+@click.argument("prompt")
+def new(path: str, resolution: str, prompt: str):
+    """Generate a new image from a text prompt.
+
+    PROMPT is the text description of the image to generate.
+
+    Examples:
+
+        book image new --path "figures/flowchart.png" "A process flowchart"
+
+        book image new -p "diagrams/network.png" -r 4K "Network topology diagram"
+    """
+    return_code = generate_image(
+        prompt=prompt,
+        output_path=Path(path),
+        resolution=resolution,
+        echo=click.echo,
+        error_style=partial(click.secho, fg="red")
+    )
+    sys.exit(return_code)
+
+
+@image.command()
+@click.option("--path", "-p", required=True, help="Path to image to edit (will be overwritten)")
+@click.option("--resolution", "-r", type=click.Choice(["1K", "2K", "4K"]), default=None, help="Output resolution (auto-detected if not specified)")
+@click.argument("prompt")
+def edit(path: str, resolution: str | None, prompt: str):
+    """Edit an existing image with a text prompt.
+
+    PROMPT is the text instructions for editing the image.
+    The edited image overwrites the original file.
+
+    Examples:
+
+        book image edit --path "figures/chart.png" "Add a legend in the corner"
+
+        book image edit -p "logo.png" -r 2K "Change the color scheme to blue"
+    """
+    return_code = edit_image(
+        prompt=prompt,
+        image_path=Path(path),
+        resolution=resolution,
+        echo=click.echo,
+        error_style=partial(click.secho, fg="red")
+    )
+    sys.exit(return_code)
+
+
+@image.command()
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--concurrency", "-c", type=click.IntRange(min=1), default=None, help="Jobs at once (default: from the manifest, or 4)")
+@click.option("--retries", type=click.IntRange(min=0), default=5, show_default=True, help="Retries on rate-limit and server errors")
+@click.option("--force", is_flag=True, help="Run every job again, ignoring earlier progress")
+@click.option("--dry-run", "-n", is_flag=True, help="Only list the jobs that would run")
+def batch(manifest: Path, concurrency: int | None, retries: int, force: bool, dry_run: bool):
+    """Generate and edit many images from a YAML manifest, concurrently.
+
+    MANIFEST lists the images, each with a path (relative to the manifest),
+    a prompt, and optionally "action: edit" and a resolution. Jobs run
+    concurrently; the jobs on one path run in order. Rate-limit and server
+    errors are retried with exponential backoff. Progress is saved next to
+    the manifest after every job, so running the batch again skips what is
+    done and resumes an interrupted run. GEMINI_BASE_URL points the client
+    at another endpoint, e.g. a local stub.
+
+    Examples:
+
+        book image batch figures.yaml -n        # List the pending jobs
+
+        book image batch figures.yaml -c 8
+    """
+    from image_batch import batch_images
+
+    return_code = batch_images(
+        manifest,
+        concurrency=concurrency,
+        retries=retries,
+        force=force,
+        dry_run=dry_run,
+        echo=click.echo,
+        success_style=partial(click.secho, fg="green"),
+        error_style=partial(click.secho, fg="red")
+    )
+    sys.exit(return_code)
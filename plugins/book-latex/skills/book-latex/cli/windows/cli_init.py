@@ -0,0 +1,147 @@
+"""The `book init`, `book scaffold` and `book fill` commands."""
+
+import sys
+from functools import partial
+from pathlib import Path
+
+import click
+
+from init_book import init_project
+
+
+@click.command()
+@click.option("--title", help="Book title")
+@click.option("--subtitle", help="Book subtitle")
+@click.option("--description", help="Book description")
+@click.option("--authors", multiple=True, help="Book authors (can be specified multiple times)")
+@click.option("--year", help="Publication year")
+@click.option("--edition", help="Book edition")
+@click.option("--publisher", help="Publisher name")
+@click.option("--city", help="Publisher city")
+@click.option("--state", help="Publisher state")
+@click.option("--zip", "zip_code", help="Publisher zip code")
+@click.option("--country", help="Publisher country")
+@click.option("--language", help="Book language (e.g., english, norsk)")
+@click.option("--type", "book_type", help="Book type")
+@click.option("--theme", help="Book theme")
+@click.option("--from-outline", "outline_file", type=click.Path(exists=True, dir_okay=False, path_type=Path), help="Outline YAML file with parts, chapters and sections to create")
+def init(title, subtitle, description, authors, year, edition, publisher, city, state, zip_code, country, language, book_type, theme, outline_file):
+    """Initialize a new LaTeX book project.
+
+    Creates:
+      - config.yaml with project settings
+      - latex/ folder with book template
+      - with --from-outline, the parts, chapters and sections of an outline
+        file (see book scaffold)
+
+    All options are optional. When provided, they pre-fill the corresponding
+    placeholders in the generated files.
+
+    Examples:
+
+        book init              # Create LaTeX book project with placeholders
+
+        book init --title "My Book" --authors "John Doe"
+
+        book init --authors "John Doe" --authors "Jane Smith" --year 2024
+
+        book init --title "My Book" --from-outline outline.yaml
+    """
+    cwd = Path.cwd()
+
+    return_code = init_project(
+        cwd,
+        title=title,
+        subtitle=subtitle,
+        description=description,
+        authors=authors,
+        year=year,
+        edition=edition,
+        publisher=publisher,
+        city=city,
+        state=state,
+        zip_code=zip_code,
+        country=country,
+        language=language,
+        book_type=book_type,
+        theme=theme,
+        outline_file=outline_file,
+        echo=click.echo,
+        success_style=partial(click.secho, fg="green"),
+        error_style=partial(click.secho, fg="red")
+    )
+    sys.exit(return_code)
+
+
+@click.command()
+@click.argument("outline_file", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--dry-run", "-n", is_flag=True, help="Only show what would be created and changed")
+def scaffold(outline_file: Path, dry_run: bool):
+    """Create parts, chapters, appendices and sections from an outline file.
+
+    OUTLINE_FILE is a YAML file with "parts" (each with "chapters", each
+    with "sections") and "appendices" (each with "sections"). An item is a
+    title, or a mapping with "title" and optionally "slug" and, for parts,
+    "roman". New nodes are numbered after the existing ones and added to
+    the \\subfile lists; nodes whose slug already exists are filled in, so
+    the outline can be applied again as it grows.
+
+    Examples:
+
+        book scaffold outline.yaml -n   # Show the files and diffs
+
+        book scaffold outline.yaml
+    """
+    from scaffold_outline import scaffold_outline
+
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    sys.exit(scaffold_outline(
+        latex_dir,
+        outline_file,
+        dry_run=dry_run,
+        echo=click.echo,
+        success_style=partial(click.secho, fg="green"),
+        error_style=partial(click.secho, fg="red")
+    ))
+
+
+@click.command()
+@click.option("--dry-run", "-n", is_flag=True, help="Only list the files that would change")
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=None, help="Worker threads")
+def fill(dry_run: bool, jobs: int | None):
+    """Apply the metadata in config.yaml to the .tex files.
+
+    Replaces the [PROMPT: ...] placeholders that have a value in
+    config.yaml (title, subtitle or description, authors) and the babel
+    language in every .tex file under latex/, in one scan per file. Only
+    files whose content changes are rewritten. The placeholders still left
+    are listed with their files.
+
+    Examples:
+
+        book fill -n            # List the files that would change
+
+        book fill
+    """
+    from fill_metadata import fill_project
+
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    sys.exit(fill_project(
+        cwd,
+        dry_run=dry_run,
+        jobs=jobs,
+        echo=click.echo,
+        success_style=partial(click.secho, fg="green"),
+        error_style=partial(click.secho, fg="red")
+    ))
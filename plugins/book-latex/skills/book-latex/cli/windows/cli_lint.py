@@ -0,0 +1,49 @@
+"""The `book lint` command."""
+
+import sys
+from functools import partial
+from pathlib import Path
+
+import click
+
+from latex_lint import run_lint
+
+
+@click.command()
+@click.option("--json", "as_json", is_flag=True, help="Print the problems as JSON")
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=None, help="Parallel jobs for many files (default: CPU count)")
+def lint(as_json: bool, jobs: int | None):
+    """Check braces, environments and subfiles without compiling.
+
+    Every .tex file is tokenized (comments and verbatim skipped) and
+    checked for unbalanced braces, \\begin/\\end mismatches, \\subfile
+    links to missing files, and subfiles without a
+    \\documentclass[<path to main.tex>]{subfiles} line that points at an
+    existing file. Problems are printed as file:line: message.
+
+    book compile runs the same check on the files a target includes
+    before starting TeX (--no-lint skips it). Exits with 1 on problems.
+
+    Examples:
+
+        book lint               # Check every .tex file
+
+        book lint --json        # Machine-readable report
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    return_code = run_lint(
+        latex_dir,
+        as_json=as_json,
+        jobs=jobs,
+        echo=click.echo,
+        success_style=partial(click.secho, fg="green"),
+        error_style=partial(click.secho, fg="red")
+    )
+    sys.exit(return_code)
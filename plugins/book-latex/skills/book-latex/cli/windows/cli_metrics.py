@@ -0,0 +1,54 @@
+"""The `book wc` (alias `book metrics`) command."""
+
+import sys
+from functools import partial
+from pathlib import Path
+
+import click
+
+from latex_metrics import show_metrics, DEFAULT_DEPTH
+
+
+@click.command()
+@click.argument("target", required=False)
+@click.option("--depth", "-d", type=click.IntRange(min=1), default=DEFAULT_DEPTH, show_default=True, help="Levels to list (1 parts, 2 chapters, 3 sections)")
+@click.option("--json", "as_json", is_flag=True, help="Print the counts as JSON")
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=None, help="Parallel jobs for tokenising (default: CPU count)")
+def wc(target: str | None, depth: int, as_json: bool, jobs: int | None):
+    """Count words, figures, tables, equations and citations.
+
+    Counts the numbered files of 200-bodymatter and 300-backmatter without
+    compiling, ignoring comments, math and LaTeX commands, and adds the
+    counts up by part, chapter and section. TARGET limits the listing to
+    one notation and what is below it.
+
+    Counts are cached by content hash in build/metrics-index.json, so a
+    rerun only tokenises files that changed.
+
+    Examples:
+
+        book wc                 # Parts and chapters
+
+        book wc 2 -d 3          # Chapters and sections of part 2
+
+        book metrics --json     # Machine-readable counts
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    return_code = show_metrics(
+        latex_dir,
+        target=target,
+        depth=depth,
+        as_json=as_json,
+        jobs=jobs,
+        echo=click.echo,
+        success_style=partial(click.secho, fg="green"),
+        error_style=partial(click.secho, fg="red")
+    )
+    sys.exit(return_code)
@@ -0,0 +1,42 @@
+"""The `book outline` command."""
+
+import json
+import sys
+from pathlib import Path
+
+import click
+
+from latex_outline import build_outline, write_outline
+
+
+@click.command()
+@click.option("--json", "as_json", is_flag=True, help="Print the tree as JSON instead of writing outline.md")
+def outline(as_json: bool):
+    """Generate an annotated tree of the latex folder.
+
+    Creates outline.md in the project root with the directory structure,
+    each .tex file annotated with its numeric notation and its part,
+    chapter or section title. Build directories and LaTeX artefacts are
+    left out. outline.md is only rewritten when the outline changed.
+
+    Examples:
+
+        book outline          # Creates outline.md with latex/ tree
+
+        book outline --json   # The tree as JSON
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+    output_file = cwd / "outline.md"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    if as_json:
+        click.echo(json.dumps(build_outline(latex_dir), indent=2, ensure_ascii=False))
+    elif write_outline(latex_dir, output_file):
+        click.secho(f"Outline saved to {output_file}", fg="green")
+    else:
+        click.echo(f"Outline unchanged: {output_file}")
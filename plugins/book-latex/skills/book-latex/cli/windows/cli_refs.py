@@ -0,0 +1,55 @@
+"""The `book refs` command."""
+
+import sys
+from functools import partial
+from pathlib import Path
+
+import click
+
+from latex_refs import check_refs
+
+
+@click.command()
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON")
+@click.option("--no-orphans", "no_orphans", is_flag=True, help="Do not list labels that are never referenced")
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=None, help="Parallel jobs for rescanning (default: CPU count)")
+def refs(as_json: bool, no_orphans: bool, jobs: int | None):
+    """Check labels, references and citations without compiling.
+
+    Scans every .tex file for \\label, \\ref, \\cref, \\eqref,
+    \\pageref (and similar) and \\cite, and the .bib files for entry keys.
+    Reports references to undefined labels, labels defined more than once,
+    citations missing from the .bib files and orphaned labels that nothing
+    refers to.
+
+    The scan is cached in build/refs-index.json and only files changed
+    since the last check are read again, so it is cheap to run after every
+    structural edit. Exits with 1 on undefined or duplicate labels and
+    undefined citations.
+
+    Examples:
+
+        book refs               # Check the whole book
+
+        book refs --no-orphans  # Only list problems
+
+        book refs --json        # Machine-readable report
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    return_code = check_refs(
+        latex_dir,
+        as_json=as_json,
+        show_orphans=not no_orphans,
+        jobs=jobs,
+        echo=click.echo,
+        success_style=partial(click.secho, fg="green"),
+        error_style=partial(click.secho, fg="red")
+    )
+    sys.exit(return_code)
@@ -0,0 +1,135 @@
+"""The `book mv`, `book swap` and `book renumber` commands."""
+
+import sys
+from functools import partial
+from pathlib import Path
+
+import click
+
+from cli_compile import resolve_compile_target
+from restructure import RestructureError, apply_plan, container_of_file, plan_move, plan_renumber, plan_swap
+
+
+def run_restructure(latex_dir: Path, make_plan, dry_run: bool) -> None:
+    """Plan and apply a restructuring, exiting with its return code."""
+    try:
+        plan = make_plan()
+    except RestructureError as e:
+        click.secho(f"Error: {e}", fg="red")
+        sys.exit(1)
+    return_code = apply_plan(
+        latex_dir,
+        plan,
+        dry_run=dry_run,
+        echo=click.echo,
+        success_style=partial(click.secho, fg="green"),
+        error_style=partial(click.secho, fg="red")
+    )
+    sys.exit(return_code)
+
+
+@click.command()
+@click.argument("source")
+@click.argument("dest", required=False)
+@click.option("--position", "-p", type=click.IntRange(min=1), default=None, help="Position in the destination (default: last)")
+@click.option("--dry-run", "-n", "dry_run", is_flag=True, help="Only show the renames and aggregator edits")
+def mv(source: str, dest: str | None, position: int | None, dry_run: bool):
+    """Move a chapter, section, part or appendix and renumber around it.
+
+    SOURCE is a target as for book compile. DEST is the part (for a
+    chapter) or chapter/appendix (for a section) to move it into; without
+    DEST it stays in its folder and --position reorders it. Misspelt
+    targets are not guessed: the closest ones are listed instead.
+
+    Folders and files are renamed, the siblings left behind and after the
+    new position are renumbered, chapters switch between roman and arabic
+    numbers when they change part, and the \\subfile lines of the
+    aggregators are rewritten. Everything is applied as one batch and
+    undone if a step fails.
+
+    Examples:
+
+        book mv 2.3 3              # Chapter 2.3 to the end of part 3
+
+        book mv 2.3 1 -p 2         # ... as the second chapter of part 1 (chii)
+
+        book mv 2.3.4 2.5 -n       # Preview moving a section to chapter 2.5
+
+        book mv 4 -p 2             # Make part 4 the second part
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    source_file = resolve_compile_target(latex_dir, source, "mv")
+    dest_file = resolve_compile_target(latex_dir, dest, "mv") if dest else None
+    run_restructure(latex_dir, partial(plan_move, latex_dir, source_file, dest_file, position), dry_run)
+
+
+@click.command()
+@click.argument("first")
+@click.argument("second")
+@click.option("--dry-run", "-n", "dry_run", is_flag=True, help="Only show the renames and aggregator edits")
+def swap(first: str, second: str, dry_run: bool):
+    """Exchange the positions of two chapters, sections, parts or appendices.
+
+    Works within a folder and across folders (two chapters of different
+    parts change places, renumbered in their new part's scheme).
+
+    Examples:
+
+        book swap 2.2 2.3          # Swap two chapters of part 2
+
+        book swap 2.1.3 2.1.4 -n   # Preview swapping two sections
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    first_file = resolve_compile_target(latex_dir, first, "swap")
+    second_file = resolve_compile_target(latex_dir, second, "swap")
+    run_restructure(latex_dir, partial(plan_swap, latex_dir, first_file, second_file), dry_run)
+
+
+@click.command()
+@click.argument("target", required=False)
+@click.option("--dry-run", "-n", "dry_run", is_flag=True, help="Only show the renames and aggregator edits")
+def renumber(target: str | None, dry_run: bool):
+    """Renumber chapters, sections, parts or appendices in their current order.
+
+    Closes gaps and fixes duplicate numbers left by manual edits. TARGET
+    is a part (its chapters), a chapter or appendix (its sections), or
+    bodymatter/backmatter (the parts/appendices); without it the whole
+    book is renumbered.
+
+    Examples:
+
+        book renumber              # Whole book
+
+        book renumber 2 -n         # Preview renumbering the chapters of part 2
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    container = None
+    if target:
+        tex_file = resolve_compile_target(latex_dir, target, "renumber")
+        try:
+            container = container_of_file(tex_file, latex_dir)
+        except RestructureError as e:
+            click.secho(f"Error: {e}", fg="red")
+            sys.exit(1)
+    run_restructure(latex_dir, partial(plan_renumber, latex_dir, container), dry_run)
@@ -0,0 +1,54 @@
+"""The `book stats` command."""
+
+import sys
+from functools import partial
+from pathlib import Path
+
+import click
+
+from build_history import show_stats, DEFAULT_LIMIT, DEFAULT_THRESHOLD, DEFAULT_WINDOW
+
+
+@click.command()
+@click.argument("target", required=False)
+@click.option("--window", type=click.IntRange(min=1), default=DEFAULT_WINDOW, show_default=True, help="Previous builds in the rolling baseline")
+@click.option("--threshold", type=click.FloatRange(min=0), default=DEFAULT_THRESHOLD, show_default=True, help="Slowdown reported as a regression (0.2 = 20%)")
+@click.option("--limit", "-n", type=click.IntRange(min=1), default=DEFAULT_LIMIT, show_default=True, help="Number of targets to list")
+@click.option("--json", "as_json", is_flag=True, help="Print the statistics as JSON")
+def stats(target: str | None, window: int, threshold: float, limit: int, as_json: bool):
+    """Show compile times, slowest targets and regressions.
+
+    Every compile records the wall time of each engine, biber and
+    makeindex pass, the page count and the PDF size in build/history.jsonl.
+    Targets are listed slowest first with their recent build times, and a
+    build more than --threshold slower than the median of the previous
+    --window builds is reported as a regression (exit code 1).
+
+    Examples:
+
+        book stats              # All targets, slowest first
+
+        book stats ch03         # Only targets whose path contains ch03
+
+        book stats --json       # Machine-readable statistics
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    return_code = show_stats(
+        latex_dir,
+        target=target,
+        window=window,
+        threshold=threshold,
+        limit=limit,
+        as_json=as_json,
+        echo=click.echo,
+        success_style=partial(click.secho, fg="green"),
+        error_style=partial(click.secho, fg="red")
+    )
+    sys.exit(return_code)
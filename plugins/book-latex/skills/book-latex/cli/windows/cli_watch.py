@@ -0,0 +1,60 @@
+"""The `book watch` command."""
+
+import sys
+from functools import partial
+from pathlib import Path
+
+import click
+
+from watch_latex import watch as watch_latex, DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL
+
+
+@click.command()
+@click.option("--bib", "-b", is_flag=True, help="Also compile bibliography with biber")
+@click.option("--debounce", type=float, default=DEFAULT_DEBOUNCE, show_default=True, help="Seconds to wait for more changes before building")
+@click.option("--poll", is_flag=True, help="Use polling instead of inotify")
+@click.option("--interval", type=float, default=DEFAULT_POLL_INTERVAL, show_default=True, help="Polling interval in seconds")
+@click.option("--draft", "-d", is_flag=True, help="Make fast draft builds into build/draft/")
+@click.option("--preview", "-p", is_flag=True, help="Build into build/preview/ with low-resolution figure proxies")
+def watch(bib: bool, debounce: float, poll: bool, interval: float, draft: bool, preview: bool):
+    """Recompile the affected file whenever latex/ changes.
+
+    Watches latex/ (inotify on Linux, polling elsewhere) and merges bursts
+    of saves into one build. Each change is mapped to the smallest file
+    that can be compiled on its own: a section, otherwise the chapter,
+    part or matter aggregator of its folder, and main.tex for changes to
+    the preamble.
+
+    Examples:
+
+        book watch              # Recompile changed sections as you save
+
+        book watch --bib        # Also run biber when needed
+
+        book watch --poll       # Use polling (e.g. on network drives)
+
+        book watch --draft      # Fast draft previews while writing
+
+        book watch --preview    # Final look with light figures
+    """
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        click.secho(f"Error: latex directory not found at {latex_dir}", fg="red")
+        click.echo("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    return_code = watch_latex(
+        latex_dir,
+        bib=bib,
+        debounce=debounce,
+        poll=poll,
+        interval=interval,
+        draft=draft,
+        preview=preview,
+        echo=click.echo,
+        success_style=partial(click.secho, fg="green"),
+        error_style=partial(click.secho, fg="red")
+    )
+    sys.exit(return_code)
@@ -6,7 +6,7 @@
 Core compilation logic for LaTeX books.
 
 Can be used as:
-1. Module: from compile_latex import find_tex_file, run_compile
+1. Module: from compile_latex import find_tex_file, run_compile, compile_with_status
 2. Standalone: uv run compile_latex.py [filename]
 
 Examples:
@@ -15,18 +15,92 @@ Examples:
     uv run compile_latex.py ch01-name    # Compiles specific chapter
     uv run compile_latex.py 3.5.13       # Compiles part03/ch05/sec13 (numeric notation)
     uv run compile_latex.py A.1          # Compiles app01 in backmatter (appendix)
+    uv run compile_latex.py ch01 --force # Recompiles even if up to date
+    uv run compile_latex.py 2.* A.* -j 4 # Compiles all chapters of part 2 and all appendices in parallel
+    uv run compile_latex.py -e latexmk   # Compiles main.tex with latexmk instead of the automatic choice
 """
 
+import argparse
+import contextvars
+import hashlib
+import json
+import os
 import re
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
 
+from build_cache import (
+    bibliography_changes,
+    bibliography_fingerprint,
+    bibliography_state_path,
+    check_manifest,
+    invalidate_manifest,
+    load_bibliography_state,
+    strip_comments,
+    write_bibliography_state,
+    write_manifest,
+)
+from latex_lint import format_issue, lint_files
+from latex_log import (
+    BiberParser,
+    LogParser,
+    biber_requested,
+    compact_report,
+    format_summary,
+    output_stats,
+    parse_log_file,
+    read_log,
+    rerun_reason,
+    summarize,
+)
+from preamble_format import ensure_format, format_env
+from build_history import record_build
+from build_queue import queue_key, run_queued
+from figure_proxy import PREVIEW_DIR, prepare_proxies, proxy_env, proxy_setup
+from project_index import ProjectIndex, get_project_index, key_to_notation
+from search_index import confident_match, search
+
+# Auxiliary files whose changes between passes call for another pass
+AUX_EXTENSIONS = (".aux", ".toc", ".lof", ".lot", ".out", ".bcf", ".idx")
+DEFAULT_MAX_PASSES = 5
+MAX_BIBER_RUNS = 2
+MAX_MAKEINDEX_RUNS = 2
+
+# Engines whose passes are scheduled by run_passes
+LATEX_ENGINES = ("pdflatex", "lualatex", "xelatex")
+ENGINE_NAMES = LATEX_ENGINES + ("latexmk", "tectonic")
+
+# Preamble features that need a particular engine, checked in this order
+ENGINE_REQUIREMENTS = [
+    ("lualatex", re.compile(r"\\directlua|\\usepackage\s*(?:\[[^\]]*\])?\s*\{[^}]*\b(luacode|luatexja|luaotfload|luamplib|lua-ul)\b")),
+    ("xelatex", re.compile(r"\\XeTeX\w*|\\usepackage\s*(?:\[[^\]]*\])?\s*\{[^}]*\b(xeCJK|xunicode|xltxtra)\b")),
+    ("unicode", re.compile(r"\\usepackage\s*(?:\[[^\]]*\])?\s*\{[^}]*\b(fontspec|unicode-math|polyglossia)\b")),
+]
+
+# How compile_with_status came to its result
+COMPILE_STATUSES = ("built", "up to date", "merged", "cancelled", "failed")
+
+# Draft builds go to build/draft/ so final artefacts are left untouched
+DRAFT_DIR = "draft"
+DOCUMENTCLASS_PATTERN = re.compile(r"\\documentclass\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}")
+
+# Processes of the queued build running in this context (see BuildProcesses)
+_build_processes: contextvars.ContextVar["BuildProcesses | None"] = contextvars.ContextVar(
+    "build_processes", default=None
+)
+
 
 class AmbiguousTargetError(Exception):
     """Raised when multiple files match a simple target."""
 
-    def __init__(self, target: str, matches: list[Path], latex_dir: Path):
+    def __init__(self, target: str, matches: list[Path], latex_dir: Path, index: ProjectIndex | None = None):
         self.target = target
         self.matches = matches
         self.latex_dir = latex_dir
@@ -34,7 +108,7 @@ class AmbiguousTargetError(Exception):
         # Generate numeric suggestions from paths
         self.suggestions = []
         for m in matches:
-            suggestion = path_to_numeric_index(m, latex_dir)
+            suggestion = path_to_numeric_index(m, latex_dir, index)
             if suggestion:
                 self.suggestions.append((suggestion, m))
 
@@ -77,104 +151,16 @@ def parse_numeric_target(target: str) -> tuple[str, int, int, int] | None:
     return ("body", parts[0], parts[1], parts[2])  # (area, part, chapter, section)
 
 
-def find_by_numeric_index(latex_dir: Path, area: str, num1: int, num2: int, num3: int) -> Path | None:
-    """Find tex file by numeric indices.
+def path_to_numeric_index(path: Path, latex_dir: Path, index: ProjectIndex | None = None) -> str | None:
+    """Convert a file path to numeric dot notation.
 
-    Args:
-        latex_dir: Path to the latex directory
-        area: "body" for bodymatter, "back" for backmatter/appendix
-        num1: Part number (body) or Appendix number (back). 0 means no part.
-        num2: Chapter number (body) or Section number (back). 0 means target is part/appendix.
-        num3: Section number (body only). 0 means target is chapter.
+    When a project index is given, indexed .tex files are answered from it.
     """
-    if area == "back":
-        return find_appendix_file(latex_dir, num1, num2)
-    else:
-        return find_bodymatter_file(latex_dir, num1, num2, num3)
-
-
-def find_appendix_file(latex_dir: Path, appendix: int, section: int) -> Path | None:
-    """Find appendix or section within appendix."""
-    backmatter = latex_dir / "300-backmatter"
-
-    if not backmatter.exists():
-        return None
-
-    # Find appendix directory
-    app_pattern = f"app{appendix:02d}-*"
-    app_dirs = list(backmatter.glob(app_pattern))
-    if not app_dirs:
-        return None
-    app_dir = app_dirs[0]
-
-    if section == 0:
-        # Target is the appendix itself - find aggregator
-        app_name = app_dir.name
-        app_file = app_dir / f"{app_name}.tex"
-        return app_file if app_file.exists() else None
-
-    # Find section file within appendix
-    sec_pattern = f"sec{section:02d}-*.tex"
-    sec_files = list(app_dir.glob(sec_pattern))
-    if not sec_files:
-        return None
-
-    return sec_files[0]
-
-
-def find_bodymatter_file(latex_dir: Path, part: int, chapter: int, section: int) -> Path | None:
-    """Find tex file in bodymatter by numeric indices."""
-    bodymatter = latex_dir / "200-bodymatter"
-
-    if not bodymatter.exists():
-        return None
-
-    if part == 0:
-        # No part structure - search directly in bodymatter
-        search_base = bodymatter
-    else:
-        # Find part directory
-        part_pattern = f"part{part:02d}-*"
-        part_dirs = list(bodymatter.glob(part_pattern))
-        if not part_dirs:
-            return None
-        search_base = part_dirs[0]
-
-        if chapter == 0:
-            # Target is a part - find part aggregator
-            part_file = search_base / f"part{part:02d}.tex"
-            return part_file if part_file.exists() else None
-
-    # Find chapter directory
-    ch_pattern = f"ch{chapter:02d}-*"
-    ch_dirs = list(search_base.glob(ch_pattern))
-    if not ch_dirs:
-        # Try roman numerals for intro chapters
-        roman_map = {1: 'i', 2: 'ii', 3: 'iii', 4: 'iv', 5: 'v', 6: 'vi', 7: 'vii', 8: 'viii', 9: 'ix', 10: 'x'}
-        if chapter in roman_map:
-            ch_pattern = f"ch{roman_map[chapter]}-*"
-            ch_dirs = list(search_base.glob(ch_pattern))
-    if not ch_dirs:
-        return None
-    ch_dir = ch_dirs[0]
-
-    if section == 0:
-        # Target is a chapter - find chapter aggregator
-        ch_name = ch_dir.name
-        ch_file = ch_dir / f"{ch_name}.tex"
-        return ch_file if ch_file.exists() else None
-
-    # Find section file
-    sec_pattern = f"sec{section:02d}-*.tex"
-    sec_files = list(ch_dir.glob(sec_pattern))
-    if not sec_files:
-        return None
-
-    return sec_files[0]
-
+    if index is not None:
+        notation = index.notation(path)
+        if notation:
+            return notation
 
-def path_to_numeric_index(path: Path, latex_dir: Path) -> str | None:
-    """Convert a file path to numeric dot notation."""
     try:
         rel = path.relative_to(latex_dir)
     except ValueError:
@@ -252,19 +238,18 @@ def find_tex_file(latex_dir: Path, name: str) -> Path | None:
     if name == "localsettings":
         return None
 
+    index = get_project_index(latex_dir, get_build_dir(latex_dir))
+
     # Try numeric notation first
     numeric = parse_numeric_target(name)
     if numeric:
-        area, num1, num2, num3 = numeric
-        result = find_by_numeric_index(latex_dir, area, num1, num2, num3)
+        result = index.find_numeric(numeric)
         if result:
             return result
         # Fall through to slug matching if numeric fails
 
     # Existing logic: exact match, then prefix match
-    matches = list(latex_dir.rglob(f"{name}.tex"))
-    if not matches:
-        matches = list(latex_dir.rglob(f"{name}-*.tex"))
+    matches = index.find_name(name)
 
     if len(matches) == 0:
         return None
@@ -272,20 +257,551 @@ def find_tex_file(latex_dir: Path, name: str) -> Path | None:
         return matches[0]
     else:
         # Multiple matches - raise error with suggestions
-        raise AmbiguousTargetError(name, matches, latex_dir)
+        raise AmbiguousTargetError(name, matches, latex_dir, index)
+
+
+def _timed(run, *args, **kwargs) -> tuple[subprocess.CompletedProcess, float]:
+    """Run a command and measure its wall time."""
+    start = time.perf_counter()
+    result = run(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def snapshot_aux_files(build_dir: Path, stem: str) -> dict[str, str | None]:
+    """Hash the auxiliary files whose changes call for another pass."""
+    hashes = {}
+    for ext in AUX_EXTENSIONS:
+        try:
+            hashes[ext] = hashlib.sha256((build_dir / f"{stem}{ext}").read_bytes()).hexdigest()
+        except OSError:
+            hashes[ext] = None
+    return hashes
+
+
+class BuildProcesses:
+    """The TeX, biber and makeindex processes of one build attempt.
+
+    terminate() is called from another thread (see build_queue) when a newer
+    request for the same target supersedes the build. The cancelled check,
+    the start of a process and its registration happen under one lock, so a
+    process is either stopped by terminate() or never started.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._processes: set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+
+    def start(self, cmd: list[str], **kwargs) -> subprocess.Popen | None:
+        """Start and register a process. Returns None if the build is cancelled."""
+        with self._lock:
+            if self.cancelled:
+                return None
+            process = subprocess.Popen(cmd, **kwargs)
+            self._processes.add(process)
+            return process
+
+    def finished(self, process: subprocess.Popen) -> None:
+        """Unregister a process that has exited."""
+        with self._lock:
+            self._processes.discard(process)
+
+    def terminate(self) -> None:
+        """Cancel the build: terminate its processes and start no new ones."""
+        with self._lock:
+            self.cancelled = True
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                process.terminate()
+            except OSError:
+                pass
+
+
+def run_streamed(cmd: list[str], cwd: Path, stdout=None, env=None, parser=None) -> subprocess.CompletedProcess:
+    """Run a command, feeding its output line by line to a parser.
+
+    The output is still forwarded to stdout (the terminal when None), unless
+    stdout is subprocess.DEVNULL. Within a queued build the process belongs
+    to its BuildProcesses, so a cancelled build stops it (exit code 1 if it
+    never started).
+    """
+    processes = _build_processes.get() or BuildProcesses()
+    if parser is None:
+        process = processes.start(cmd, cwd=cwd, env=env, stdout=stdout, stderr=stdout)
+    else:
+        process = processes.start(
+            cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding="utf-8", errors="replace"
+        )
+    if process is None:
+        return subprocess.CompletedProcess(cmd, 1)
+    try:
+        if parser is not None:
+            for line in process.stdout:
+                parser.feed(line)
+                if stdout is None:
+                    sys.stdout.write(line)
+                elif stdout is not subprocess.DEVNULL:
+                    stdout.write(line)
+        return subprocess.CompletedProcess(cmd, process.wait())
+    finally:
+        processes.finished(process)
+
+
+def run_passes(
+    cmd: list[str],
+    tex_file: Path,
+    build_dir: Path,
+    bib: bool = False,
+    max_passes: int = DEFAULT_MAX_PASSES,
+    echo=print,
+    stdout=None,
+    env=None,
+    biber_parser: BiberParser | None = None,
+    tool: str = "pdflatex",
+    log_parser: LogParser | None = None
+) -> tuple[int, list[tuple[str, str, float]]]:
+    """
+    Run a LaTeX engine (and biber/makeindex) until the output has converged.
+
+    After each LaTeX pass the .log and the auxiliary files are inspected.
+    Biber runs when no .bbl exists yet or when the citation list (.bcf) or
+    one of the .bib files it names changed since the last biber run (see
+    build_cache.bibliography_fingerprint); otherwise the .bbl is reused.
+    Without a record of the last run, biber runs when biblatex asks for it
+    or the .bcf changed during the pass. makeindex runs when the index
+    entries (.idx) changed or no .ind exists yet. Another LaTeX pass runs
+    when the log asks for a rerun or the .aux/.toc/... files changed during
+    the pass.
+
+    Args:
+        cmd: LaTeX engine command line
+        tex_file: Path to the .tex file
+        build_dir: Output directory
+        bib: If True, run biber when the bibliography needs updating
+        max_passes: Maximum number of LaTeX passes
+        echo: Function for normal output
+        stdout: Where to send engine/biber output (None for the terminal)
+        env: Environment for the engine/biber (None to inherit)
+        biber_parser: Parser that receives biber's output line by line
+        tool: Engine name used in messages and steps
+        log_parser: Parser that receives each LaTeX pass's output line by
+            line while it runs; it is reset before every pass, so it ends
+            up with the diagnostics of the last one
+
+    Returns:
+        (return_code, steps) where steps is a list of (tool, reason, seconds) tuples
+    """
+    file_dir = tex_file.parent
+    stem = tex_file.stem
+    log_file = build_dir / f"{stem}.log"
+
+    steps = []
+    latex_passes = 0
+    biber_runs = 0
+    makeindex_runs = 0
+    biber_skipped = False
+    biber_state = bibliography_state_path(build_dir, stem)
+    reason = "initial pass"
+    before = snapshot_aux_files(build_dir, stem)
+
+    while True:
+        if latex_passes:
+            echo("-" * 50)
+            echo(f"Running {tool} (pass {latex_passes + 1}: {reason})...")
+        if log_parser is not None:
+            log_parser.reset()
+        result, seconds = _timed(run_streamed, cmd, file_dir, stdout=stdout, env=env, parser=log_parser)
+        steps.append((tool, reason, seconds))
+        latex_passes += 1
+        if result.returncode != 0:
+            return result.returncode, steps
+
+        after = snapshot_aux_files(build_dir, stem)
+        log_text = read_log(log_file)
+        reason = None
+
+        # Biber needs a .bcf, which is only written when biblatex is loaded
+        if bib and after[".bcf"] is not None and biber_runs < MAX_BIBER_RUNS:
+            bib_dirs = [file_dir] + [Path(p) for p in (env or os.environ).get("BIBINPUTS", "").split(os.pathsep) if p]
+            previous = load_bibliography_state(biber_state)
+            current = bibliography_fingerprint(build_dir / f"{stem}.bcf", bib_dirs, previous)
+            if not (build_dir / f"{stem}.bbl").exists():
+                biber_reason = "no bibliography yet"
+            elif previous is not None and current is not None:
+                # Same citations and .bib files give the same .bbl
+                biber_reason = bibliography_changes(previous, current)
+            elif biber_requested(log_text):
+                biber_reason = "biblatex requested biber"
+            elif before[".bcf"] != after[".bcf"]:
+                biber_reason = "citation list changed"
+            else:
+                biber_reason = None
+
+            if biber_reason:
+                echo("-" * 50)
+                echo(f"Running biber ({biber_reason})...")
+                biber_cmd = ["biber", f"--output-directory={build_dir}", stem]
+                biber_result, seconds = _timed(run_streamed, biber_cmd, file_dir, stdout=stdout, env=env, parser=biber_parser)
+                steps.append(("biber", biber_reason, seconds))
+                biber_runs += 1
+                if biber_result.returncode != 0:
+                    biber_state.unlink(missing_ok=True)
+                    return biber_result.returncode, steps
+                if current is not None:
+                    write_bibliography_state(biber_state, current)
+                reason = "bibliography updated"
+            elif previous is not None and biber_runs == 0 and not biber_skipped:
+                echo("Skipping biber: citations and .bib files unchanged, reusing the .bbl")
+                biber_skipped = True
+
+        # makeindex needs a .idx, which is only written when \makeindex is used
+        if after[".idx"] is not None and makeindex_runs < MAX_MAKEINDEX_RUNS:
+            if before[".idx"] != after[".idx"]:
+                index_reason = "index entries changed"
+            elif not (build_dir / f"{stem}.ind").exists():
+                index_reason = "no index yet"
+            else:
+                index_reason = None
+
+            if index_reason:
+                echo("-" * 50)
+                echo(f"Running makeindex ({index_reason})...")
+                makeindex_cmd = ["makeindex", f"{stem}.idx"]
+                index_result, seconds = _timed(run_streamed, makeindex_cmd, build_dir, stdout=stdout, env=env)
+                steps.append(("makeindex", index_reason, seconds))
+                makeindex_runs += 1
+                if index_result.returncode != 0:
+                    return index_result.returncode, steps
+                reason = reason or "index updated"
+
+        if reason is None:
+            reason = rerun_reason(log_text)
+        if reason is None:
+            changed = [ext for ext in AUX_EXTENSIONS if ext not in (".bcf", ".idx") and before[ext] != after[ext]]
+            if changed:
+                reason = f"{', '.join(changed)} changed"
+
+        if reason is None:
+            return 0, steps
+
+        if latex_passes >= max_passes:
+            echo("-" * 50)
+            echo(f"Warning: stopped after {max_passes} passes ({reason}); output may not have converged")
+            return 0, steps
+
+        before = after
+
+
+def format_pass_report(steps: list[tuple[str, str, float]]) -> str:
+    """Summarise the passes run by an engine."""
+    runs: dict[str, int] = {}
+    for tool, _, _ in steps:
+        runs[tool] = runs.get(tool, 0) + 1
+    counts = [f"{count} {tool} {'pass(es)' if tool in LATEX_ENGINES else 'run(s)'}" for tool, count in runs.items()]
+    header = "Ran " + (" and ".join(counts) if counts else "nothing")
+    lines = [header + f" in {sum(seconds for _, _, seconds in steps):.1f}s:"]
+    for i, (tool, reason, seconds) in enumerate(steps, 1):
+        lines.append(f"  {i}. {tool}: {reason} ({seconds:.1f}s)")
+    return "\n".join(lines)
+
+
+def get_build_dir(latex_dir: Path) -> Path:
+    """Return the default build directory for a project."""
+    return latex_dir.parent / "build"
+
+
+def draft_setup(latex_dir: Path) -> str:
+    """TeX code that turns a build into a draft.
+
+    The draft option is passed to the book's class (from main.tex), so it
+    reaches every package as a global option: graphicx draws boxes instead
+    of \\includegraphics and hyperref skips links and bookmarks. It is
+    also passed to graphicx directly in case the class ignores it.
+    """
+    setup = r"\PassOptionsToPackage{draft}{graphicx}"
+    try:
+        main_text = strip_comments((latex_dir / "main.tex").read_text(encoding="utf-8", errors="replace"))
+    except OSError:
+        main_text = ""
+    match = DOCUMENTCLASS_PATTERN.search(main_text)
+    if match:
+        setup += rf"\PassOptionsToClass{{draft}}{{{match.group(1).strip()}}}"
+    return setup
+
+
+class Engine(ABC):
+    """A TeX engine backend.
+
+    All backends share one interface: run() compiles a target from its own
+    folder into build_dir and returns (return_code, steps) like run_passes,
+    leaving <name>.log and <name>.pdf in build_dir for the diagnostics.
+    """
 
+    name = ""
+    executable = ""
+    supports_fmt = False
+    supports_pretex = True
+
+    def available(self) -> bool:
+        """Return True if the engine is installed."""
+        return shutil.which(self.executable) is not None
+
+    @abstractmethod
+    def run(
+        self,
+        tex_file: Path,
+        build_dir: Path,
+        bib: bool = False,
+        max_passes: int = DEFAULT_MAX_PASSES,
+        echo=print,
+        stdout=None,
+        env=None,
+        biber_parser: BiberParser | None = None,
+        fmt_name: str | None = None,
+        pretex: str | None = None,
+        log_parser: LogParser | None = None
+    ) -> tuple[int, list[tuple[str, str, float]]]:
+        """Compile tex_file; pretex is TeX code to run before the file.
+
+        Backends that run the TeX passes themselves feed each pass's
+        output to log_parser; the others leave it empty and the .log is
+        parsed afterwards.
+        """
+
+
+class LatexEngine(Engine):
+    """pdflatex, lualatex or xelatex, with passes scheduled by run_passes."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.executable = name
+        # mylatexformat dumps are only reliable with pdflatex
+        self.supports_fmt = name == "pdflatex"
+
+    def run(self, tex_file, build_dir, bib=False, max_passes=DEFAULT_MAX_PASSES, echo=print,
+            stdout=None, env=None, biber_parser=None, fmt_name=None, pretex=None, log_parser=None):
+        cmd = [self.executable, "-interaction=nonstopmode", f"-output-directory={build_dir}"]
+        if fmt_name:
+            cmd.append(f"-fmt={fmt_name}")
+        if pretex:
+            cmd += [f"-jobname={tex_file.stem}", pretex + rf"\input{{{tex_file.name}}}"]
+        else:
+            cmd.append(tex_file.name)
+        return run_passes(
+            cmd, tex_file, build_dir, bib=bib, max_passes=max_passes, echo=echo,
+            stdout=stdout, env=env, biber_parser=biber_parser, tool=self.name, log_parser=log_parser
+        )
+
+
+class LatexmkEngine(Engine):
+    """latexmk, which schedules the passes (and biber/makeindex) itself."""
+
+    name = "latexmk"
+    executable = "latexmk"
+    MODES = {"pdflatex": "-pdf", "lualatex": "-lualatex", "xelatex": "-xelatex"}
+
+    def __init__(self, mode: str = "pdflatex"):
+        self.mode = mode
+
+    def run(self, tex_file, build_dir, bib=False, max_passes=DEFAULT_MAX_PASSES, echo=print,
+            stdout=None, env=None, biber_parser=None, fmt_name=None, pretex=None, log_parser=None):
+        cmd = [
+            self.executable,
+            self.MODES[self.mode],
+            "-interaction=nonstopmode",
+            f"-outdir={build_dir}",
+            "-e", f"$max_repeat={max_passes}",
+        ]
+        if not bib:
+            cmd.append("-bibtex-")
+        if pretex:
+            cmd.append(f"-usepretex={pretex}")
+        cmd.append(tex_file.name)
+        result, seconds = _timed(run_streamed, cmd, tex_file.parent, stdout=stdout, env=env, parser=biber_parser)
+        return result.returncode, [(self.name, f"{self.mode} with its own pass scheduling", seconds)]
+
+
+class TectonicEngine(Engine):
+    """Tectonic, a self-contained XeTeX-based engine that reruns as needed."""
+
+    name = "tectonic"
+    executable = "tectonic"
+    # Tectonic compiles a file, so no TeX code can be run before it
+    supports_pretex = False
+
+    def run(self, tex_file, build_dir, bib=False, max_passes=DEFAULT_MAX_PASSES, echo=print,
+            stdout=None, env=None, biber_parser=None, fmt_name=None, pretex=None, log_parser=None):
+        cmd = [
+            self.executable,
+            f"--outdir={build_dir}",
+            "--keep-logs",
+            "--keep-intermediates",
+            f"--reruns={max_passes}",
+            tex_file.name,
+        ]
+        result, seconds = _timed(run_streamed, cmd, tex_file.parent, stdout=stdout, env=env, parser=biber_parser)
+        return result.returncode, [(self.name, "runs passes itself", seconds)]
+
+
+def preamble_requirement(latex_dir: Path) -> tuple[str, str | None]:
+    """Return the engine family the preamble needs and the matching feature.
+
+    The family is "lualatex" or "xelatex" for engine-specific code,
+    "unicode" for fontspec and friends (either of them works) and
+    "pdflatex" otherwise.
+    """
+    preamble = ""
+    for name in ("main.tex", "localsettings.tex"):
+        try:
+            text = strip_comments((latex_dir / name).read_text(encoding="utf-8", errors="replace"))
+        except OSError:
+            continue
+        preamble += text.split(r"\begin{document}", 1)[0]
+    for family, pattern in ENGINE_REQUIREMENTS:
+        match = pattern.search(preamble)
+        if match:
+            # The package name where a package matched, else the command
+            return family, match.group(match.lastindex) if match.lastindex else match.group(0)
+    return "pdflatex", None
+
+
+def get_engine(name: str, latex_dir: Path) -> Engine:
+    """Return the backend for an engine name."""
+    if name in LATEX_ENGINES:
+        return LatexEngine(name)
+    if name == "latexmk":
+        family, _ = preamble_requirement(latex_dir)
+        return LatexmkEngine("lualatex" if family == "unicode" else family)
+    if name == "tectonic":
+        return TectonicEngine()
+    raise ValueError(f"Unknown engine '{name}' (choose from {', '.join(ENGINE_NAMES)})")
+
+
+def select_engine(latex_dir: Path, name: str = "auto", draft: bool = False) -> tuple[Engine, str]:
+    """
+    Choose the engine for a project.
 
-def run_compile(tex_file: Path, latex_dir: Path, bib: bool = False, echo=print, success_style=None, error_style=None) -> int:
+    An explicit name is used as is. Otherwise the preamble decides the
+    candidates (pdflatex for plain documents, lualatex/xelatex for
+    fontspec or engine-specific code) and the first installed one wins.
+    Tectonic is the last resort where it can handle the preamble.
+
+    Returns:
+        (engine, reason) where reason explains the choice
+    """
+    if name != "auto":
+        return get_engine(name, latex_dir), "selected with --engine"
+
+    family, feature = preamble_requirement(latex_dir)
+    candidates = {
+        "pdflatex": ["pdflatex", "lualatex", "tectonic"],
+        "unicode": ["lualatex", "xelatex", "tectonic"],
+        "lualatex": ["lualatex"],
+        "xelatex": ["xelatex", "tectonic"],
+    }[family]
+    if draft:
+        candidates = [c for c in candidates if get_engine(c, latex_dir).supports_pretex]
+
+    needs = f"preamble uses {feature}" if feature else "plain preamble"
+    for candidate in candidates:
+        engine = get_engine(candidate, latex_dir)
+        if engine.available():
+            return engine, needs if candidate == candidates[0] else f"{needs}; {candidates[0]} not installed"
+    return get_engine(candidates[0], latex_dir), f"{needs}; no suitable engine found"
+
+
+def compile_with_status(
+    tex_file: Path,
+    latex_dir: Path,
+    bib: bool = False,
+    force: bool = False,
+    max_passes: int = DEFAULT_MAX_PASSES,
+    use_fmt: bool = True,
+    quiet: bool = False,
+    draft: bool = False,
+    preview: bool = False,
+    engine: str = "auto",
+    setup: str | None = None,
+    build_dir: Path | None = None,
+    stdout=None,
+    queue: str | None = "cancel",
+    lint: bool = True,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> tuple[int, str]:
     """
-    Compile a LaTeX file using pdflatex.
+    Compile a LaTeX file and report how the result came about.
+
+    The engine (pdflatex, lualatex, xelatex, latexmk or tectonic) is chosen
+    by select_engine from the preamble and what is installed, unless one
+    is named. Every engine leaves the same .log/.pdf in the build directory.
+
+    The output of each TeX pass and of biber is parsed line by line as it
+    streams (for latexmk and tectonic, the final .log is parsed instead)
+    into a JSON diagnostics report (build/<name>.diagnostics.json) with
+    errors, undefined references/citations and bad boxes mapped to source
+    files; the last pass's diagnostics are kept.
+    In quiet mode, TeX output is suppressed and only that report is printed.
+
+    For pdflatex, lualatex and xelatex, passes are scheduled by run_passes:
+    biber and extra passes only run when the logs and auxiliary files show
+    they are needed. latexmk and tectonic schedule their own passes.
+
+    With pdflatex and unless use_fmt is False, the preamble is loaded from a
+    precompiled format (see preamble_format) that is rebuilt when the
+    preamble changes.
+
+    A draft build passes the draft option to the class (figures become
+    boxes, hyperref is skipped), never runs biber and writes to
+    build/draft/. It loads the preamble normally, since the options must be
+    set before the packages are loaded; the .bbl of the last full build is
+    reused so citations still resolve.
+
+    A preview build looks like the final book but embeds downscaled proxies
+    of the PNG/JPEG figures (see figure_proxy) and writes to build/preview/.
+
+    The compile is skipped when the build cache shows that neither the
+    target nor any file it pulls in has changed since the last successful
+    compile. Otherwise the target and the files it includes are linted first
+    (see latex_lint), and unbalanced braces or environments and broken
+    \\subfile links fail the build before TeX runs.
+
+    Builds of the same outputs are serialised by the project's build queue
+    (see build_queue): a request for a target that is already building
+    cancels that build (or waits for it with queue="wait"), queued
+    duplicates are merged into one build, and every caller gets the result
+    of the latest build.
 
     Args:
         tex_file: Path to the .tex file
         latex_dir: Path to the latex directory
         bib: If True, run biber for bibliography processing
+        force: If True, compile even when the build cache is up to date
+        max_passes: Maximum number of LaTeX passes
+        use_fmt: If True, load the preamble from a precompiled format
+        quiet: If True, print only the JSON diagnostics summary
+        draft: If True, make a fast draft build into build/draft/
+        preview: If True, build into build/preview/ with figure proxies
+        engine: Engine name, or "auto" to choose one (see select_engine)
+        setup: TeX code to run before the document (e.g. counters and labels
+            of a split build); like draft, it disables the preamble format
+        build_dir: Output directory (default: build/ next to latex_dir,
+            build/draft/ for drafts, build/preview/ for previews)
+        stdout: Where to send engine/biber output (None for the terminal)
+        queue: What to do about a running build of the same target:
+            "cancel" it or "wait" for it; None bypasses the queue
+        lint: If False, do not lint the sources before compiling
         echo: Function for normal output (print or click.echo)
         success_style: Function for success messages (optional, e.g., click.secho with fg="green")
         error_style: Function for error messages (optional, e.g., click.secho with fg="red")
+
+    Returns:
+        (return_code, status) where status is one of COMPILE_STATUSES:
+        "built", "up to date" (skipped by the build cache), "merged" (the
+        result of a build made for another request), "cancelled" or "failed"
     """
     # Default styled output to regular echo if not provided
     if success_style is None:
@@ -293,85 +809,490 @@ def run_compile(tex_file: Path, latex_dir: Path, bib: bool = False, echo=print,
     if error_style is None:
         error_style = echo
 
-    build_dir = latex_dir.parent / "build"
-    build_dir.mkdir(exist_ok=True)
+    if draft:
+        preview = False
+    if build_dir is None:
+        build_dir = default_build_dir(latex_dir, draft, preview)
+
+    if queue:
+        compile_attempt = partial(
+            compile_with_status, tex_file, latex_dir, bib=bib, force=force, max_passes=max_passes, use_fmt=use_fmt,
+            quiet=quiet, draft=draft, preview=preview, engine=engine, setup=setup, build_dir=build_dir, stdout=stdout,
+            queue=None, lint=lint, echo=echo, success_style=success_style, error_style=error_style
+        )
+        # Each build attempt has its own processes and cancelled flag, so a
+        # cancel of a superseded attempt cannot leak into the next one
+        attempt: list[BuildProcesses] = []
+        statuses: list[str] = []
+
+        def build():
+            processes = BuildProcesses()
+            attempt[:] = [processes]
+            token = _build_processes.set(processes)
+            try:
+                return_code, status = compile_attempt()
+            finally:
+                _build_processes.reset(token)
+            statuses[:] = [status]
+            return return_code
+
+        def cancel():
+            if attempt:
+                attempt[0].terminate()
+
+        return_code, built = run_queued(
+            get_build_dir(latex_dir), queue_key(build_dir, tex_file), build,
+            cancel=cancel, supersede=queue, label=tex_file.relative_to(latex_dir).as_posix(),
+            echo=(lambda *args, **kwargs: None) if quiet else echo
+        )
+        if not built:
+            report_latest_build(tex_file, latex_dir, build_dir, return_code, quiet, echo, success_style, error_style)
+            return return_code, "merged"
+        return return_code, statuses[0]
+
+    # In quiet mode only the final JSON summary is printed
+    summary_echo = echo
+    if quiet:
+        echo = success_style = error_style = lambda *args, **kwargs: None
+        if stdout is None:
+            stdout = subprocess.DEVNULL
+
+    if draft:
+        bib = False
+        use_fmt = False
+    if setup:
+        use_fmt = False
+    build_dir.mkdir(parents=True, exist_ok=True)
 
     # Calculate relative path from latex_dir to tex_file (for display)
     rel_path = tex_file.relative_to(latex_dir)
+    pdf_path = build_dir / (tex_file.stem + ".pdf")
+    diagnostics_path = build_dir / (tex_file.stem + ".diagnostics.json")
+
+    engine, engine_reason = select_engine(latex_dir, engine, draft)
+
+    # Skip the compile if nothing the target depends on has changed
+    cache_options = {"bib": bib, "engine": engine.name}
+    if draft:
+        cache_options["draft"] = True
+    if preview:
+        cache_options["preview"] = True
+    if setup:
+        cache_options["setup"] = hashlib.sha256(setup.encode("utf-8")).hexdigest()
+    up_to_date, fingerprint = check_manifest(build_dir, tex_file, latex_dir, cache_options)
+    if up_to_date and not force:
+        success_style(f"Up to date: {pdf_path} (use --force to rebuild)")
+        if quiet:
+            summary_echo(json.dumps({"target": rel_path.as_posix(), "status": "up to date", "output": str(pdf_path)}))
+        return 0, "up to date"
+
+    # Structural errors fail here instead of after a TeX run
+    if lint:
+        issues = lint_files(latex_dir, [latex_dir / key for key in fingerprint if key.endswith(".tex")])
+        if issues:
+            for issue in issues:
+                error_style(format_issue(issue))
+            error_style(f"Lint found {len(issues)} problem(s) in {rel_path}; fix them or compile with --no-lint")
+            if quiet:
+                summary_echo(json.dumps({"target": rel_path.as_posix(), "status": "lint failed", "lint": issues}))
+            return 1, "failed"
+    invalidate_manifest(build_dir, tex_file)
 
     # For subfiles to work, we must compile from the file's directory
     # so that relative paths like ../../../main.tex resolve correctly
     file_dir = tex_file.parent
-    file_name = tex_file.name
 
     echo(f"Compiling: {rel_path}")
     echo(f"Working directory: {file_dir.relative_to(latex_dir) if file_dir != latex_dir else '.'}")
     echo(f"Output directory: {build_dir}")
+    echo(f"Engine: {engine.name} ({engine_reason})")
     echo("-" * 50)
 
-    # Run pdflatex from the file's directory with absolute output path
-    cmd = [
-        "pdflatex",
-        "-interaction=nonstopmode",
-        f"-output-directory={build_dir}",
-        file_name
-    ]
-
-    result = subprocess.run(
-        cmd,
-        cwd=file_dir,
-        capture_output=False
+    if not engine.available():
+        error_style(f"Error: {engine.executable} not found. Install it or choose another --engine.")
+        return 1, "failed"
+
+    # Formats are shared by all targets, so they live in the main build dir
+    env = None
+    fmt_name = None
+    if use_fmt and engine.supports_fmt:
+        fmt_name = ensure_format(latex_dir, get_build_dir(latex_dir), echo=echo, stdout=stdout)
+    if fmt_name:
+        env = format_env(get_build_dir(latex_dir), latex_dir)
+
+    pretex = None
+    if preview:
+        # \includegraphics tries the proxy mirror first (see proxy_setup);
+        # the mirror also comes first in TEXINPUTS
+        mirror = prepare_proxies(tex_file, latex_dir, get_build_dir(latex_dir), fingerprint=fingerprint, echo=echo)
+        if mirror is not None:
+            env = proxy_env(env, mirror, file_dir, latex_dir)
+            if engine.supports_pretex:
+                proxy_file = build_dir / (tex_file.stem + "-proxies.tex")
+                proxy_file.write_text(proxy_setup(mirror, file_dir, latex_dir), encoding="utf-8")
+                pretex = rf"\input{{{proxy_file.name}}}"
+            else:
+                echo(f"Warning: {engine.name} cannot run setup code before the document; "
+                     "only figures found through TEXINPUTS use their proxies")
+    if draft:
+        # Citations come from the last full build instead of running biber
+        final_bbl = get_build_dir(latex_dir) / (tex_file.stem + ".bbl")
+        draft_bbl = build_dir / final_bbl.name
+        if final_bbl.exists() and (not draft_bbl.exists() or draft_bbl.stat().st_mtime < final_bbl.stat().st_mtime):
+            shutil.copy2(final_bbl, draft_bbl)
+        if engine.supports_pretex:
+            pretex = draft_setup(latex_dir)
+        else:
+            echo(f"Warning: {engine.name} cannot inject the draft option; making a normal build into {build_dir}")
+
+    if setup:
+        # Read from the output directory, which TeX searches for input files
+        setup_file = build_dir / (tex_file.stem + "-setup.tex")
+        setup_file.write_text(setup, encoding="utf-8")
+        if engine.supports_pretex:
+            pretex = (pretex or "") + rf"\input{{{setup_file.name}}}"
+        else:
+            echo(f"Warning: {engine.name} cannot run setup code before the document; ignoring it")
+
+    # Run the engine from the file's directory with absolute output path;
+    # the output of each pass is parsed as it streams
+    biber_parser = BiberParser(latex_dir)
+    log_parser = LogParser(file_dir, latex_dir)
+    return_code, steps = engine.run(
+        tex_file, build_dir, bib=bib, max_passes=max_passes, echo=echo, stdout=stdout,
+        env=env, biber_parser=biber_parser, fmt_name=fmt_name, pretex=pretex, log_parser=log_parser
     )
 
-    # Run biber for bibliography if requested
-    if bib and result.returncode == 0:
-        aux_name = tex_file.stem
-        biber_cmd = ["biber", f"--output-directory={build_dir}", aux_name]
+    processes = _build_processes.get()
+    if processes is not None and processes.cancelled:
+        # The outputs are half-written; the next build starts from scratch
+        (build_dir / (tex_file.stem + ".aux")).unlink(missing_ok=True)
         echo("-" * 50)
-        echo("Running biber for bibliography...")
-        biber_result = subprocess.run(biber_cmd, cwd=file_dir, capture_output=False)
+        error_style("Cancelled: a newer request for this target superseded the build")
+        return 1, "cancelled"
 
-        if biber_result.returncode == 0:
-            # Run pdflatex two more times to resolve references
-            for i in range(2):
-                echo("-" * 50)
-                echo(f"Running pdflatex (pass {i + 2})...")
-                result = subprocess.run(cmd, cwd=file_dir, capture_output=False)
-                if result.returncode != 0:
-                    break
-        else:
-            result = biber_result
+    echo("-" * 50)
+    echo(format_pass_report(steps))
+
+    # Diagnostics of the last pass, mapped back to the source files
+    report = {
+        "target": rel_path.as_posix(),
+        "status": "ok" if return_code == 0 else "failed",
+        "return_code": return_code,
+        "engine": engine.name,
+        "output": str(pdf_path),
+        "passes": [{"tool": tool, "reason": reason, "seconds": round(seconds, 3)} for tool, reason, seconds in steps],
+    }
+    if log_parser.lines:
+        report.update(log_parser.report())
+    else:
+        # latexmk and tectonic interleave several tools; their .log is clean
+        report.update(parse_log_file(build_dir / (tex_file.stem + ".log"), file_dir, latex_dir))
+    report["biber"] = biber_parser.messages
+    report["counts"] = summarize(report)
+    diagnostics_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    echo(f"Diagnostics: {format_summary(report)} ({diagnostics_path})")
+    if quiet:
+        summary_echo(json.dumps(compact_report(report)))
+
+    # Pass timings and output size for book stats
+    pages, _ = output_stats(read_log(build_dir / (tex_file.stem + ".log")))
+    record_build(get_build_dir(latex_dir), {
+        "target": rel_path.as_posix(),
+        "status": report["status"],
+        "seconds": round(sum(step["seconds"] for step in report["passes"]), 3),
+        "passes": report["passes"],
+        "pages": pages if return_code == 0 else None,
+        "pdf_size": pdf_path.stat().st_size if return_code == 0 and pdf_path.exists() else None,
+        "engine": engine.name,
+        "options": {"bib": bib, "fmt": fmt_name is not None, "draft": draft, "preview": preview},
+    })
+
+    if return_code == 0:
+        write_manifest(build_dir, tex_file, latex_dir, cache_options, fingerprint)
+        success_style(f"Success! Output: {pdf_path}")
+    else:
+        error_style(f"Compilation failed with return code {return_code}")
 
-    if result.returncode == 0:
-        pdf_name = tex_file.stem + ".pdf"
-        echo("-" * 50)
-        success_style(f"Success! Output: {build_dir / pdf_name}")
+    return return_code, "built" if return_code == 0 else "failed"
+
+
+def run_compile(tex_file: Path, latex_dir: Path, **options) -> int:
+    """Compile a LaTeX file (see compile_with_status for the options); returns the exit code."""
+    return compile_with_status(tex_file, latex_dir, **options)[0]
+
+
+def report_latest_build(
+    tex_file: Path,
+    latex_dir: Path,
+    build_dir: Path,
+    return_code: int,
+    quiet: bool = False,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> None:
+    """Report a build that another request made for this one (see run_queued)."""
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    pdf_path = build_dir / (tex_file.stem + ".pdf")
+    try:
+        report = json.loads((build_dir / (tex_file.stem + ".diagnostics.json")).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        report = None
+
+    if quiet:
+        status = "ok" if return_code == 0 else "failed"
+        echo(json.dumps(compact_report(report) if report else {"target": tex_file.relative_to(latex_dir).as_posix(), "status": status, "output": str(pdf_path)}))
+        return
+    if report:
+        echo(f"Diagnostics: {format_summary(report)}")
+    if return_code == 0:
+        success_style(f"Built by another request for the same target. Output: {pdf_path}")
     else:
-        echo("-" * 50)
-        error_style(f"Compilation failed with return code {result.returncode}")
+        error_style(f"The latest build of this target failed with return code {return_code}")
 
-    return result.returncode
 
+def is_target_pattern(name: str) -> bool:
+    """Return True if a target uses wildcard notation such as '2.*' or 'A.*'."""
+    return name == "*" or name.endswith(".*")
 
-def main():
-    """Standalone entry point."""
-    cwd = Path.cwd()
-    latex_dir = cwd / "latex"
 
-    if not latex_dir.exists():
-        print(f"Error: latex directory not found at {latex_dir}")
-        print("Make sure you run this command from the project root.")
-        sys.exit(1)
+def expand_target_pattern(latex_dir: Path, pattern: str) -> list[str]:
+    """Expand a wildcard target into numeric targets.
+
+    Supports:
+    - "*": all parts
+    - "3.*": all chapters in part 3 ("0.*" for chapters without a part)
+    - "3.5.*": all sections in part 3, chapter 5
+    - "A.*": all appendices
+    - "A.2.*": all sections in appendix 2
+    """
+    index = get_project_index(latex_dir, get_build_dir(latex_dir))
+    keys = index.keys()
 
-    # Get filename from arguments (default: main)
-    name = sys.argv[1] if len(sys.argv) > 1 else "main"
+    if pattern == "*":
+        matches = [k for k in keys if k[0] == "body" and k[1] and not k[2]]
+    elif pattern[:-2].upper() == "A":
+        matches = [k for k in keys if k[0] == "back" and not k[2]]
+    else:
+        parent = parse_numeric_target(pattern[:-2])
+        if parent is None:
+            return []
+        area, num1, num2, num3 = parent
+        if area == "back":
+            # A.2.* - sections of appendix 2
+            matches = [k for k in keys if k[0] == "back" and k[1] == num1 and k[2]]
+        elif "." in pattern[:-2]:
+            # 3.5.* - sections of part 3, chapter 5
+            matches = [k for k in keys if k[:3] == ("body", num1, num2) and k[3]]
+        else:
+            # 3.* - chapters of part 3
+            matches = [k for k in keys if k[:2] == ("body", num1) and k[2] and not k[3]]
+
+    return [key_to_notation(k) for k in sorted(matches)]
+
+
+def default_build_dir(latex_dir: Path, draft: bool = False, preview: bool = False) -> Path:
+    """Return the output directory of a build mode: build/, build/draft/ or build/preview/."""
+    build_root = get_build_dir(latex_dir)
+    if draft:
+        return build_root / DRAFT_DIR
+    if preview:
+        return build_root / PREVIEW_DIR
+    return build_root
+
+
+def target_build_dir(tex_file: Path, latex_dir: Path, draft: bool = False, preview: bool = False) -> Path:
+    """Return the isolated build directory for a target: build/[draft/|preview/]<notation or name>/."""
+    name = path_to_numeric_index(tex_file, latex_dir) or tex_file.stem
+    return default_build_dir(latex_dir, draft, preview) / name
+
+
+def compile_worker(tex_file: Path, latex_dir: Path, build_dir: Path, bib: bool, force: bool, max_passes: int, use_fmt: bool, draft: bool, engine: str, setup: str | None = None, queue: str | None = "cancel", preview: bool = False, lint: bool = True) -> dict:
+    """Compile one target in a worker process and summarise the result."""
+    messages = []
+    start = time.perf_counter()
+    return_code, status = compile_with_status(
+        tex_file,
+        latex_dir,
+        bib=bib,
+        force=force,
+        max_passes=max_passes,
+        use_fmt=use_fmt,
+        draft=draft,
+        preview=preview,
+        engine=engine,
+        setup=setup,
+        build_dir=build_dir,
+        stdout=subprocess.DEVNULL,
+        queue=queue,
+        lint=lint,
+        echo=messages.append
+    )
+    elapsed = time.perf_counter() - start
 
-    # Check for excluded file
-    if name == "localsettings":
-        print("Error: localsettings.tex is not a standalone file and cannot be compiled.")
-        sys.exit(1)
+    # An up-to-date target keeps the diagnostics of its last build
+    try:
+        diagnostics = json.loads((build_dir / (tex_file.stem + ".diagnostics.json")).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        diagnostics = {}
+
+    return {
+        "tex_file": tex_file,
+        "build_dir": build_dir,
+        "return_code": return_code,
+        "status": status,
+        "elapsed": elapsed,
+        "counts": summarize(diagnostics),
+    }
+
+
+def compile_targets(
+    tex_files: list[Path],
+    latex_dir: Path,
+    jobs: int | None = None,
+    bib: bool = False,
+    force: bool = False,
+    max_passes: int = DEFAULT_MAX_PASSES,
+    use_fmt: bool = True,
+    quiet: bool = False,
+    draft: bool = False,
+    preview: bool = False,
+    engine: str = "auto",
+    queue: str | None = "cancel",
+    lint: bool = True,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Compile several targets in parallel.
+
+    Each target gets its own build/<target>/ directory so concurrent passes
+    cannot overwrite each other's .aux and .log files. TeX output goes to
+    each target's .log; a summary table is printed when all are done.
+
+    Args:
+        tex_files: Paths to the .tex files
+        latex_dir: Path to the latex directory
+        jobs: Number of worker processes (default: CPU count)
+        bib: If True, run biber for bibliography processing
+        force: If True, compile even when the build cache is up to date
+        max_passes: Maximum number of pdflatex passes
+        use_fmt: If True, load the preamble from a precompiled format
+        quiet: If True, print only a JSON summary of all targets
+        draft: If True, make draft builds into build/draft/<target>/
+        preview: If True, build into build/preview/<target>/ with figure proxies
+        engine: Engine name, or "auto" to choose one (see select_engine)
+        queue: "cancel" or "wait" for running builds of the same target
+            (see run_compile)
+        lint: If False, do not lint the sources before compiling
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 if every target compiled, otherwise the first non-zero return code
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    summary_echo = echo
+    if quiet:
+        echo = success_style = error_style = lambda *args, **kwargs: None
+
+    build_root = get_build_dir(latex_dir)
+    # Choose the engine once so every target is built the same way
+    selected, engine_reason = select_engine(latex_dir, engine, draft)
+    echo(f"Compiling {len(tex_files)} target(s) with {jobs or os.cpu_count()} job(s)")
+    echo(f"Engine: {selected.name} ({engine_reason})")
+    echo("-" * 50)
+
+    # Dump the preamble format once instead of in every worker
+    if use_fmt and not draft and selected.supports_fmt and selected.available():
+        ensure_format(latex_dir, build_root, echo=echo, stdout=subprocess.DEVNULL)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                compile_worker, tex_file, latex_dir, target_build_dir(tex_file, latex_dir, draft, preview), bib, force, max_passes, use_fmt, draft, selected.name, None, queue, preview, lint
+            ): tex_file
+            for tex_file in tex_files
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            style = error_style if result["return_code"] else echo
+            style(f"  {result['status']:<10} {result['tex_file'].relative_to(latex_dir)}")
+
+    # Report in the order the targets were given
+    order = {tex_file: i for i, tex_file in enumerate(tex_files)}
+    results.sort(key=lambda r: order[r["tex_file"]])
+
+    rows = [("Target", "Status", "Time", "Errors", "Undefined", "Boxes", "Output")]
+    summary = []
+    for r in results:
+        pdf = r["build_dir"] / (r["tex_file"].stem + ".pdf")
+        target = path_to_numeric_index(r["tex_file"], latex_dir) or r["tex_file"].stem
+        output = pdf.relative_to(build_root.parent) if r["return_code"] == 0 else r["build_dir"].relative_to(build_root.parent) / (r["tex_file"].stem + ".log")
+        counts = r["counts"]
+        undefined = counts["undefined_references"] + counts["undefined_citations"]
+        rows.append((
+            target, r["status"], f"{r['elapsed']:.1f}s",
+            str(counts["errors"]), str(undefined), str(counts["boxes"]), str(output)
+        ))
+        summary.append({
+            "target": target,
+            "file": r["tex_file"].relative_to(latex_dir).as_posix(),
+            "status": r["status"],
+            "seconds": round(r["elapsed"], 2),
+            "output": str(output),
+            "diagnostics": str((r["build_dir"] / (r["tex_file"].stem + ".diagnostics.json")).relative_to(build_root.parent)),
+            "counts": counts,
+        })
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    echo("-" * 50)
+    for i, row in enumerate(rows):
+        echo("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+        if i == 0:
+            echo("  ".join("-" * width for width in widths))
+
+    if quiet:
+        summary_echo(json.dumps(summary))
+
+    failed = [r for r in results if r["return_code"] != 0]
+    echo("-" * 50)
+    if failed:
+        error_style(f"{len(failed)} of {len(results)} target(s) failed")
+        return failed[0]["return_code"]
+    success_style(f"All {len(results)} target(s) compiled")
+    return 0
+
+
+def suggest_targets(latex_dir: Path, name: str, limit: int = 5) -> tuple[Path | None, list[dict]]:
+    """Look up a target that was not found in the search index.
+
+    Returns (file, results): the file if one result is clearly the one
+    meant (a typo), and the ranked results to offer otherwise.
+    """
+    if parse_numeric_target(name):
+        return None, []
+    results = [r for r in search(latex_dir, name, limit=limit) if r["file"] != "localsettings.tex"]
+    match = confident_match(results)
+    return (latex_dir / match["file"] if match else None), results
 
-    # Find the tex file
+
+def resolve_target(latex_dir: Path, name: str) -> Path | None:
+    """Resolve a target for the standalone entry point, printing errors."""
     try:
         tex_file = find_tex_file(latex_dir, name)
     except AmbiguousTargetError as e:
@@ -385,14 +1306,78 @@ def main():
             for suggestion, path in e.suggestions:
                 rel_path = path.relative_to(latex_dir)
                 print(f"  uv run compile_latex.py {suggestion}  # {rel_path}")
-        sys.exit(1)
+        return None
 
     if tex_file is None:
+        tex_file, results = suggest_targets(latex_dir, name)
+        if tex_file is not None:
+            print(f"No file named '{name}'; using {tex_file.relative_to(latex_dir)}")
+            return tex_file
         print(f"Error: Could not find {name}.tex in {latex_dir}")
+        if results:
+            print()
+            print("Did you mean:")
+            for result in results:
+                print(f"  uv run compile_latex.py {result['notation'] or Path(result['file']).stem}  # {result['file']}")
+    return tex_file
+
+
+def main():
+    """Standalone entry point."""
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
         sys.exit(1)
 
+    parser = argparse.ArgumentParser(description="Compile LaTeX files from the book")
+    parser.add_argument("targets", nargs="*", default=["main"], help="Targets to compile, e.g. ch01, 3.5, 2.* (default: main)")
+    parser.add_argument("--bib", "-b", action="store_true", help="Also compile bibliography with biber")
+    parser.add_argument("--force", "-f", action="store_true", help="Compile even if the build is up to date")
+    parser.add_argument("--max-passes", type=int, default=DEFAULT_MAX_PASSES, help="Maximum number of LaTeX passes")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Parallel jobs for multiple targets (default: CPU count)")
+    parser.add_argument("--no-fmt", dest="use_fmt", action="store_false", help="Do not use a precompiled preamble format")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Print only a JSON diagnostics summary")
+    parser.add_argument("--engine", "-e", choices=("auto",) + ENGINE_NAMES, default="auto", help="TeX engine (default: chosen from the preamble and what is installed)")
+    parser.add_argument("--draft", "-d", action="store_true", help="Fast draft build into build/draft/ (figure boxes, no biber)")
+    parser.add_argument("--preview", "-p", action="store_true", help="Build into build/preview/ with low-resolution figure proxies")
+    parser.add_argument("--wait", dest="queue", action="store_const", const="wait", default="cancel", help="Wait for a running build of the same target instead of cancelling it")
+    parser.add_argument("--no-lint", dest="lint", action="store_false", help="Do not lint the sources before compiling")
+    args = parser.parse_args()
+
+    # Expand wildcard targets such as 2.* into numeric targets
+    names = []
+    for name in args.targets:
+        if is_target_pattern(name):
+            expanded = expand_target_pattern(latex_dir, name)
+            if not expanded:
+                print(f"Error: '{name}' does not match any targets")
+                sys.exit(1)
+            names.extend(expanded)
+        else:
+            names.append(name)
+
+    # Check for excluded file
+    if "localsettings" in names:
+        print("Error: localsettings.tex is not a standalone file and cannot be compiled.")
+        sys.exit(1)
+
+    # Find the tex files
+    tex_files = []
+    for name in names:
+        tex_file = resolve_target(latex_dir, name)
+        if tex_file is None:
+            sys.exit(1)
+        if tex_file not in tex_files:
+            tex_files.append(tex_file)
+
     # Compile
-    return_code = run_compile(tex_file, latex_dir)
+    if len(tex_files) == 1 and not any(is_target_pattern(n) for n in args.targets):
+        return_code = run_compile(tex_files[0], latex_dir, bib=args.bib, force=args.force, max_passes=args.max_passes, use_fmt=args.use_fmt, quiet=args.quiet, draft=args.draft, preview=args.preview, engine=args.engine, queue=args.queue, lint=args.lint)
+    else:
+        return_code = compile_targets(tex_files, latex_dir, jobs=args.jobs, bib=args.bib, force=args.force, max_passes=args.max_passes, use_fmt=args.use_fmt, quiet=args.quiet, draft=args.draft, preview=args.preview, engine=args.engine, queue=args.queue, lint=args.lint)
     sys.exit(return_code)
 
 
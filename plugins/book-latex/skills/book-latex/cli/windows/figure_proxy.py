@@ -0,0 +1,296 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pillow>=10.0.0",
+# ]
+# ///
+"""
+Low-resolution figure proxies for preview builds.
+
+Generated figures are often multi-megabyte PNGs that pdflatex has to read
+and embed on every compile. For preview builds, every PNG/JPEG figure a
+target includes is downscaled and recompressed (in a process pool) into
+build/proxies/, keyed by its content hash and the proxy size, so each
+version of a figure is only converted once.
+
+The proxies are linked into a mirror of the latex/ tree in
+build/preview/figures/. kpathsea does not search TEXINPUTS for explicitly
+relative names (./figures/plot, ../figures/plot) or for the \\graphicspath
+directories of the templates, so the preview also runs proxy_setup before
+the document: it makes \\includegraphics try the mirror of the compile
+directory first, both for the name as written and under each \\graphicspath
+directory. The mirror is put in front of TEXINPUTS as well, for engines
+that cannot run code before the document. Final builds do not use the
+mirror and embed the originals. The resolution stored in a proxy is scaled down with it, so
+figures without an explicit width keep their size on the page.
+
+Can be used as:
+1. Module: from figure_proxy import prepare_proxies, proxy_env, proxy_setup
+2. Standalone: uv run figure_proxy.py [TARGET]  (main.tex by default)
+"""
+
+import importlib.util
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_cache import collect_dependencies, file_digest
+
+PROXY_DIR = "proxies"
+PREVIEW_DIR = "preview"
+MIRROR_DIR = "figures"
+INDEX_FILENAME = "proxies.json"
+
+# Longest side of a proxy in pixels (about 200 dpi across a text block)
+DEFAULT_MAX_SIZE = 1200
+JPEG_QUALITY = 80
+
+PROXY_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# Bumped when the conversion changes, so old proxies are not reused
+PROXY_VERSION = 1
+
+
+def proxy_dir(build_root: Path) -> Path:
+    """Cache of proxy images."""
+    return build_root / PROXY_DIR
+
+
+def mirror_dir(build_root: Path) -> Path:
+    """Mirror of the latex/ tree holding the proxies used by preview builds."""
+    return build_root / PREVIEW_DIR / MIRROR_DIR
+
+
+def figure_files(tex_file: Path, latex_dir: Path) -> list[Path]:
+    """Raster figures included by a target (directly or through subfiles)."""
+    return [
+        dep for dep in collect_dependencies(tex_file, latex_dir)
+        if dep.suffix.lower() in PROXY_EXTENSIONS and dep.is_file()
+    ]
+
+
+def make_proxy(source: Path, target: Path, max_size: int) -> bool:
+    """
+    Write a downscaled copy of source to target, in the same format.
+
+    Returns:
+        False if the image is already small enough (no proxy is written)
+    """
+    from PIL import Image
+
+    with Image.open(source) as image:
+        width, height = image.size
+        if max(width, height) <= max_size:
+            return False
+        dpi = image.info.get("dpi", (72, 72))
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        scale = image.size[0] / width
+        options = {"dpi": (dpi[0] * scale, dpi[1] * scale)}
+
+        if source.suffix.lower() == ".png":
+            fmt = "PNG"
+            options["optimize"] = True
+        else:
+            fmt = "JPEG"
+            options.update(quality=JPEG_QUALITY, optimize=True)
+            if image.mode not in ("RGB", "L", "CMYK"):
+                image = image.convert("RGB")
+
+        # Parallel builds may convert the same figure: write, then rename
+        temp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        image.save(temp, fmt, **options)
+    os.replace(temp, target)
+    return True
+
+
+def _proxy_worker(source: Path, target: Path, max_size: int) -> tuple[Path, bool]:
+    return source, make_proxy(source, target, max_size)
+
+
+def _load_index(path: Path) -> dict:
+    try:
+        index = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"version": PROXY_VERSION, "files": {}, "proxies": {}}
+    if index.get("version") != PROXY_VERSION:
+        return {"version": PROXY_VERSION, "files": {}, "proxies": {}}
+    return index
+
+
+def _link(source: Path, target: Path) -> None:
+    """Point target at source: a hard link where possible, a copy otherwise."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if os.path.samefile(source, target):
+            return
+    except OSError:
+        pass
+    temp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    temp.unlink(missing_ok=True)
+    try:
+        os.link(source, temp)
+    except OSError:
+        shutil.copy2(source, temp)
+    os.replace(temp, target)
+
+
+def prepare_proxies(
+    tex_file: Path,
+    latex_dir: Path,
+    build_root: Path,
+    fingerprint: dict | None = None,
+    max_size: int = DEFAULT_MAX_SIZE,
+    jobs: int | None = None,
+    echo=print
+) -> Path | None:
+    """
+    Make sure every raster figure of a target has an up-to-date proxy.
+
+    Args:
+        tex_file: Path to the .tex file
+        latex_dir: Path to the latex directory
+        build_root: The project's build directory
+        fingerprint: Dependency digests from check_manifest, to avoid
+            hashing the figures again
+        max_size: Longest side of a proxy in pixels
+        jobs: Number of worker processes for the conversion
+        echo: Function for normal output
+
+    Returns:
+        The mirror directory to put in front of TEXINPUTS, or None if
+        Pillow is not installed
+    """
+    if importlib.util.find_spec("PIL") is None:
+        echo("Warning: Pillow is not installed; the preview uses the original figures")
+        return None
+
+    cache = proxy_dir(build_root)
+    cache.mkdir(parents=True, exist_ok=True)
+    mirror = mirror_dir(build_root)
+    index_file = cache / INDEX_FILENAME
+    index = _load_index(index_file)
+    fingerprint = fingerprint or {}
+
+    # Proxy of each figure: cache file name, or None if it needs no proxy
+    wanted: dict[Path, str] = {}
+    pending: dict[Path, Path] = {}
+    for figure in figure_files(tex_file, latex_dir):
+        rel = figure.relative_to(latex_dir).as_posix()
+        digest = fingerprint.get(rel) or file_digest(figure, index["files"].get(rel))
+        index["files"][rel] = digest
+        key = f"{digest['sha256'][:24]}-{max_size}{figure.suffix.lower()}"
+        wanted[figure] = key
+        if key not in index["proxies"] or (index["proxies"][key] and not (cache / key).exists()):
+            pending[figure] = cache / key
+
+    if pending:
+        echo(f"Making {len(pending)} figure prox{'y' if len(pending) == 1 else 'ies'} ({max_size}px)...")
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_proxy_worker, source, target, max_size) for source, target in pending.items()]
+            for future in futures:
+                try:
+                    source, made = future.result()
+                except OSError as e:
+                    echo(f"Warning: could not make a figure proxy: {e}")
+                    continue
+                index["proxies"][pending[source].name] = pending[source].name if made else None
+
+    proxied = 0
+    for figure, key in wanted.items():
+        name = index["proxies"].get(key)
+        mirrored = mirror / figure.relative_to(latex_dir)
+        if name:
+            _link(cache / name, mirrored)
+            proxied += 1
+        else:
+            # Small figures are used as they are
+            mirrored.unlink(missing_ok=True)
+
+    temp = index_file.with_name(f"{INDEX_FILENAME}.{os.getpid()}.tmp")
+    temp.write_text(json.dumps(index, indent=2), encoding="utf-8")
+    os.replace(temp, index_file)
+
+    if wanted:
+        echo(f"Figure proxies: {proxied} of {len(wanted)} figure(s) downscaled to {max_size}px")
+    return mirror
+
+
+def proxy_env(env: dict | None, mirror: Path, file_dir: Path, latex_dir: Path) -> dict:
+    """
+    Put the proxy mirror in front of TEXINPUTS.
+
+    Figures are looked up relative to the compile directory, so both the
+    mirror of that directory and the mirror root (for paths relative to
+    latex/) are added.
+    """
+    env = dict(env) if env is not None else os.environ.copy()
+    paths = [mirror / file_dir.relative_to(latex_dir), mirror]
+    # A trailing separator keeps the default search path
+    env["TEXINPUTS"] = os.pathsep.join(str(path) for path in dict.fromkeys(paths)) + os.pathsep + env.get("TEXINPUTS", "")
+    return env
+
+
+# Wraps \Ginclude@graphics (the file lookup of graphicx): the name as
+# written and every \graphicspath directory are tried in the mirror of the
+# compile directory first, then graphicx looks up the original as usual
+PROXY_SETUP = r"""\makeatletter
+\def\bookproxy@dir{<mirror>}
+\def\bookproxy@exts{,.png,.jpg,.jpeg,.PNG,.JPG,.JPEG}
+\newif\ifbookproxy@found
+\def\bookproxy@tfor{\@tfor\bookproxy@area:=}
+\def\bookproxy@graphics#1{%
+  \begingroup
+  \ifx\Ginput@path\@undefined\let\Ginput@path\@empty\fi
+  \let\bookproxy@areas\@empty
+  \expandafter\bookproxy@tfor\Ginput@path\do{%
+    \edef\bookproxy@areas{\bookproxy@areas{\bookproxy@dir\bookproxy@area}}}%
+  \edef\Ginput@path{\bookproxy@areas\Ginput@path}%
+  \def\bookproxy@file{#1}%
+  \@for\bookproxy@ext:=\bookproxy@exts\do{%
+    \ifbookproxy@found\else
+      \IfFileExists{\bookproxy@dir#1\bookproxy@ext}{%
+        \edef\bookproxy@file{\bookproxy@dir#1\bookproxy@ext}\bookproxy@foundtrue}{}%
+    \fi}%
+  \expandafter\bookproxy@include\expandafter{\bookproxy@file}%
+  \endgroup}
+\AtBeginDocument{%
+  \@ifundefined{Ginclude@graphics}{}{%
+    \let\bookproxy@include\Ginclude@graphics
+    \let\Ginclude@graphics\bookproxy@graphics}}
+\makeatother
+"""
+
+
+def proxy_setup(mirror: Path, file_dir: Path, latex_dir: Path) -> str:
+    """
+    TeX code that makes \\includegraphics prefer the proxies.
+
+    Run before the document (see run_compile); figures are looked up in the
+    mirror of the compile directory, so ./figures/plot, ../figures/plot and
+    plot under \\graphicspath{{./figures/}} all find their proxy.
+    """
+    mirrored = (mirror / file_dir.relative_to(latex_dir)).resolve().as_posix().rstrip("/") + "/"
+    return PROXY_SETUP.replace("<mirror>", mirrored)
+
+
+def main():
+    """Standalone entry point: make the proxies of a target."""
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    tex_file = latex_dir / ((sys.argv[1] if len(sys.argv) > 1 else "main") + ".tex")
+    if not tex_file.exists():
+        print(f"Error: {tex_file} not found")
+        sys.exit(1)
+    mirror = prepare_proxies(tex_file, latex_dir, latex_dir.parent / "build")
+    sys.exit(0 if mirror else 1)
+
+
+if __name__ == "__main__":
+    main()
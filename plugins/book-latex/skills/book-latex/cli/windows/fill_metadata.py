@@ -0,0 +1,181 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pyyaml>=6.0",
+# ]
+# ///
+"""
+Apply the book metadata in config.yaml to an existing project.
+
+book init writes config.yaml with the metadata it was given (title,
+subtitle, authors, language, ...). After editing it, book fill replaces
+the [PROMPT: ...] placeholders that now have a value, and the babel
+language, in every .tex file under latex/. Each file is rendered with one
+regex scan (init_latex.render_placeholders); files are processed on a
+thread pool and only those whose content changes are rewritten, so
+unchanged files keep their timestamps and do not trigger a rebuild.
+
+A placeholder is replaced once: to change a title already filled in,
+edit the file itself.
+
+Can be used as:
+1. Module: from fill_metadata import load_config, write_config, fill_project
+2. Standalone: uv run fill_metadata.py [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from init_latex import PLACEHOLDER_PATTERN, placeholder_values, render_placeholders
+from project_index import get_project_index
+
+CONFIG_FILENAME = "config.yaml"
+
+# Keys of config.yaml, in the order book init writes them
+CONFIG_KEYS = (
+    "title", "subtitle", "description", "authors", "year", "edition", "publisher",
+    "city", "state", "zip_code", "country", "language", "book_type", "theme",
+)
+
+
+class ConfigError(Exception):
+    """config.yaml is missing or malformed."""
+
+
+def load_config(project_root: Path) -> dict:
+    """Read the metadata in config.yaml."""
+    config_file = project_root / CONFIG_FILENAME
+    try:
+        config = yaml.safe_load(config_file.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise ConfigError(f"{config_file} not found (book init writes it)") from None
+    except (OSError, yaml.YAMLError) as e:
+        raise ConfigError(f"Cannot read {config_file}: {e}") from None
+    if config is None:
+        return {}
+    if not isinstance(config, dict):
+        raise ConfigError(f"{config_file}: expected a mapping of metadata keys")
+    unknown = sorted(set(config) - set(CONFIG_KEYS))
+    if unknown:
+        raise ConfigError(f"{config_file}: unknown key(s) {', '.join(map(str, unknown))}")
+    return config
+
+
+def write_config(project_root: Path, metadata: dict) -> bool:
+    """
+    Write config.yaml with every key, unset ones as null.
+
+    Returns:
+        False if config.yaml already exists (it is left alone)
+    """
+    config_file = project_root / CONFIG_FILENAME
+    if config_file.exists():
+        return False
+    config = {key: metadata.get(key) for key in CONFIG_KEYS}
+    config["authors"] = list(config["authors"] or [])
+    config_file.write_text(yaml.safe_dump(config, sort_keys=False, allow_unicode=True), encoding="utf-8")
+    return True
+
+
+def fill_file(path: Path, values: dict[str, str], dry_run: bool = False) -> tuple[bool, int]:
+    """
+    Render one file and rewrite it if it changed.
+
+    Returns:
+        (changed, number of [PROMPT: ...] placeholders left)
+    """
+    # newline="" keeps the file's line endings as they are
+    with open(path, encoding="utf-8", newline="") as f:
+        content = f.read()
+    rendered = render_placeholders(content, values)
+    remaining = sum(1 for match in PLACEHOLDER_PATTERN.finditer(rendered) if match.group(1) is not None)
+    if rendered == content:
+        return False, remaining
+    if not dry_run:
+        temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(temp, "w", encoding="utf-8", newline="") as f:
+            f.write(rendered)
+        os.replace(temp, path)
+    return True, remaining
+
+
+def fill_project(
+    project_root: Path,
+    dry_run: bool = False,
+    jobs: int | None = None,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Apply config.yaml to the placeholders of every .tex file under latex/.
+
+    Args:
+        project_root: Path to the project root
+        dry_run: If True, only list the files that would change
+        jobs: Number of worker threads (default: Python's default)
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 on success, 1 on error
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    latex_dir = project_root / "latex"
+    try:
+        values = placeholder_values(load_config(project_root))
+    except ConfigError as e:
+        error_style(f"Error: {e}")
+        return 1
+
+    files = get_project_index(latex_dir).files
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(lambda rel: fill_file(latex_dir / rel, values, dry_run), files))
+
+    changed = [rel for rel, (was_changed, _) in zip(files, results) if was_changed]
+    for rel in changed:
+        echo(f"  {'Would update' if dry_run else 'Updated'}: latex/{rel}")
+
+    remaining = {rel: count for rel, (_, count) in zip(files, results) if count}
+    if remaining:
+        echo(f"{sum(remaining.values())} [PROMPT: ...] placeholder(s) left:")
+        for rel, count in remaining.items():
+            echo(f"  latex/{rel} ({count})")
+
+    if dry_run:
+        echo(f"Dry run: {len(changed)} of {len(files)} file(s) would change")
+    elif changed:
+        success_style(f"Updated {len(changed)} of {len(files)} file(s)")
+    else:
+        success_style(f"Nothing to fill: {len(files)} file(s) already up to date")
+    return 0
+
+
+def main():
+    """Standalone entry point."""
+    project_root = Path.cwd()
+    if not (project_root / "latex").exists():
+        print(f"Error: latex directory not found at {project_root / 'latex'}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Apply config.yaml to the placeholders of the .tex files")
+    parser.add_argument("--dry-run", "-n", action="store_true", help="Only list the files that would change")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker threads")
+    args = parser.parse_args()
+
+    sys.exit(fill_project(project_root, dry_run=args.dry_run, jobs=args.jobs))
+
+
+if __name__ == "__main__":
+    main()
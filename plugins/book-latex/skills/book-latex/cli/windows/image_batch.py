@@ -0,0 +1,361 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "google-genai>=1.0.0",
+#     "pillow>=10.0.0",
+#     "python-dotenv>=1.0.0",
+#     "pyyaml>=6.0",
+# ]
+# ///
+"""
+Generate and edit many images from a manifest, concurrently.
+
+The manifest is a YAML file:
+
+    concurrency: 4             # optional, jobs running at once
+    resolution: 2K             # optional, default for new images (1K)
+    images:
+      - path: figures/flowchart.png
+        prompt: A process flowchart
+      - path: figures/chart.png
+        action: edit           # edit an existing image (default: new)
+        prompt: Add a legend
+        resolution: 4K         # optional, edits default to the input size
+
+Paths are relative to the manifest. Jobs run on a thread pool; the jobs
+of one path run in manifest order, so an image can be generated and then
+edited. Rate-limit and server errors (429, 5xx) are retried with
+exponential backoff and jitter.
+
+Progress is kept next to the manifest (figures.progress.json for
+figures.yaml) after every job. Running the batch again skips the jobs
+already done, unless their prompt, resolution or an earlier job on the
+same path changed. An interrupted batch therefore resumes, and an edit
+is never applied twice.
+
+The client can be passed in, or pointed at a local stub with
+GEMINI_BASE_URL.
+
+Can be used as:
+1. Module: from image_batch import load_manifest, batch_images
+2. Standalone: uv run image_batch.py MANIFEST [--concurrency N] [--force] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import yaml
+
+from image_gen import detect_resolution, get_api_key, make_client, request_image, save_response
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 5
+RESOLUTIONS = ("1K", "2K", "4K")
+ACTIONS = ("new", "edit")
+
+# HTTP status codes worth retrying: rate limited, or a transient server error
+RETRY_CODES = {408, 429, 500, 502, 503, 504}
+BASE_DELAY = 2.0
+MAX_DELAY = 60.0
+
+PROGRESS_VERSION = 1
+
+
+class ManifestError(Exception):
+    """The manifest is missing or malformed."""
+
+
+class NoImageError(Exception):
+    """The response did not contain an image."""
+
+
+@dataclass
+class ImageJob:
+    """One image to generate or edit."""
+    path: Path
+    prompt: str
+    action: str = "new"
+    resolution: str | None = None
+    # Identifies the job and every job before it on the same path
+    key: str = ""
+
+
+def load_manifest(manifest_file: Path) -> tuple[list[ImageJob], dict]:
+    """
+    Read a manifest.
+
+    Returns:
+        (jobs in manifest order, settings with "concurrency")
+    """
+    try:
+        data = yaml.safe_load(manifest_file.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise ManifestError(f"{manifest_file} not found") from None
+    except (OSError, yaml.YAMLError) as e:
+        raise ManifestError(f"Cannot read {manifest_file}: {e}") from None
+
+    if isinstance(data, list):
+        data = {"images": data}
+    if not isinstance(data, dict) or not isinstance(data.get("images"), list):
+        raise ManifestError(f"{manifest_file}: expected an images list")
+
+    default_resolution = data.get("resolution", "1K")
+    if default_resolution not in RESOLUTIONS:
+        raise ManifestError(f"resolution: expected one of {', '.join(RESOLUTIONS)}")
+    concurrency = data.get("concurrency", DEFAULT_CONCURRENCY)
+    if not isinstance(concurrency, int) or concurrency < 1:
+        raise ManifestError("concurrency: expected a positive integer")
+
+    jobs = []
+    previous: dict[Path, str] = {}
+    for i, item in enumerate(data["images"], 1):
+        where = f"images[{i}]"
+        if not isinstance(item, dict):
+            raise ManifestError(f"{where}: expected a mapping with path and prompt")
+        unknown = sorted(set(item) - {"path", "prompt", "action", "resolution"})
+        if unknown:
+            raise ManifestError(f"{where}: unknown key(s) {', '.join(map(str, unknown))}")
+        if not isinstance(item.get("path"), str) or not item["path"].strip():
+            raise ManifestError(f"{where}: path is required")
+        if not isinstance(item.get("prompt"), str) or not item["prompt"].strip():
+            raise ManifestError(f"{where}: prompt is required")
+        action = item.get("action", "new")
+        if action not in ACTIONS:
+            raise ManifestError(f"{where}: action must be new or edit")
+        resolution = item.get("resolution")
+        if resolution is not None and resolution not in RESOLUTIONS:
+            raise ManifestError(f"{where}: resolution must be one of {', '.join(RESOLUTIONS)}")
+        if action == "new" and resolution is None:
+            resolution = default_resolution
+
+        path = Path(os.path.normpath(manifest_file.parent / item["path"]))
+        key = hashlib.sha256(
+            json.dumps([previous.get(path, ""), action, item["path"], item["prompt"], resolution]).encode("utf-8")
+        ).hexdigest()
+        previous[path] = key
+        jobs.append(ImageJob(path=path, prompt=item["prompt"], action=action, resolution=resolution, key=key))
+
+    return jobs, {"concurrency": concurrency}
+
+
+def progress_file(manifest_file: Path) -> Path:
+    """Where the progress of a manifest is kept."""
+    return manifest_file.with_suffix(".progress.json")
+
+
+def load_progress(path: Path) -> dict:
+    """Keys of the jobs done, mapped to their path and finish time."""
+    try:
+        progress = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if progress.get("version") != PROGRESS_VERSION:
+        return {}
+    return progress.get("done", {})
+
+
+def save_progress(path: Path, done: dict) -> None:
+    """Write the progress atomically."""
+    temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temp.write_text(json.dumps({"version": PROGRESS_VERSION, "done": done}, indent=2), encoding="utf-8")
+    os.replace(temp, path)
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limits, transient server errors and dropped connections."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(code, int):
+        return code in RETRY_CODES
+    if isinstance(error, (ConnectionError, TimeoutError)) or "RESOURCE_EXHAUSTED" in str(error):
+        return True
+    # httpx connection errors and timeouts, without importing httpx
+    return any(cls.__name__ == "TransportError" for cls in type(error).__mro__)
+
+
+def backoff_delay(attempt: int, base_delay: float = BASE_DELAY) -> float:
+    """Exponential backoff with jitter: about base, 2 x base, 4 x base, ..."""
+    return min(MAX_DELAY, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def run_job(client, job: ImageJob, echo=print) -> None:
+    """Generate or edit one image; raises on failure."""
+    from PIL import Image as PILImage
+
+    if job.action == "edit":
+        if not job.path.exists():
+            raise FileNotFoundError(f"Image not found: {job.path}")
+        with PILImage.open(job.path) as opened:
+            input_image = opened.copy()
+        resolution = job.resolution or detect_resolution(input_image)
+        contents = [input_image, job.prompt]
+    else:
+        job.path.parent.mkdir(parents=True, exist_ok=True)
+        resolution = job.resolution
+        contents = job.prompt
+
+    response = request_image(client, contents, resolution)
+
+    # Written next to the image and renamed, so an edit never leaves half a file
+    temp = job.path.with_name(f".{job.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if not save_response(response, temp, echo):
+            raise NoImageError("No image was generated in the response")
+        os.replace(temp, job.path)
+    finally:
+        temp.unlink(missing_ok=True)
+
+
+def batch_images(
+    manifest_file: Path,
+    concurrency: int | None = None,
+    retries: int = DEFAULT_RETRIES,
+    force: bool = False,
+    dry_run: bool = False,
+    client=None,
+    base_delay: float = BASE_DELAY,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Run the jobs of a manifest that are not done yet.
+
+    Args:
+        manifest_file: Path to the manifest YAML file
+        concurrency: Jobs running at once (default: from the manifest, or 4)
+        retries: Retries per job on rate-limit and server errors
+        force: If True, run every job again, ignoring the progress file
+        dry_run: If True, only list the jobs that would run
+        client: Gemini client to use (default: one made from GEMINI_API_KEY)
+        base_delay: First backoff delay in seconds
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 if every job succeeded, otherwise 1
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    manifest_file = Path(manifest_file)
+    try:
+        jobs, settings = load_manifest(manifest_file)
+    except ManifestError as e:
+        error_style(f"Error: {e}")
+        return 1
+
+    progress_path = progress_file(manifest_file)
+    done = {} if force else load_progress(progress_path)
+    # Once a job on a path runs again, so do the later ones on that path
+    pending = []
+    rerun = set()
+    for job in jobs:
+        if job.path in rerun or job.key not in done or not job.path.exists():
+            rerun.add(job.path)
+            pending.append(job)
+    skipped = len(jobs) - len(pending)
+
+    if dry_run or not pending:
+        for job in pending:
+            echo(f"  {job.action:4}  {job.path}  {job.prompt[:60]}{'...' if len(job.prompt) > 60 else ''}")
+        echo(f"{len(pending)} of {len(jobs)} job(s) to run, {skipped} already done")
+        return 0
+
+    if client is None:
+        api_key = get_api_key()
+        if not api_key:
+            error_style("Error: No API key found.")
+            error_style("Please set GEMINI_API_KEY in .env file or environment.")
+            return 1
+        client = make_client(api_key)
+
+    # The jobs of one path run in order, on the same worker
+    chains: dict[Path, list[ImageJob]] = {}
+    for job in pending:
+        chains.setdefault(job.path, []).append(job)
+
+    lock = threading.Lock()
+    counts = {"new": 0, "edit": 0, "failed": 0}
+    finished = [0]
+
+    def report(message: str, style=echo) -> None:
+        with lock:
+            style(message)
+
+    def run_chain(chain: list[ImageJob]) -> None:
+        for position, job in enumerate(chain):
+            attempt = 0
+            while True:
+                try:
+                    run_job(client, job, echo=lambda text, job=job: report(f"  {job.path.name}: {text}"))
+                    break
+                except Exception as e:
+                    if attempt < retries and is_retryable(e):
+                        delay = backoff_delay(attempt, base_delay)
+                        attempt += 1
+                        report(f"  {job.path.name}: {e}; retrying in {delay:.1f}s ({attempt}/{retries})")
+                        time.sleep(delay)
+                        continue
+                    # The later jobs on this path depend on this one
+                    later = len(chain) - position - 1
+                    with lock:
+                        counts["failed"] += 1 + later
+                        finished[0] += 1 + later
+                        error_style(f"[{finished[0]}/{len(pending)}] Failed {job.action} {job.path}: {e}")
+                        if later:
+                            error_style(f"  Skipped the {later} later job(s) on {job.path}")
+                    return
+            with lock:
+                counts[job.action] += 1
+                finished[0] += 1
+                done[job.key] = {"path": str(job.path), "finished": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                save_progress(progress_path, done)
+                echo(f"[{finished[0]}/{len(pending)}] {'Generated' if job.action == 'new' else 'Edited'} {job.path}")
+
+    workers = min(concurrency or settings["concurrency"], len(chains))
+    echo(f"Running {len(pending)} job(s) on {workers} worker(s); {skipped} already done")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(run_chain, chain) for chain in chains.values()]):
+            future.result()
+
+    summary = f"Generated {counts['new']}, edited {counts['edit']}, skipped {skipped} already done"
+    if counts["failed"]:
+        error_style(f"{summary}, {counts['failed']} failed; run the batch again to retry them")
+        return 1
+    success_style(summary)
+    return 0
+
+
+def main():
+    """Standalone entry point."""
+    parser = argparse.ArgumentParser(description="Generate and edit images from a manifest, concurrently")
+    parser.add_argument("manifest", type=Path, help="Manifest YAML file")
+    parser.add_argument("--concurrency", "-c", type=int, default=None, help=f"Jobs at once (default: manifest, or {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help=f"Retries on rate-limit and server errors (default: {DEFAULT_RETRIES})")
+    parser.add_argument("--force", action="store_true", help="Run every job again, ignoring earlier progress")
+    parser.add_argument("--dry-run", "-n", action="store_true", help="Only list the jobs that would run")
+    args = parser.parse_args()
+
+    sys.exit(batch_images(
+        args.manifest,
+        concurrency=args.concurrency,
+        retries=args.retries,
+        force=args.force,
+        dry_run=args.dry_run,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -36,12 +36,93 @@ def get_api_key(provided_key: str | None = None) -> str | None:
     return os.environ.get("GEMINI_API_KEY")
 
 
+MODEL = "gemini-3-pro-image-preview"
+
+
+def make_client(api_key: str):
+    """
+    Create the Gemini client.
+
+    GEMINI_BASE_URL, if set, points the client at another endpoint (a
+    proxy, or a local stub for testing).
+    """
+    from google import genai
+    from google.genai import types
+
+    base_url = os.environ.get("GEMINI_BASE_URL")
+    http_options = types.HttpOptions(base_url=base_url) if base_url else None
+    return genai.Client(api_key=api_key, http_options=http_options)
+
+
+def request_image(client, contents, resolution: str):
+    """Ask the model for an image; contents is a prompt or [image, prompt]."""
+    from google.genai import types
+
+    return client.models.generate_content(
+        model=MODEL,
+        contents=contents,
+        config=types.GenerateContentConfig(
+            response_modalities=["TEXT", "IMAGE"],
+            image_config=types.ImageConfig(
+                image_size=resolution
+            )
+        )
+    )
+
+
+def save_response(response, output_path: Path, echo=print) -> bool:
+    """
+    Save the image of a response as PNG, echoing any text parts.
+
+    Returns:
+        True if the response contained an image
+    """
+    from PIL import Image as PILImage
+
+    image_saved = False
+    for part in response.parts or []:
+        if part.text is not None:
+            echo(f"Model response: {part.text}")
+        elif part.inline_data is not None:
+            from io import BytesIO
+
+            image_data = part.inline_data.data
+            if isinstance(image_data, str):
+                import base64
+                image_data = base64.b64decode(image_data)
+
+            image = PILImage.open(BytesIO(image_data))
+
+            # Ensure RGB mode for PNG
+            if image.mode == 'RGBA':
+                rgb_image = PILImage.new('RGB', image.size, (255, 255, 255))
+                rgb_image.paste(image, mask=image.split()[3])
+                rgb_image.save(str(output_path), 'PNG')
+            elif image.mode == 'RGB':
+                image.save(str(output_path), 'PNG')
+            else:
+                image.convert('RGB').save(str(output_path), 'PNG')
+            image_saved = True
+    return image_saved
+
+
+def detect_resolution(image) -> str:
+    """Resolution matching the size of an input image."""
+    max_dim = max(image.size)
+    if max_dim >= 3000:
+        return "4K"
+    if max_dim >= 1500:
+        return "2K"
+    return "1K"
+
+
 def generate_image(
     prompt: str,
     output_path: Path,
     resolution: str = "1K",
     echo=print,
-    error_style=None
+    error_style=None,
+    client=None
 ) -> int:
     """
     Generate a new image from a text prompt.
@@ -52,6 +133,7 @@ def generate_image(
         resolution: Image resolution (1K, 2K, or 4K)
         echo: Function for normal output
         error_style: Function for error messages
+        client: Gemini client to use (default: one made from GEMINI_API_KEY)
 
     Returns:
         0 on success, 1 on error
@@ -59,16 +141,12 @@ def generate_image(
     if error_style is None:
         error_style = echo
 
-    api_key = get_api_key()
-    if not api_key:
-        error_style("Error: No API key found.")
-        error_style("Please set GEMINI_API_KEY in .env file or environment.")
-        return 1
-
-    # Import here after checking API key to avoid slow import on error
-    from google import genai
-    from google.genai import types
-    from PIL import Image as PILImage
+    if client is None:
+        api_key = get_api_key()
+        if not api_key:
+            error_style("Error: No API key found.")
+            error_style("Please set GEMINI_API_KEY in .env file or environment.")
+            return 1
 
     # Ensure output directory exists
     output_path = Path(output_path)
@@ -79,46 +157,13 @@ def generate_image(
     echo(f"Prompt: {prompt[:100]}{'...' if len(prompt) > 100 else ''}")
 
     try:
-        client = genai.Client(api_key=api_key)
-
-        response = client.models.generate_content(
-            model="gemini-3-pro-image-preview",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_modalities=["TEXT", "IMAGE"],
-                image_config=types.ImageConfig(
-                    image_size=resolution
-                )
-            )
-        )
+        # Created here after checking the API key to avoid a slow import on error
+        if client is None:
+            client = make_client(api_key)
 
-        # Process response and save image
-        image_saved = False
-        for part in response.parts:
-            if part.text is not None:
-                echo(f"Model response: {part.text}")
-            elif part.inline_data is not None:
-                from io import BytesIO
-
-                image_data = part.inline_data.data
-                if isinstance(image_data, str):
-                    import base64
-                    image_data = base64.b64decode(image_data)
-
-                image = PILImage.open(BytesIO(image_data))
-
-                # Ensure RGB mode for PNG
-                if image.mode == 'RGBA':
-                    rgb_image = PILImage.new('RGB', image.size, (255, 255, 255))
-                    rgb_image.paste(image, mask=image.split()[3])
-                    rgb_image.save(str(output_path), 'PNG')
-                elif image.mode == 'RGB':
-                    image.save(str(output_path), 'PNG')
-                else:
-                    image.convert('RGB').save(str(output_path), 'PNG')
-                image_saved = True
-
-        if image_saved:
+        response = request_image(client, prompt, resolution)
+
+        if save_response(response, output_path, echo):
             echo(f"Image saved: {output_path.resolve()}")
             return 0
         else:
@@ -135,7 +180,8 @@ def edit_image(
     image_path: Path,
     resolution: str | None = None,
     echo=print,
-    error_style=None
+    error_style=None,
+    client=None
 ) -> int:
     """
     Edit an existing image with a text prompt.
@@ -146,6 +192,7 @@ def edit_image(
         resolution: Image resolution (1K, 2K, 4K) or None for auto-detect
         echo: Function for normal output
         error_style: Function for error messages
+        client: Gemini client to use (default: one made from GEMINI_API_KEY)
 
     Returns:
         0 on success, 1 on error
@@ -153,11 +200,12 @@ def edit_image(
     if error_style is None:
         error_style = echo
 
-    api_key = get_api_key()
-    if not api_key:
-        error_style("Error: No API key found.")
-        error_style("Please set GEMINI_API_KEY in .env file or environment.")
-        return 1
+    if client is None:
+        api_key = get_api_key()
+        if not api_key:
+            error_style("Error: No API key found.")
+            error_style("Please set GEMINI_API_KEY in .env file or environment.")
+            return 1
 
     image_path = Path(image_path)
     if not image_path.exists():
@@ -165,8 +213,6 @@ def edit_image(
         return 1
 
     # Import here after checking API key to avoid slow import on error
-    from google import genai
-    from google.genai import types
     from PIL import Image as PILImage
 
     echo(f"Editing image: {image_path}")
@@ -179,60 +225,20 @@ def edit_image(
         # Auto-detect resolution if not specified
         output_resolution = resolution
         if output_resolution is None:
-            width, height = input_image.size
-            max_dim = max(width, height)
-            if max_dim >= 3000:
-                output_resolution = "4K"
-            elif max_dim >= 1500:
-                output_resolution = "2K"
-            else:
-                output_resolution = "1K"
+            output_resolution = detect_resolution(input_image)
             echo(f"Auto-detected resolution: {output_resolution}")
         else:
             echo(f"Resolution: {output_resolution}")
 
         echo(f"Prompt: {prompt[:100]}{'...' if len(prompt) > 100 else ''}")
 
-        client = genai.Client(api_key=api_key)
+        if client is None:
+            client = make_client(api_key)
 
-        response = client.models.generate_content(
-            model="gemini-3-pro-image-preview",
-            contents=[input_image, prompt],
-            config=types.GenerateContentConfig(
-                response_modalities=["TEXT", "IMAGE"],
-                image_config=types.ImageConfig(
-                    image_size=output_resolution
-                )
-            )
-        )
+        response = request_image(client, [input_image, prompt], output_resolution)
 
-        # Process response and save image (overwrite original)
-        image_saved = False
-        for part in response.parts:
-            if part.text is not None:
-                echo(f"Model response: {part.text}")
-            elif part.inline_data is not None:
-                from io import BytesIO
-
-                image_data = part.inline_data.data
-                if isinstance(image_data, str):
-                    import base64
-                    image_data = base64.b64decode(image_data)
-
-                image = PILImage.open(BytesIO(image_data))
-
-                # Ensure RGB mode for PNG
-                if image.mode == 'RGBA':
-                    rgb_image = PILImage.new('RGB', image.size, (255, 255, 255))
-                    rgb_image.paste(image, mask=image.split()[3])
-                    rgb_image.save(str(image_path), 'PNG')
-                elif image.mode == 'RGB':
-                    image.save(str(image_path), 'PNG')
-                else:
-                    image.convert('RGB').save(str(image_path), 'PNG')
-                image_saved = True
-
-        if image_saved:
+        # Save the image (overwrite original)
+        if save_response(response, image_path, echo):
             echo(f"Image saved: {image_path.resolve()}")
             return 0
         else:
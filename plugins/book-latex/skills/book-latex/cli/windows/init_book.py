@@ -1,18 +1,22 @@
 # /// script
 # requires-python = ">=3.10"
-# dependencies = []
+# dependencies = [
+#     "pyyaml>=6.0",
+# ]
 # ///
 """
 LaTeX book project initialization.
 
 Can be used as:
 1. Module: from init_book import init_project
-2. Standalone: uv run init_book.py
+2. Standalone: uv run init_book.py [--from-outline OUTLINE]
 
 Example:
     uv run init_book.py
+    uv run init_book.py --from-outline outline.yaml
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -33,6 +37,7 @@ def init_project(
     language: str | None = None,
     book_type: str | None = None,
     theme: str | None = None,
+    outline_file: Path | None = None,
     echo=print,
     success_style=None,
     error_style=None
@@ -56,6 +61,8 @@ def init_project(
         language: Book language (e.g., english, norsk)
         book_type: Book type
         theme: Book theme
+        outline_file: Outline YAML file with the parts, chapters and
+            sections to create (see scaffold_outline.py)
         echo: Function for normal output
         success_style: Function for success messages
         error_style: Function for error messages
@@ -68,6 +75,16 @@ def init_project(
     if error_style is None:
         error_style = echo
 
+    outline = None
+    if outline_file is not None:
+        # Read the outline before creating anything, so a bad one aborts cleanly
+        from scaffold_outline import OutlineError, load_outline
+        try:
+            outline = load_outline(outline_file)
+        except OutlineError as e:
+            error_style(f"Error: {e}")
+            return 1
+
     echo(f"Initializing LaTeX book project in {project_root}")
     echo("-" * 50)
 
@@ -89,7 +106,19 @@ def init_project(
     }
 
     from init_latex import scaffold_latex
-    scaffold_latex(project_root, metadata, echo)
+    if not scaffold_latex(project_root, metadata, echo):
+        return 1
+
+    from fill_metadata import CONFIG_FILENAME, write_config
+    if write_config(project_root, metadata):
+        echo(f"  Created: {CONFIG_FILENAME} (edit it and run 'book fill' to apply)")
+
+    if outline is not None:
+        from scaffold_outline import plan_scaffold, write_scaffold
+        echo(f"\nCreating the outline from {outline_file}")
+        plan = plan_scaffold(project_root / "latex", outline)
+        if write_scaffold(project_root / "latex", plan, echo=echo, success_style=success_style, error_style=error_style):
+            return 1
 
     echo("-" * 50)
     success_style("Book project initialized successfully!")
@@ -98,8 +127,12 @@ def init_project(
 
 def main():
     """Standalone entry point."""
+    parser = argparse.ArgumentParser(description="Initialize a LaTeX book project")
+    parser.add_argument("--from-outline", dest="outline_file", type=Path, help="Create the parts, chapters and sections of an outline file")
+    args = parser.parse_args()
+
     project_root = Path.cwd()
-    return_code = init_project(project_root)
+    return_code = init_project(project_root, outline_file=args.outline_file)
     sys.exit(return_code)
 
 
@@ -9,6 +9,7 @@ Creates a complete LaTeX book skeleton with subfiles support.
 All content files use [PROMPT: ...] placeholders.
 """
 
+import re
 from pathlib import Path
 
 # =============================================================================
@@ -320,39 +321,124 @@ INDEX_TEX = r"""\documentclass[../main.tex]{subfiles}
 \end{document}
 """
 
+# --- Outline (parts, chapters, appendices and sections) ---
+# The <...> fields are filled in per node by scaffold_outline
+
+PART_TEX = r"""\documentclass[../../main.tex]{subfiles}
+\begin{document}
+
+% Add chapters here using \subfile{chXX-name/chXX-name.tex}
+
+\end{document}
+"""
+
+PART_ENTRY = r"""% ============ DEL <number>: <TITLE> ============
+\part{<title>}
+<counter>\renewcommand{\thechapter}{\<numbering>{chapter}}
+\subfile{<path>}
+"""
+
+CHAPTER_TEX = r"""\documentclass[../../../main.tex]{subfiles}
+\graphicspath{{\subfix{./figures/}}}
+\begin{document}
+
+\chapter{<title>}
+\label{ch:<slug>}
+
+% Chapter introduction
+
+% Add sections here using \subfile{secNN-name.tex}
+
+\ifSubfilesClassLoaded{%
+  \printbibliography
+}{}
+
+\end{document}
+"""
+
+CHAPTER_ENTRY = r"""% Kapittel <number> - <title>
+\subfile{<path>}
+"""
+
+APPENDIX_TEX = r"""\documentclass[../../main.tex]{subfiles}
+\graphicspath{{\subfix{./figures/}}}
+\begin{document}
+
+\chapter{<title>}
+\label{app:<slug>}
+
+% Appendix content
+
+\end{document}
+"""
+
+SECTION_TEX = r"""\documentclass[<main>]{subfiles}
+\graphicspath{{\subfix{../figures/}}}
+\begin{document}
+
+\section{<title>}
+\label{sec:<chapter-slug>:<slug>}
+
+% Section content
+
+\end{document}
+"""
+
 
 # =============================================================================
 # METADATA HELPER
 # =============================================================================
 
 
-def apply_metadata(content: str, metadata: dict | None) -> str:
-    """Replace [PROMPT: ...] placeholders with metadata values if provided."""
+# Every placeholder in one scan: [PROMPT: ...] tokens, and the language
+# option of babel (a single language, as the template has it)
+PLACEHOLDER_PATTERN = re.compile(r"\[PROMPT: ([^\]\n]*)\]|\[([A-Za-z]+)\]\{babel\}")
+
+
+def placeholder_values(metadata: dict | None) -> dict[str, str]:
+    """
+    Map [PROMPT: ...] texts to their metadata values.
+
+    Only the placeholders with a value are included; "babel" holds the
+    language, if any.
+    """
     if not metadata:
-        return content
+        return {}
 
     # Format authors: join with " and " (e.g., "John Doe and Jane Smith")
     authors = metadata.get("authors", ())
+    if isinstance(authors, str):
+        authors = [authors]
     authors_str = " and ".join(authors) if authors else None
 
     # Basic replacements for title page
-    replacements = {
-        "[PROMPT: Book Title]": metadata.get("title"),
-        "[PROMPT: Subtitle or description]": metadata.get("subtitle")
+    values = {
+        "Book Title": metadata.get("title"),
+        "Subtitle or description": metadata.get("subtitle")
         or metadata.get("description"),
-        "[PROMPT: Author name(s)]": authors_str,
+        "Author name(s)": authors_str,
+        "babel": metadata.get("language"),
     }
+    return {key: str(value) for key, value in values.items() if value}
 
-    for placeholder, value in replacements.items():
-        if value:
-            content = content.replace(placeholder, value)
 
-    # Handle language in babel package
-    language = metadata.get("language")
-    if language:
-        content = content.replace("[english]{babel}", f"[{language}]{{babel}}")
+def render_placeholders(content: str, values: dict[str, str]) -> str:
+    """Replace the placeholders that have a value, in a single pass."""
+    def replace(match: re.Match) -> str:
+        if match.group(1) is not None:
+            return values.get(match.group(1), match.group(0))
+        language = values.get("babel")
+        return f"[{language}]{{babel}}" if language else match.group(0)
 
-    return content
+    return PLACEHOLDER_PATTERN.sub(replace, content)
+
+
+def apply_metadata(content: str, metadata: dict | None) -> str:
+    """Replace [PROMPT: ...] placeholders with metadata values if provided."""
+    values = placeholder_values(metadata)
+    if not values:
+        return content
+    return render_placeholders(content, values)
 
 
 # =============================================================================
@@ -362,14 +448,17 @@ def apply_metadata(content: str, metadata: dict | None) -> str:
 
 def scaffold_latex(
     project_root: Path, metadata: dict | None = None, echo=print
-) -> None:
-    """Create LaTeX book skeleton with all necessary files and folders."""
+) -> bool:
+    """Create LaTeX book skeleton with all necessary files and folders.
+
+    Returns False, without touching anything, if latex/ already exists.
+    """
     latex_dir = project_root / "latex"
 
     # Check if latex folder already exists
     if latex_dir.exists():
         echo(f"Error: {latex_dir} already exists. Aborting to prevent overwrite.")
-        return
+        return False
 
     echo(f"Creating LaTeX book skeleton in {latex_dir}")
 
@@ -421,6 +510,7 @@ def scaffold_latex(
     echo("  1. Edit the [PROMPT: ...] placeholders in frontmatter files")
     echo("  2. Add parts and chapters to 200-bodymatter/bodymatter.tex")
     echo("  3. Run 'book compile' to build the PDF")
+    return True
 
 
 def main():
@@ -0,0 +1,271 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Structural lint of the .tex files, to catch simple errors before compiling.
+
+Each file is run through a small tokenizer (comments stripped, verbatim
+environments and \\verb skipped) that checks:
+- braces are balanced
+- every \\begin{env} is closed by a matching \\end{env}
+- every \\subfile{...} points at an existing file
+- every file included with \\subfile starts with
+  \\documentclass[<path to main.tex>]{subfiles}, and that path exists
+
+Files are tokenized in a process pool when there are many. run_compile
+lints the files a target depends on before starting TeX, so a broken tree
+fails in milliseconds instead of after a pdflatex run.
+
+Can be used as:
+1. Module: from latex_lint import lint_files, run_lint
+2. Standalone: uv run latex_lint.py [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_cache import strip_comments
+from project_index import get_project_index
+
+# Below this many files, linting in-process beats starting a pool
+PARALLEL_THRESHOLD = 32
+
+# Environments whose content is not TeX
+VERBATIM_ENVIRONMENTS = {"verbatim", "verbatim*", "Verbatim", "lstlisting", "minted", "comment", "filecontents", "filecontents*"}
+
+TOKEN_PATTERN = re.compile(
+    r"\\verb\*?([^A-Za-z\s*])"             # \verb|...|: the rest is found by delimiter
+    r"|\\(begin|end)\s*\{([^{}\n]*)\}"      # environments
+    r"|\\subfile\s*\{([^{}\n]*)\}"          # subfiles
+    r"|\\documentclass\s*(?:\[([^\]]*)\])?\s*\{([^{}\n]*)\}"
+    r"|\\[^A-Za-z]"                         # escaped characters: \{ \} \\ \% ...
+    r"|\{[^{}\\]*\}"                       # a group without braces or commands inside is balanced
+    r"|[{}]"
+)
+
+
+def scan_file(path: Path) -> dict:
+    """
+    Tokenize one file.
+
+    Returns:
+        {"issues": [[line, message]], "subfiles": [[line, ref]],
+        "documentclass": [line, option, class] or None}
+    """
+    try:
+        text = strip_comments(path.read_text(encoding="utf-8", errors="replace"))
+    except OSError as e:
+        return {"issues": [[1, f"Cannot read file: {e}"]], "subfiles": [], "documentclass": None}
+
+    # Offsets are turned into line numbers only for what is reported
+    issues: list[tuple] = []
+    subfiles = []
+    documentclass = None
+    braces: list[int] = []
+    environments: list[tuple[str, int]] = []
+    # Macro definitions in a preamble may open and close environments separately
+    in_preamble = False
+    skip_to = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        offset = match.start()
+        if offset < skip_to:
+            continue
+        token = match.group(0)
+
+        if token[0] == "{":
+            if len(token) == 1:
+                braces.append(offset)
+        elif token == "}":
+            if braces:
+                braces.pop()
+            else:
+                issues.append((offset, "Unmatched }"))
+        elif match.group(1):
+            end = text.find(match.group(1), match.end())
+            skip_to = len(text) if end < 0 or "\n" in text[match.end():end] else end + 1
+        elif match.group(2) == "begin":
+            name = match.group(3).strip()
+            if name in VERBATIM_ENVIRONMENTS:
+                # Skip to the matching \end; nothing in between is TeX
+                end = re.compile(r"\\end\s*\{" + re.escape(name) + r"\}").search(text, match.end())
+                if end is None:
+                    issues.append((offset, f"\\begin{{{name}}} is never closed"))
+                    break
+                skip_to = end.end()
+            elif name == "document":
+                in_preamble = False
+                environments.append((name, offset))
+            elif not in_preamble:
+                environments.append((name, offset))
+        elif match.group(2) == "end" and not in_preamble:
+            name = match.group(3).strip()
+            if environments and environments[-1][0] == name:
+                environments.pop()
+            elif any(open_name == name for open_name, _ in environments):
+                # Environments opened inside this one were left open
+                while environments[-1][0] != name:
+                    open_name, open_offset = environments.pop()
+                    issues.append((open_offset, f"\\begin{{{open_name}}} is not closed before \\end{{{name}}}", offset))
+                environments.pop()
+            else:
+                issues.append((offset, f"\\end{{{name}}} without \\begin{{{name}}}"))
+        elif match.group(4) is not None:
+            subfiles.append([offset, match.group(4).strip()])
+        elif match.group(6) is not None and documentclass is None:
+            documentclass = [offset, match.group(5), match.group(6).strip()]
+            in_preamble = True
+
+    for offset in braces:
+        issues.append((offset, "Unclosed {"))
+    for name, offset in environments:
+        issues.append((offset, f"\\begin{{{name}}} is never closed"))
+
+    starts = [0] + [match.end() for match in re.finditer("\n", text)]
+
+    def line(offset: int) -> int:
+        return bisect_right(starts, offset)
+
+    issues = sorted(
+        [line(issue[0]), issue[1] + (f" at line {line(issue[2])}" if len(issue) > 2 else "")]
+        for issue in issues
+    )
+    for subfile in subfiles:
+        subfile[0] = line(subfile[0])
+    if documentclass:
+        documentclass[0] = line(documentclass[0])
+    return {"issues": issues, "subfiles": subfiles, "documentclass": documentclass}
+
+
+def _subfile_path(including: Path, ref: str) -> Path:
+    """The file a \\subfile reference names, relative to the including file."""
+    name = ref if ref.endswith(".tex") else ref + ".tex"
+    return Path(os.path.normpath(including.parent / name))
+
+
+def lint_files(latex_dir: Path, paths: list[Path], jobs: int | None = None) -> list[dict]:
+    """
+    Lint .tex files.
+
+    Returns:
+        Issues sorted by file and line, each with "file" (relative to
+        latex_dir where possible), "line" and "message"
+    """
+    paths = [Path(os.path.normpath(path)) for path in paths if path.suffix == ".tex" and path.is_file()]
+    if len(paths) >= PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            scans = dict(zip(paths, pool.map(scan_file, paths, chunksize=8)))
+    else:
+        scans = {path: scan_file(path) for path in paths}
+
+    def rel(path: Path) -> str:
+        try:
+            return path.relative_to(latex_dir).as_posix()
+        except ValueError:
+            return str(path)
+
+    issues = [
+        {"file": rel(path), "line": line, "message": message}
+        for path, scan in scans.items() for line, message in scan["issues"]
+    ]
+
+    main_file = latex_dir / "main.tex"
+    for path, scan in list(scans.items()):
+        for line, ref in scan["subfiles"]:
+            target = _subfile_path(path, ref)
+            if not target.is_file():
+                issues.append({"file": rel(path), "line": line, "message": f"\\subfile{{{ref}}}: {rel(target)} not found"})
+                continue
+            if target not in scans:
+                scans[target] = scan_file(target)
+            documentclass = scans[target]["documentclass"]
+            expected = Path(os.path.relpath(main_file, target.parent)).as_posix()
+            if documentclass is None or documentclass[2] != "subfiles":
+                issues.append({
+                    "file": rel(target),
+                    "line": documentclass[0] if documentclass else 1,
+                    "message": f"Included with \\subfile from {rel(path)} but does not start with \\documentclass[{expected}]{{subfiles}}",
+                })
+            elif not documentclass[1] or not _subfile_path(target, documentclass[1].strip()).is_file():
+                issues.append({
+                    "file": rel(target),
+                    "line": documentclass[0],
+                    "message": f"\\documentclass[{documentclass[1] or ''}]{{subfiles}}: parent document not found (expected {expected})",
+                })
+
+    unique = {(issue["file"], issue["line"], issue["message"]): issue for issue in issues}
+    return [unique[key] for key in sorted(unique)]
+
+
+def format_issue(issue: dict) -> str:
+    """file:line: message, as compilers print it."""
+    return f"{issue['file']}:{issue['line']}: {issue['message']}"
+
+
+def run_lint(
+    latex_dir: Path,
+    as_json: bool = False,
+    jobs: int | None = None,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Lint every .tex file under latex/.
+
+    Args:
+        latex_dir: Path to the latex directory
+        as_json: If True, print the issues as JSON
+        jobs: Number of worker processes for linting many files
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 if no issues were found, otherwise 1
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    files = get_project_index(latex_dir).files
+    issues = lint_files(latex_dir, [latex_dir / rel for rel in files], jobs=jobs)
+
+    if as_json:
+        echo(json.dumps({"files": len(files), "issues": issues}, indent=2))
+        return 1 if issues else 0
+
+    for issue in issues:
+        error_style(format_issue(issue))
+    if issues:
+        error_style(f"{len(issues)} problem(s) in {len({issue['file'] for issue in issues})} of {len(files)} file(s)")
+        return 1
+    success_style(f"No problems in {len(files)} file(s)")
+    return 0
+
+
+def main():
+    """Standalone entry point."""
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Check braces, environments and subfiles without compiling")
+    parser.add_argument("--json", dest="as_json", action="store_true", help="Print the issues as JSON")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Parallel jobs for many files (default: CPU count)")
+    args = parser.parse_args()
+
+    sys.exit(run_lint(latex_dir, as_json=args.as_json, jobs=args.jobs))
+
+
+if __name__ == "__main__":
+    main()
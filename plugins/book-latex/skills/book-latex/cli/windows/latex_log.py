@@ -0,0 +1,295 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Analysis of pdflatex and biber log files.
+
+Besides detecting when another pass is needed, LogParser turns a TeX log
+into structured diagnostics (errors, undefined references and citations,
+overfull/underfull boxes) mapped back to the source file and line, and
+BiberParser does the same for biber's output.
+
+Can be used as:
+1. Module: from latex_log import rerun_reason, biber_requested, parse_log_file
+2. Standalone: uv run latex_log.py build/main.log
+"""
+
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+# Messages that mean another LaTeX pass will change the output
+RERUN_PATTERNS = [
+    (re.compile(r"Rerun to get cross-references right"), "cross-references changed"),
+    (re.compile(r"Rerun to get outlines right"), "PDF outlines changed"),
+    (re.compile(r"Label\(s\) may have changed"), "labels changed"),
+    (re.compile(r"Rerun to get (?:the )?citations correct"), "citations changed"),
+    (re.compile(r"Please rerun LaTeX"), "package requested a rerun"),
+    (re.compile(r"Rerun LaTeX"), "package requested a rerun"),
+]
+
+# Messages from biblatex asking for a biber run
+BIBER_PATTERNS = [
+    re.compile(r"Please \(re\)run Biber"),
+    re.compile(r"Please rerun Biber"),
+]
+
+
+def read_log(log_file: Path) -> str:
+    """Read a TeX log file, returning an empty string if it does not exist."""
+    try:
+        return log_file.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
+def rerun_reason(log_text: str) -> str | None:
+    """Return why the log asks for another LaTeX pass, or None."""
+    for pattern, reason in RERUN_PATTERNS:
+        if pattern.search(log_text):
+            return reason
+    return None
+
+
+def biber_requested(log_text: str) -> bool:
+    """Return True if biblatex asks for biber to be (re)run."""
+    return any(pattern.search(log_text) for pattern in BIBER_PATTERNS)
+
+
+OUTPUT_PATTERN = re.compile(r"Output written on .*?\((\d+) pages?(?:, (\d+) bytes)?\)", re.DOTALL)
+
+
+def output_stats(log_text: str) -> tuple[int | None, int | None]:
+    """Return (pages, bytes) from the "Output written on" line, or Nones.
+
+    XeTeX reports no byte count, so bytes may be None on its own.
+    """
+    match = OUTPUT_PATTERN.search(log_text)
+    if not match:
+        return None, None
+    return int(match.group(1)), int(match.group(2)) if match.group(2) else None
+
+
+# TeX wraps log lines at this many characters (max_print_line)
+MAX_PRINT_LINE = 79
+
+ERROR_PATTERN = re.compile(r"^! (.*)")
+ERROR_LINE_PATTERN = re.compile(r"^l\.(\d+)")
+UNDEFINED_PATTERN = re.compile(
+    r"(?:LaTeX|Package \w+) Warning: (Reference|Citation) [`'\"](.+?)['\"] on page \S+ undefined"
+    r"(?: on input line (\d+))?"
+)
+BOX_PATTERN = re.compile(
+    r"^(Overfull|Underfull) \\([hv]box) \((?:([\d.]+pt) too (?:wide|high)|badness (\d+))\)"
+    r"(?:.*?at lines? (\d+)(?:--(\d+))?)?"
+)
+FILE_PATTERN = re.compile(r'"?((?:[A-Za-z]:)?[^\s()"]*[/\\.][^\s()"]*)')
+SOURCE_SUFFIXES = (".tex", ".ltx")
+
+
+class LogParser:
+    """Incremental parser for pdflatex logs.
+
+    Feed lines with feed() as they are produced (the engine's stdout while
+    it runs, or a .log file); report() returns the diagnostics. File names
+    are tracked with TeX's "(file ... )" nesting and mapped to paths
+    relative to latex_dir. reset() starts over for another pass.
+    """
+
+    def __init__(self, base_dir: Path, latex_dir: Path):
+        self.base_dir = base_dir
+        self.latex_dir = latex_dir
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything fed so far."""
+        self.lines = 0
+        self.stack: list[str | None] = []
+        self.pending = ""
+        self.open_error: dict | None = None
+
+        self.errors: list[dict] = []
+        self.undefined_references: list[dict] = []
+        self.undefined_citations: list[dict] = []
+        self.boxes: list[dict] = []
+        self._seen_undefined: set[tuple] = set()
+
+    def _source(self) -> str | None:
+        """Innermost .tex file on the file stack, relative to latex_dir."""
+        for name in reversed(self.stack):
+            if name and name.endswith(SOURCE_SUFFIXES):
+                path = Path(os.path.normpath(self.base_dir / name))
+                try:
+                    return path.relative_to(self.latex_dir).as_posix()
+                except ValueError:
+                    return path.as_posix()
+        return None
+
+    def _track_files(self, line: str) -> None:
+        """Update the file stack from the parentheses in a log line."""
+        i = 0
+        while i < len(line):
+            char = line[i]
+            if char == "(":
+                match = FILE_PATTERN.match(line, i + 1)
+                if match and (match.group(1).startswith((".", "/")) or os.path.splitext(match.group(1))[1]):
+                    self.stack.append(match.group(1))
+                    i = match.end()
+                    continue
+                self.stack.append(None)
+            elif char == ")" and self.stack:
+                self.stack.pop()
+            i += 1
+
+    def feed(self, line: str) -> None:
+        """Process one line of log output."""
+        line = line.rstrip("\r\n")
+        self.lines += 1
+
+        # Undo TeX's hard wrapping of long lines
+        if len(line) == MAX_PRINT_LINE:
+            self.pending += line
+            return
+        line, self.pending = self.pending + line, ""
+        self._process(line)
+
+    def _process(self, line: str) -> None:
+        if self.open_error is not None:
+            match = ERROR_LINE_PATTERN.match(line)
+            if match:
+                self.open_error["line"] = int(match.group(1))
+                self.open_error = None
+                return
+
+        match = ERROR_PATTERN.match(line)
+        if match:
+            self.open_error = {"file": self._source(), "line": None, "message": match.group(1).strip()}
+            self.errors.append(self.open_error)
+            return
+
+        match = UNDEFINED_PATTERN.search(line)
+        if match:
+            kind, key, line_no = match.groups()
+            entry = {"key": key, "file": self._source(), "line": int(line_no) if line_no else None}
+            seen_key = (kind, key, entry["file"], entry["line"])
+            if seen_key not in self._seen_undefined:
+                self._seen_undefined.add(seen_key)
+                target = self.undefined_references if kind == "Reference" else self.undefined_citations
+                target.append(entry)
+            return
+
+        match = BOX_PATTERN.match(line)
+        if match:
+            kind, box, amount, badness, first, last = match.groups()
+            self.boxes.append({
+                "type": f"{kind.lower()} {box}",
+                "amount": amount if amount else f"badness {badness}",
+                "file": self._source(),
+                "line": int(first) if first else None,
+                "end_line": int(last) if last else None,
+            })
+            return
+
+        self._track_files(line)
+
+    def close(self) -> None:
+        """Flush a pending wrapped line."""
+        if self.pending:
+            line, self.pending = self.pending, ""
+            self._process(line)
+
+    def report(self) -> dict:
+        """Return the collected diagnostics."""
+        self.close()
+        return {
+            "errors": self.errors,
+            "undefined_references": self.undefined_references,
+            "undefined_citations": self.undefined_citations,
+            "boxes": self.boxes,
+        }
+
+
+class BiberParser:
+    """Incremental parser for biber's terminal output."""
+
+    MESSAGE_PATTERN = re.compile(r"^(?:\[\d+\] )?.*?\b(ERROR|WARN) - (.*)")
+    SOURCE_PATTERN = re.compile(r"([^\s,]+?\.bib)(?:_\d+\.utf8)?, line (\d+)")
+
+    def __init__(self, latex_dir: Path):
+        self.latex_dir = latex_dir
+        self.messages: list[dict] = []
+
+    def feed(self, line: str) -> None:
+        """Process one line of biber output."""
+        match = self.MESSAGE_PATTERN.match(line.rstrip())
+        if not match:
+            return
+        level, message = match.groups()
+        entry = {"level": level.lower(), "message": message, "file": None, "line": None}
+        source = self.SOURCE_PATTERN.search(message)
+        if source:
+            entry["file"] = Path(source.group(1)).name
+            entry["line"] = int(source.group(2))
+        self.messages.append(entry)
+
+
+def parse_log_file(log_file: Path, base_dir: Path, latex_dir: Path) -> dict:
+    """Parse a TeX log file line by line into diagnostics."""
+    parser = LogParser(base_dir, latex_dir)
+    try:
+        with open(log_file, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parser.feed(line)
+    except OSError:
+        pass
+    return parser.report()
+
+
+def summarize(diagnostics: dict) -> dict:
+    """Count the entries of each diagnostics category."""
+    counts = {
+        key: len(diagnostics.get(key, []))
+        for key in ("errors", "undefined_references", "undefined_citations", "boxes")
+    }
+    counts["biber"] = len(diagnostics.get("biber", []))
+    return counts
+
+
+def format_summary(diagnostics: dict) -> str:
+    """One-line human readable summary of a diagnostics report."""
+    counts = summarize(diagnostics)
+    return (
+        f"{counts['errors']} error(s), "
+        f"{counts['undefined_references']} undefined reference(s), "
+        f"{counts['undefined_citations']} undefined citation(s), "
+        f"{counts['boxes']} bad box(es)"
+        + (f", {counts['biber']} biber message(s)" if counts["biber"] else "")
+    )
+
+
+def compact_report(diagnostics: dict, max_boxes: int = 20) -> dict:
+    """Shorten a report for terminal output: bad boxes are capped."""
+    report = dict(diagnostics)
+    report["counts"] = summarize(diagnostics)
+    boxes = diagnostics.get("boxes", [])
+    if len(boxes) > max_boxes:
+        report["boxes"] = boxes[:max_boxes]
+        report["boxes_truncated"] = len(boxes) - max_boxes
+    return report
+
+
+def main():
+    """Standalone entry point: print the diagnostics of a log file as JSON."""
+    if len(sys.argv) < 2:
+        print("Usage: uv run latex_log.py <file.log> [latex_dir]")
+        sys.exit(1)
+    log_file = Path(sys.argv[1])
+    latex_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else Path.cwd() / "latex"
+    print(json.dumps(compact_report(parse_log_file(log_file, latex_dir, latex_dir)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Word counts and content statistics of the book, without compiling.
+
+Every numbered .tex file (parts, chapters and sections in 200-bodymatter,
+appendices and their sections in 300-backmatter) is tokenised with
+comments, math, commands and non-text arguments (\\label, \\ref, \\cite,
+\\includegraphics, ...) removed, and its figures, tables, displayed
+equations and citations are counted. The counts are added up along the
+numeric notation, so chapter 2.3 includes its sections and part 2 all of
+its chapters.
+
+Per-file counts are cached in build/metrics-index.json by content hash:
+files whose size and mtime are unchanged are not read, touched files are
+hashed but not tokenised again, and a renamed or renumbered file is found
+by its hash. Changed files are tokenised in a process pool when there are
+many.
+
+Can be used as:
+1. Module: from latex_metrics import count_tex, load_metrics_index, show_metrics
+2. Standalone: uv run latex_metrics.py [TARGET] [--depth N] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_cache import file_digest, strip_comments
+from latex_refs import CITE_PATTERN
+from project_index import get_project_index
+from search_index import load_search_index
+
+INDEX_VERSION = 1
+INDEX_FILENAME = "metrics-index.json"
+
+# Below this many files to tokenise, counting in-process beats starting a pool
+PARALLEL_THRESHOLD = 16
+
+# Levels listed by default: parts/appendix group, then chapters and appendices
+DEFAULT_DEPTH = 2
+
+COUNT_FIELDS = ("words", "figures", "tables", "equations", "citations")
+
+FIGURE_ENVIRONMENTS = {"figure", "figure*", "wrapfigure", "sidewaysfigure", "SCfigure"}
+TABLE_ENVIRONMENTS = {"table", "table*", "wraptable", "sidewaystable", "longtable"}
+EQUATION_ENVIRONMENTS = {
+    "equation", "equation*", "align", "align*", "gather", "gather*", "multline", "multline*",
+    "flalign", "flalign*", "alignat", "alignat*", "eqnarray", "eqnarray*", "displaymath", "math",
+}
+# Environments whose content is not prose
+SKIPPED_ENVIRONMENTS = {"tikzpicture", "lstlisting", "verbatim", "verbatim*", "minted", "comment", "filecontents"}
+
+BEGIN_PATTERN = re.compile(r"\\begin\s*\{([^{}]+)\}")
+DISPLAY_MATH_PATTERN = re.compile(r"\\\[.*?\\\]|\$\$.*?\$\$", re.DOTALL)
+INLINE_MATH_PATTERN = re.compile(r"\\\(.*?\\\)|(?<!\\)\$(?:\\.|[^$\\])+\$", re.DOTALL)
+# Commands whose arguments are keys, paths or settings rather than text
+NON_TEXT_PATTERN = re.compile(
+    r"\\(?:label|[a-zA-Z]*ref|[a-zA-Z]*refrange|[a-zA-Z]*cite[a-zA-Z]*|nocite|index|glsadd"
+    r"|includegraphics|input|include|subfile|subfix|documentclass|usepackage|RequirePackage"
+    r"|bibliography|bibliographystyle|addbibresource|graphicspath|url|hypersetup"
+    r"|setcounter|addtocounter|setlength|addtolength|vspace|hspace|pagestyle|thispagestyle"
+    r"|newcommand|renewcommand|providecommand|newenvironment|renewenvironment"
+    r"|begin|end|color|pagecolor|addcontentsline)\*?"
+    r"(?:\s*\[[^\]]*\])*(?:\s*\{[^{}]*\})?(?:\{[^{}]*\})*"
+)
+HREF_PATTERN = re.compile(r"\\href\s*\{[^{}]*\}")
+COMMAND_PATTERN = re.compile(r"\\(?:[A-Za-z@]+\*?(?:\s*\[[^\]]*\])*|.)")
+WORD_PATTERN = re.compile(r"[^\W_]+(?:['’.-][^\W_]+)*")
+
+
+def _environment_spans(text: str, names: set[str]) -> list[tuple[int, int]]:
+    """(start, end) offsets of the environments named in names, outermost only."""
+    spans = []
+    pos = 0
+    while True:
+        match = BEGIN_PATTERN.search(text, pos)
+        if not match:
+            return spans
+        name = match.group(1).strip()
+        if name not in names:
+            pos = match.end()
+            continue
+        end = re.compile(r"\\end\s*\{" + re.escape(name) + r"\}").search(text, match.end())
+        stop = end.end() if end else len(text)
+        spans.append((match.start(), stop))
+        pos = stop
+
+
+def _remove_spans(text: str, spans: list[tuple[int, int]]) -> str:
+    pieces = []
+    pos = 0
+    for start, end in spans:
+        pieces.append(text[pos:start])
+        pieces.append(" ")
+        pos = end
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+def count_tex(text: str) -> dict[str, int]:
+    """Count the words, figures, tables, displayed equations and citations of LaTeX source."""
+    text = strip_comments(text)
+    text = _remove_spans(text, _environment_spans(text, SKIPPED_ENVIRONMENTS))
+
+    environments = [match.group(1).strip() for match in BEGIN_PATTERN.finditer(text)]
+    citations = sum(
+        1 for match in CITE_PATTERN.finditer(text)
+        for key in match.group(1).split(",") if key.strip()
+    )
+
+    equation_spans = _environment_spans(text, EQUATION_ENVIRONMENTS)
+    text = _remove_spans(text, equation_spans)
+    equations = len(equation_spans) + len(DISPLAY_MATH_PATTERN.findall(text))
+    text = DISPLAY_MATH_PATTERN.sub(" ", text)
+    text = INLINE_MATH_PATTERN.sub(" ", text)
+
+    # \href keeps its link text, so it goes before the \...ref commands
+    text = HREF_PATTERN.sub(" ", text)
+    text = NON_TEXT_PATTERN.sub(" ", text)
+    text = COMMAND_PATTERN.sub(" ", text)
+    text = text.replace("~", " ")
+
+    return {
+        "words": len(WORD_PATTERN.findall(text)),
+        "figures": sum(1 for name in environments if name in FIGURE_ENVIRONMENTS),
+        "tables": sum(1 for name in environments if name in TABLE_ENVIRONMENTS),
+        "equations": equations,
+        "citations": citations,
+    }
+
+
+def count_file(path: Path) -> dict[str, int]:
+    """count_tex of a file; an unreadable file counts as empty."""
+    try:
+        return count_tex(path.read_text(encoding="utf-8", errors="replace"))
+    except OSError:
+        return dict.fromkeys(COUNT_FIELDS, 0)
+
+
+def load_metrics_index(latex_dir: Path, build_dir: Path | None = None, jobs: int | None = None) -> dict[str, dict]:
+    """
+    Return rel -> {"notation", "sha256", "counts", ...} for every numbered .tex file.
+
+    Only files whose content hash is not in the cache are tokenised.
+    """
+    if build_dir is None:
+        build_dir = latex_dir.parent / "build"
+    cache_file = build_dir / INDEX_FILENAME
+    try:
+        cache = json.loads(cache_file.read_text(encoding="utf-8"))
+        if cache.get("version") != INDEX_VERSION or cache.get("latex_dir") != str(latex_dir):
+            cache = None
+    except (OSError, ValueError):
+        cache = None
+    cached = cache["files"] if cache else {}
+    by_hash = {entry["sha256"]: entry["counts"] for entry in cached.values()}
+
+    project = get_project_index(latex_dir, build_dir)
+    files: dict[str, dict] = {}
+    stale: list[str] = []
+    changed = False
+    for rel in project.files:
+        notation = project.notation(latex_dir / rel)
+        if notation is None:
+            continue
+        previous = cached.get(rel)
+        digest = file_digest(latex_dir / rel, previous)
+        if digest["sha256"] is None:
+            continue
+        if digest is not previous:
+            changed = True
+        entry = {**digest, "notation": notation}
+        if digest["sha256"] in by_hash:
+            entry["counts"] = by_hash[digest["sha256"]]
+        else:
+            stale.append(rel)
+        files[rel] = entry
+        changed = changed or previous is None or previous["notation"] != notation
+
+    if stale:
+        paths = [latex_dir / rel for rel in stale]
+        if len(stale) >= PARALLEL_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(count_file, paths, chunksize=8))
+        else:
+            results = [count_file(path) for path in paths]
+        for rel, counts in zip(stale, results):
+            files[rel]["counts"] = counts
+
+    if changed or len(files) != len(cached):
+        try:
+            build_dir.mkdir(parents=True, exist_ok=True)
+            temp = cache_file.with_name(f"{INDEX_FILENAME}.{os.getpid()}.tmp")
+            temp.write_text(json.dumps({"version": INDEX_VERSION, "latex_dir": str(latex_dir), "files": files}), encoding="utf-8")
+            os.replace(temp, cache_file)
+        except OSError:
+            pass  # A read-only build directory only costs a recount next time
+    return files
+
+
+def _notation_key(notation: str) -> tuple:
+    """Sort numbers numerically and put the appendices (A.*) last."""
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part) for part in notation.split("."))
+
+
+def aggregate(files: dict[str, dict]) -> list[dict]:
+    """
+    Add up the per-file counts along the notation.
+
+    Returns:
+        One node per notation and per enclosing level (A for the
+        appendices), in book order, with "notation", "depth", "files",
+        "own" (counts of the node's own file) and "total" (own plus
+        everything below it)
+    """
+    nodes: dict[str, dict] = {}
+    for rel, entry in files.items():
+        parts = entry["notation"].split(".")
+        for depth in range(1, len(parts) + 1):
+            notation = ".".join(parts[:depth])
+            node = nodes.setdefault(notation, {
+                "notation": notation,
+                "depth": depth,
+                "files": [],
+                "own": dict.fromkeys(COUNT_FIELDS, 0),
+                "total": dict.fromkeys(COUNT_FIELDS, 0),
+            })
+            for field in COUNT_FIELDS:
+                node["total"][field] += entry["counts"][field]
+                if depth == len(parts):
+                    node["own"][field] += entry["counts"][field]
+            if depth == len(parts):
+                node["files"].append(rel)
+    return [nodes[notation] for notation in sorted(nodes, key=_notation_key)]
+
+
+def show_metrics(
+    latex_dir: Path,
+    target: str | None = None,
+    depth: int = DEFAULT_DEPTH,
+    as_json: bool = False,
+    jobs: int | None = None,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Print word counts and content statistics by part, chapter and section.
+
+    Args:
+        latex_dir: Path to the latex directory
+        target: Only show this notation and what is below it (2, 2.3, A.1)
+        depth: Deepest level to list (1 parts, 2 chapters, 3 sections),
+            counted below the target
+        as_json: If True, print the nodes and totals as JSON
+        jobs: Number of worker processes for tokenising many files
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 on success, 1 if the target matches nothing
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    files = load_metrics_index(latex_dir, jobs=jobs)
+    nodes = aggregate(files)
+    base = 0
+    if target:
+        target = target.strip().rstrip(".")
+        if target[:1].lower() == "a":
+            target = "A" + target[1:]
+        nodes = [n for n in nodes if n["notation"] == target or n["notation"].startswith(target + ".")]
+        if not nodes:
+            error_style(f"No numbered files match {target}")
+            return 1
+        base = nodes[0]["depth"] - 1
+    nodes = [n for n in nodes if n["depth"] - base <= depth]
+
+    # Top-level nodes already add up everything below them
+    top = min(n["depth"] for n in nodes) if nodes else 1
+    totals = dict.fromkeys(COUNT_FIELDS, 0)
+    for node in nodes:
+        if node["depth"] == top:
+            for field in COUNT_FIELDS:
+                totals[field] += node["total"][field]
+
+    if as_json:
+        echo(json.dumps({"nodes": nodes, "totals": totals}, indent=2))
+        return 0
+
+    # Titles come from the cached search index, which reads only changed files
+    titles = load_search_index(latex_dir)["files"]
+
+    echo(f"{'':<10} {'Words':>8} {'Figures':>8} {'Tables':>8} {'Equations':>10} {'Citations':>10}")
+    echo("-" * 60)
+    for node in nodes:
+        title = next((titles[rel]["title"] for rel in node["files"] if titles.get(rel, {}).get("title")), None)
+        if title is None and node["files"]:
+            title = titles.get(node["files"][0], {}).get("slug")
+        if title is None:
+            title = "Appendices" if node["notation"] == "A" else ""
+        counts = node["total"]
+        indent = "  " * (node["depth"] - top)
+        echo(
+            f"{indent + node['notation']:<10} {counts['words']:>8,} {counts['figures']:>8} {counts['tables']:>8} "
+            f"{counts['equations']:>10} {counts['citations']:>10}  {indent}{title}"
+        )
+    echo("-" * 60)
+    success_style(
+        f"{'Total':<10} {totals['words']:>8,} {totals['figures']:>8} {totals['tables']:>8} "
+        f"{totals['equations']:>10} {totals['citations']:>10}"
+    )
+    return 0
+
+
+def main():
+    """Standalone entry point."""
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Count words, figures, tables, equations and citations")
+    parser.add_argument("target", nargs="?", help="Notation to show (e.g. 2, 2.3, A.1)")
+    parser.add_argument("--depth", "-d", type=int, default=DEFAULT_DEPTH, help=f"Levels to list (default: {DEFAULT_DEPTH})")
+    parser.add_argument("--json", dest="as_json", action="store_true", help="Print the counts as JSON")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Parallel jobs for tokenising (default: CPU count)")
+    args = parser.parse_args()
+
+    sys.exit(show_metrics(latex_dir, target=args.target, depth=args.depth, as_json=args.as_json, jobs=args.jobs))
+
+
+if __name__ == "__main__":
+    main()
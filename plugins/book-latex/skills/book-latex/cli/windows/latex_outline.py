@@ -0,0 +1,168 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Annotated outline of the latex/ tree.
+
+The tree is walked with os.scandir, skipping build directories, hidden
+entries and LaTeX artefacts (.aux, .log, the PDF next to a .tex file,
+...). Every .tex file is annotated with its numeric notation and the
+first \\part, \\chapter or \\section title in it, taken from the cached
+search index so unchanged files are not read again.
+
+outline.md is only rewritten when the outline differs from the one
+recorded in build/outline.json, so calling `book outline` after every
+edit costs one directory walk.
+
+Can be used as:
+1. Module: from latex_outline import build_outline, render_outline, write_outline
+2. Standalone: uv run latex_outline.py [--json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from compile_latex import path_to_numeric_index
+from project_index import SKIP_DIRS, get_project_index
+from search_index import load_search_index
+
+OUTLINE_VERSION = 1
+STATE_FILENAME = "outline.json"
+
+# Files LaTeX, biber and makeindex write next to the sources
+ARTEFACT_SUFFIXES = {
+    ".aux", ".bbl", ".bcf", ".blg", ".fdb_latexmk", ".fls", ".fmt", ".idx", ".ilg",
+    ".ind", ".lof", ".log", ".lot", ".out", ".synctex", ".toc", ".xdv",
+}
+ARTEFACT_ENDINGS = (".run.xml", ".synctex.gz", ".synctex(busy)")
+
+
+def is_artefact(name: str, siblings: set[str]) -> bool:
+    """Whether a file is LaTeX output rather than a source or figure."""
+    if name.endswith(ARTEFACT_ENDINGS) or os.path.splitext(name)[1] in ARTEFACT_SUFFIXES:
+        return True
+    # A PDF next to a .tex file of the same name is its output; other PDFs are figures
+    stem, suffix = os.path.splitext(name)
+    return suffix == ".pdf" and f"{stem}.tex" in siblings
+
+
+def build_outline(latex_dir: Path) -> dict:
+    """
+    Walk latex/ into a tree of {"name", "type", "children"} nodes.
+
+    .tex files also have "notation" and "title" (None where there is none).
+    """
+    index = get_project_index(latex_dir)
+    titles = load_search_index(latex_dir)["files"]
+
+    def walk(directory: Path) -> list[dict]:
+        try:
+            with os.scandir(directory) as scan:
+                entries = list(scan)
+        except OSError:
+            return []
+        names = {entry.name for entry in entries}
+        nodes = []
+        for entry in sorted(entries, key=lambda entry: entry.name.lower()):
+            if entry.name.startswith("."):
+                continue
+            path = Path(entry.path)
+            if entry.is_dir():
+                if entry.name in SKIP_DIRS:
+                    continue
+                nodes.append({"name": entry.name, "type": "dir", "children": walk(path)})
+            elif not is_artefact(entry.name, names):
+                node = {"name": entry.name, "type": "file"}
+                if entry.name.endswith(".tex"):
+                    rel = path.relative_to(latex_dir).as_posix()
+                    node["notation"] = path_to_numeric_index(path, latex_dir, index) if rel in index.key_of else None
+                    node["title"] = titles.get(rel, {}).get("title")
+                nodes.append(node)
+        return nodes
+
+    return {"name": latex_dir.name, "type": "dir", "children": walk(latex_dir)}
+
+
+def render_outline(tree: dict) -> str:
+    """Draw the tree with 📁/📄 markers and the notation and title of .tex files."""
+    lines = [f"📁 {tree['name']}/"]
+
+    def draw(nodes: list[dict], prefix: str) -> None:
+        for i, node in enumerate(nodes):
+            last = i == len(nodes) - 1
+            branch = "└─" if last else "├─"
+            if node["type"] == "dir":
+                lines.append(f"{prefix}{branch}📁 {node['name']}/")
+                draw(node["children"], prefix + ("  " if last else "│ "))
+                continue
+            label = " ".join(filter(None, (node.get("notation"), node.get("title"))))
+            lines.append(f"{prefix}{branch}📄 {node['name']}" + (f"  ({label})" if label else ""))
+
+    draw(tree["children"], "")
+    return "\n".join(lines)
+
+
+def write_outline(latex_dir: Path, output_file: Path, build_dir: Path | None = None) -> bool:
+    """
+    Write the outline to output_file unless it is unchanged.
+
+    Returns:
+        True if the file was (re)written
+    """
+    if build_dir is None:
+        build_dir = latex_dir.parent / "build"
+    text = "# Project Structure\n\n```text\n" + render_outline(build_outline(latex_dir)) + "\n```"
+    fingerprint = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    state_file = build_dir / STATE_FILENAME
+    try:
+        state = json.loads(state_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        state = {}
+    if (
+        state.get("version") == OUTLINE_VERSION
+        and state.get("fingerprint") == fingerprint
+        and state.get("output") == str(output_file)
+        and output_file.exists()
+    ):
+        return False
+
+    output_file.write_text(text, encoding="utf-8")
+    try:
+        build_dir.mkdir(parents=True, exist_ok=True)
+        temp = state_file.with_name(f"{STATE_FILENAME}.{os.getpid()}.tmp")
+        temp.write_text(json.dumps({"version": OUTLINE_VERSION, "fingerprint": fingerprint, "output": str(output_file)}), encoding="utf-8")
+        os.replace(temp, state_file)
+    except OSError:
+        pass  # A read-only build directory only costs a rewrite next time
+    return True
+
+
+def main():
+    """Standalone entry point."""
+    cwd = Path.cwd()
+    latex_dir = cwd / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Write an annotated outline of latex/ to outline.md")
+    parser.add_argument("--json", dest="as_json", action="store_true", help="Print the tree as JSON instead")
+    args = parser.parse_args()
+
+    if args.as_json:
+        print(json.dumps(build_outline(latex_dir), indent=2, ensure_ascii=False))
+    elif write_outline(latex_dir, cwd / "outline.md"):
+        print(f"Outline saved to {cwd / 'outline.md'}")
+    else:
+        print(f"Outline unchanged: {cwd / 'outline.md'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Static index of labels, references and citations, checked without compiling.
+
+Every .tex file under latex/ is scanned for \\label, \\ref-like commands
+(\\ref, \\cref, \\Cref, \\eqref, \\pageref, \\autoref, \\nameref, ...) and
+\\cite-like commands, and the .bib files under latex/ for entry keys. The
+result is cached in build/refs-index.json; later checks only rescan files
+whose size or mtime changed, in a process pool when there are many.
+
+The check reports undefined references and citations, labels defined more
+than once, and orphaned labels that nothing refers to.
+
+Can be used as:
+1. Module: from latex_refs import check_refs, load_refs_index
+2. Standalone: uv run latex_refs.py [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_cache import strip_comments
+from project_index import SKIP_DIRS, get_project_index
+
+INDEX_VERSION = 1
+INDEX_FILENAME = "refs-index.json"
+
+LABEL_PATTERN = re.compile(r"\\label\s*(?:\[[^\]]*\])?\s*\{([^{}]*)\}")
+REF_PATTERN = re.compile(
+    r"\\(ref|cref|Cref|crefrange|Crefrange|eqref|pageref|cpageref|Cpageref|autoref|nameref|vref|Vref|vpageref)\*?"
+    r"\s*\{([^{}]*)\}"
+)
+CITE_PATTERN = re.compile(
+    r"\\(?:[a-zA-Z]*cite[a-zA-Z]*|nocite)\*?"
+    r"\s*(?:\[[^\]]*\]\s*){0,2}\{([^{}]*)\}"
+)
+BIB_ENTRY_PATTERN = re.compile(r"^[ \t]*@\s*([A-Za-z]+)\s*[{(]\s*([^,\s]+)\s*,", re.MULTILINE)
+NON_ENTRY_TYPES = {"string", "comment", "preamble"}
+
+# Below this many changed files, scanning in-process beats starting a pool
+PARALLEL_THRESHOLD = 16
+
+
+def _keys(argument: str) -> list[str]:
+    """Split a comma-separated key list, skipping macro parameters like #1."""
+    return [key.strip() for key in argument.split(",") if key.strip() and "#" not in key]
+
+
+def _line_starts(text: str) -> list[int]:
+    return [0] + [match.end() for match in re.finditer("\n", text)]
+
+
+def _line(starts: list[int], offset: int) -> int:
+    """1-based line number of an offset (binary search over line starts)."""
+    low, high = 0, len(starts)
+    while low + 1 < high:
+        middle = (low + high) // 2
+        if starts[middle] <= offset:
+            low = middle
+        else:
+            high = middle
+    return low + 1
+
+
+def scan_tex_file(path: Path) -> dict:
+    """Labels, references and citations of one .tex file, with line numbers."""
+    try:
+        text = strip_comments(path.read_text(encoding="utf-8", errors="replace"))
+    except OSError:
+        return {"labels": [], "refs": [], "cites": []}
+    starts = _line_starts(text)
+
+    labels = [
+        [key, _line(starts, match.start())]
+        for match in LABEL_PATTERN.finditer(text)
+        for key in _keys(match.group(1))
+    ]
+    refs = [
+        [key, _line(starts, match.start()), match.group(1)]
+        for match in REF_PATTERN.finditer(text)
+        for key in _keys(match.group(2))
+    ]
+    cites = [
+        [key, _line(starts, match.start())]
+        for match in CITE_PATTERN.finditer(text)
+        for key in _keys(match.group(1))
+    ]
+    return {"labels": labels, "refs": refs, "cites": cites}
+
+
+def scan_bib_file(path: Path) -> dict:
+    """Entry keys of one .bib file."""
+    try:
+        text = path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return {"entries": []}
+    return {
+        "entries": [
+            match.group(2) for match in BIB_ENTRY_PATTERN.finditer(text)
+            if match.group(1).lower() not in NON_ENTRY_TYPES
+        ]
+    }
+
+
+def _scan(path: Path) -> dict:
+    return scan_bib_file(path) if path.suffix == ".bib" else scan_tex_file(path)
+
+
+def bib_files(latex_dir: Path) -> list[str]:
+    """The .bib files under latex/, relative to it."""
+    found = []
+    for root, dirs, files in os.walk(latex_dir):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+        for name in files:
+            if name.endswith(".bib"):
+                found.append(Path(root, name).relative_to(latex_dir).as_posix())
+    return sorted(found)
+
+
+def load_refs_index(latex_dir: Path, build_dir: Path | None = None, jobs: int | None = None) -> dict[str, dict]:
+    """
+    Return the per-file scan results of all .tex and .bib files, updating the cache.
+
+    Files whose size and mtime match the cached entry are not read again.
+    """
+    if build_dir is None:
+        build_dir = latex_dir.parent / "build"
+    cache_file = build_dir / INDEX_FILENAME
+    try:
+        cache = json.loads(cache_file.read_text(encoding="utf-8"))
+        if cache.get("version") != INDEX_VERSION or cache.get("latex_dir") != str(latex_dir):
+            cache = None
+    except (OSError, ValueError):
+        cache = None
+    cached = cache["files"] if cache else {}
+
+    rels = get_project_index(latex_dir, build_dir).files + bib_files(latex_dir)
+    files: dict[str, dict] = {}
+    stale: dict[str, tuple[int, int]] = {}
+    for rel in rels:
+        try:
+            stat = (latex_dir / rel).stat()
+        except OSError:
+            continue
+        entry = cached.get(rel)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            files[rel] = entry
+        else:
+            stale[rel] = (stat.st_mtime_ns, stat.st_size)
+
+    if stale:
+        paths = [latex_dir / rel for rel in stale]
+        if len(stale) >= PARALLEL_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(_scan, paths, chunksize=8))
+        else:
+            results = [_scan(path) for path in paths]
+        for (rel, (mtime_ns, size)), result in zip(stale.items(), results):
+            files[rel] = {"mtime_ns": mtime_ns, "size": size, **result}
+
+    if stale or len(files) != len(cached):
+        try:
+            build_dir.mkdir(parents=True, exist_ok=True)
+            temp = cache_file.with_name(f"{INDEX_FILENAME}.{os.getpid()}.tmp")
+            temp.write_text(json.dumps({"version": INDEX_VERSION, "latex_dir": str(latex_dir), "files": files}), encoding="utf-8")
+            os.replace(temp, cache_file)
+        except OSError:
+            pass  # A read-only build directory only costs a rescan next time
+    return files
+
+
+def analyze_refs(files: dict[str, dict]) -> dict:
+    """Find undefined, duplicate and orphaned labels and undefined citations."""
+    labels: dict[str, list[dict]] = {}
+    refs: dict[str, list[dict]] = {}
+    cites: dict[str, list[dict]] = {}
+    entries: set[str] = set()
+
+    for rel, entry in files.items():
+        if rel.endswith(".bib"):
+            entries.update(entry["entries"])
+            continue
+        for key, line in entry["labels"]:
+            labels.setdefault(key, []).append({"file": rel, "line": line})
+        for key, line, command in entry["refs"]:
+            refs.setdefault(key, []).append({"file": rel, "line": line, "command": command})
+        for key, line in entry["cites"]:
+            cites.setdefault(key, []).append({"file": rel, "line": line})
+
+    undefined = [{"key": key, **use} for key, uses in sorted(refs.items()) if key not in labels for use in uses]
+    duplicates = [{"key": key, "definitions": defs} for key, defs in sorted(labels.items()) if len(defs) > 1]
+    orphaned = [{"key": key, **defs[0]} for key, defs in sorted(labels.items()) if key not in refs]
+    # Without any .bib file there is nothing to check citations against
+    undefined_cites = [
+        {"key": key, **use} for key, uses in sorted(cites.items())
+        if entries and key not in entries and key != "*" for use in uses
+    ]
+
+    return {
+        "counts": {
+            "files": sum(1 for rel in files if rel.endswith(".tex")),
+            "labels": len(labels),
+            "references": sum(len(uses) for uses in refs.values()),
+            "citations": sum(len(uses) for uses in cites.values()),
+            "undefined": len(undefined),
+            "duplicates": len(duplicates),
+            "orphaned": len(orphaned),
+            "undefined_citations": len(undefined_cites),
+        },
+        "undefined": undefined,
+        "duplicates": duplicates,
+        "orphaned": orphaned,
+        "undefined_citations": undefined_cites,
+    }
+
+
+def check_refs(
+    latex_dir: Path,
+    as_json: bool = False,
+    show_orphans: bool = True,
+    jobs: int | None = None,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Check the book's cross-references and citations without compiling.
+
+    Args:
+        latex_dir: Path to the latex directory
+        as_json: If True, print the report as JSON
+        show_orphans: If True, list labels that are never referenced
+        jobs: Number of worker processes for rescanning many files
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 if there are no undefined or duplicate labels and no undefined
+        citations, otherwise 1 (orphaned labels are only reported)
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    report = analyze_refs(load_refs_index(latex_dir, jobs=jobs))
+    counts = report["counts"]
+    failed = counts["undefined"] or counts["duplicates"] or counts["undefined_citations"]
+
+    if as_json:
+        echo(json.dumps(report, indent=2))
+        return 1 if failed else 0
+
+    echo(
+        f"{counts['files']} file(s): {counts['labels']} label(s), "
+        f"{counts['references']} reference(s), {counts['citations']} citation(s)"
+    )
+    echo("-" * 50)
+    for item in report["undefined"]:
+        error_style(f"Undefined reference: {item['key']} (\\{item['command']} at {item['file']}:{item['line']})")
+    for item in report["duplicates"]:
+        places = ", ".join(f"{d['file']}:{d['line']}" for d in item["definitions"])
+        error_style(f"Duplicate label: {item['key']} ({places})")
+    for item in report["undefined_citations"]:
+        error_style(f"Undefined citation: {item['key']} ({item['file']}:{item['line']})")
+    if show_orphans:
+        for item in report["orphaned"]:
+            echo(f"Orphaned label: {item['key']} ({item['file']}:{item['line']})")
+
+    if failed:
+        error_style(
+            f"{counts['undefined']} undefined reference(s), {counts['duplicates']} duplicate label(s), "
+            f"{counts['undefined_citations']} undefined citation(s), {counts['orphaned']} orphaned label(s)"
+        )
+        return 1
+    success_style(f"All references resolve ({counts['orphaned']} orphaned label(s))")
+    return 0
+
+
+def main():
+    """Standalone entry point."""
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Check labels, references and citations without compiling")
+    parser.add_argument("--json", dest="as_json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--no-orphans", dest="show_orphans", action="store_false", help="Do not list orphaned labels")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Parallel jobs for rescanning (default: CPU count)")
+    args = parser.parse_args()
+
+    sys.exit(check_refs(latex_dir, as_json=args.as_json, show_orphans=args.show_orphans, jobs=args.jobs))
+
+
+if __name__ == "__main__":
+    main()
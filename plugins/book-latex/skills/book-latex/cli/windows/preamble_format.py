@@ -0,0 +1,136 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Precompiled preamble format for faster pdflatex startup.
+
+The preamble of main.tex (including localsettings.tex) is dumped into a
+format file with mylatexformat. Later runs load it with -fmt instead of
+loading every package again. The format is keyed by the hash of the
+preamble and of the project files it loads (\\input macro files, local
+.sty packages), and rebuilt automatically when one of them changes.
+
+Can be used as:
+1. Module: from preamble_format import ensure_format, format_env
+"""
+
+import hashlib
+import os
+import subprocess
+from pathlib import Path
+
+from build_cache import GRAPHICS_EXTENSIONS, collect_dependencies, file_digest
+
+FORMAT_PREFIX = "preamble-"
+
+
+def format_dir(build_dir: Path) -> Path:
+    """Directory holding precompiled formats."""
+    return build_dir / "fmt"
+
+
+def preamble_hash(latex_dir: Path) -> str:
+    """Hash the main.tex preamble and every project file it loads.
+
+    The files are found with collect_dependencies: localsettings.tex and
+    what the preamble pulls in with \\input or \\usepackage (macro files,
+    local .sty packages). Figures and .bib files are not in the format.
+    """
+    main_file = latex_dir / "main.tex"
+    digest = hashlib.sha256()
+    main_text = main_file.read_text(encoding="utf-8", errors="replace")
+    digest.update(main_text.split(r"\begin{document}", 1)[0].encode("utf-8"))
+    for dep in collect_dependencies(main_file, latex_dir, preamble_only=True):
+        if dep == main_file or dep.suffix.lower() in GRAPHICS_EXTENSIONS + (".bib",):
+            continue
+        digest.update(f"\0{os.path.relpath(dep, latex_dir)}\0{file_digest(dep)['sha256']}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def format_env(build_dir: Path, latex_dir: Path) -> dict:
+    """Environment for compiling with a precompiled format.
+
+    The format directory is added to TEXFORMATS. Paths resolved at dump
+    time are relative to latex/, so it is added to the TeX and bibliography
+    search paths for subfiles compiled from their own folder.
+    """
+    env = os.environ.copy()
+    for var, path in (
+        ("TEXFORMATS", format_dir(build_dir)),
+        ("TEXINPUTS", latex_dir),
+        ("BIBINPUTS", latex_dir),
+    ):
+        # A trailing separator keeps the default search path
+        env[var] = f"{path}{os.pathsep}{env.get(var, '')}"
+    return env
+
+
+def ensure_format(latex_dir: Path, build_dir: Path, echo=print, stdout=None) -> str | None:
+    """
+    Return the name of an up-to-date preamble format, dumping it if needed.
+
+    Args:
+        latex_dir: Path to the latex directory
+        build_dir: Build directory (formats are stored in build/fmt/)
+        echo: Function for normal output
+        stdout: Where to send pdflatex output (None for the terminal)
+
+    Returns:
+        The format name to pass to -fmt, or None if no format could be built
+        (e.g. mylatexformat is not installed). Failures are remembered until
+        the preamble changes so they are not retried on every compile.
+    """
+    if not (latex_dir / "main.tex").exists():
+        return None
+
+    name = FORMAT_PREFIX + preamble_hash(latex_dir)
+    fmt_dir = format_dir(build_dir)
+    fmt_file = fmt_dir / f"{name}.fmt"
+    failed_marker = fmt_dir / f"{name}.failed"
+
+    if fmt_file.exists():
+        return name
+    if failed_marker.exists():
+        return None
+
+    fmt_dir.mkdir(parents=True, exist_ok=True)
+    echo(f"Precompiling preamble: {fmt_file}")
+
+    # Dump under a per-process job name so parallel compiles cannot clash
+    job_name = f"{name}-{os.getpid()}"
+    cmd = [
+        "pdflatex",
+        "-ini",
+        "-interaction=nonstopmode",
+        f"-jobname={job_name}",
+        f"-output-directory={fmt_dir}",
+        "&pdflatex",
+        "mylatexformat.ltx",
+        "main.tex",
+    ]
+    try:
+        result = subprocess.run(cmd, cwd=latex_dir, stdout=stdout, stderr=stdout)
+        return_code = result.returncode
+    except OSError:
+        return_code = -1
+
+    dumped = fmt_dir / f"{job_name}.fmt"
+    if return_code != 0 or not dumped.exists():
+        dumped.unlink(missing_ok=True)
+        failed_marker.write_text(
+            f"Dumping the preamble failed (return code {return_code}); "
+            f"see {job_name}.log. Remove this file to retry.\n",
+            encoding="utf-8"
+        )
+        echo(f"Could not precompile the preamble (see {fmt_dir / (job_name + '.log')}); compiling without it")
+        return None
+
+    os.replace(dumped, fmt_file)
+
+    # Formats for older preambles are no longer needed
+    for old in fmt_dir.glob(f"{FORMAT_PREFIX}*"):
+        if not old.name.startswith(name):
+            old.unlink(missing_ok=True)
+
+    return name
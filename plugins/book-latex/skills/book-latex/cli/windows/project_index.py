@@ -0,0 +1,263 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Persistent index of the .tex files in a book project.
+
+A single scan of latex/ maps numeric targets (3.5.13, A.2), file names and
+name prefixes to paths. The index is stored in the build directory and is
+rebuilt only when the mtime of a scanned directory changes, i.e. when a
+file or folder was added, removed or renamed.
+
+Can be used as:
+1. Module: from project_index import get_project_index
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+
+INDEX_VERSION = 1
+INDEX_FILENAME = "project-index.json"
+
+# Directories that never contain book sources
+SKIP_DIRS = {"build"}
+
+ROMAN_NUMERALS = {'i': 1, 'ii': 2, 'iii': 3, 'iv': 4, 'v': 5, 'vi': 6, 'vii': 7, 'viii': 8, 'ix': 9, 'x': 10}
+
+PART_PATTERN = re.compile(r'^part(\d+)-')
+APPENDIX_PATTERN = re.compile(r'^app(\d+)-')
+SECTION_PATTERN = re.compile(r'^sec(\d+)-')
+CHAPTER_PATTERN = re.compile(r'^ch(\d+)-')
+ROMAN_CHAPTER_PATTERN = re.compile(r'^ch([ivx]+)-')
+
+
+def _number(pattern: re.Pattern, name: str) -> int | None:
+    """Return the number in a partNN-/appNN-/secNN-/chNN- name, or None.
+
+    Mirrors the part{n:02d}-* style globs of the numeric lookup, so 'ch1-x'
+    is not chapter 1 but 'ch100-x' is chapter 100.
+    """
+    match = pattern.match(name)
+    if not match:
+        return None
+    digits = match.group(1)
+    number = int(digits)
+    return number if f"{number:02d}" == digits else None
+
+
+def _chapter_number(name: str) -> tuple[int, int] | None:
+    """Return (number, priority) for a chapter folder; arabic wins over roman."""
+    number = _number(CHAPTER_PATTERN, name)
+    if number is not None:
+        return number, 0
+    match = ROMAN_CHAPTER_PATTERN.match(name)
+    if match and match.group(1) in ROMAN_NUMERALS:
+        return ROMAN_NUMERALS[match.group(1)], 1
+    return None
+
+
+def numeric_key(rel: tuple[str, ...]) -> tuple[tuple, int] | None:
+    """Return the numeric target key of a .tex file and its match priority.
+
+    Keys have the form returned by parse_numeric_target, e.g.
+    ("body", 3, 5, 13) or ("back", 2, 5, 0).
+    """
+    if len(rel) < 3:
+        return None
+    name = rel[-1]
+
+    if rel[0] == "300-backmatter":
+        appendix = _number(APPENDIX_PATTERN, rel[1])
+        if appendix is None or len(rel) != 3:
+            return None
+        if name == f"{rel[1]}.tex":
+            return ("back", appendix, 0, 0), 0
+        section = _number(SECTION_PATTERN, name)
+        return (("back", appendix, section, 0), 0) if section is not None else None
+
+    if rel[0] != "200-bodymatter":
+        return None
+
+    part = _number(PART_PATTERN, rel[1])
+    if part is None:
+        part, rest = 0, rel[1:]
+    else:
+        if len(rel) == 3:
+            return (("body", part, 0, 0), 0) if name == f"part{part:02d}.tex" else None
+        rest = rel[2:]
+
+    if len(rest) != 2:
+        return None
+    chapter = _chapter_number(rest[0])
+    if chapter is None:
+        return None
+    chapter, priority = chapter
+
+    if name == f"{rest[0]}.tex":
+        return ("body", part, chapter, 0), priority
+    section = _number(SECTION_PATTERN, name)
+    return (("body", part, chapter, section), priority) if section is not None else None
+
+
+def key_to_notation(key: tuple) -> str:
+    """Format a numeric target key as dot notation (A.2.5, 3.5.13, 0.5)."""
+    area, num1, num2, num3 = key
+    if area == "back":
+        return f"A.{num1}.{num2}" if num2 else f"A.{num1}"
+    if num3:
+        return f"{num1}.{num2}.{num3}"
+    if num2:
+        return f"{num1}.{num2}"
+    return str(num1)
+
+
+class ProjectIndex:
+    """Numeric target <-> path <-> name map of a project's .tex files."""
+
+    def __init__(self, latex_dir: Path, files: list[str], dirs: dict[str, int]):
+        self.latex_dir = latex_dir
+        self.files = files
+        self.dirs = dirs
+
+        self.by_key: dict[tuple, str] = {}
+        self.key_of: dict[str, tuple] = {}
+        self.by_name: dict[str, list[str]] = {}
+        self.by_prefix: dict[str, list[str]] = {}
+
+        priorities: dict[tuple, int] = {}
+        for rel in files:
+            parts = tuple(rel.split("/"))
+            stem = os.path.normcase(parts[-1][:-len(".tex")])
+            self.by_name.setdefault(stem, []).append(rel)
+            # "ch01-alpha-beta" is found by "ch01" and "ch01-alpha" (name-*.tex)
+            for i, char in enumerate(stem):
+                if char == "-":
+                    self.by_prefix.setdefault(stem[:i], []).append(rel)
+
+            numeric = numeric_key(parts)
+            if numeric is None:
+                continue
+            key, priority = numeric
+            self.key_of[rel] = key
+            if key not in self.by_key or priority < priorities[key]:
+                self.by_key[key] = rel
+                priorities[key] = priority
+
+    @classmethod
+    def scan(cls, latex_dir: Path) -> "ProjectIndex":
+        """Build the index with a single walk of the latex directory."""
+        files = []
+        dirs = {}
+        stack = [latex_dir]
+        while stack:
+            directory = stack.pop()
+            rel_dir = directory.relative_to(latex_dir).as_posix()
+            try:
+                dirs[rel_dir] = directory.stat().st_mtime_ns
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir():
+                    if entry.name not in SKIP_DIRS and not entry.name.startswith("."):
+                        stack.append(Path(entry.path))
+                elif entry.name.endswith(".tex"):
+                    rel = f"{rel_dir}/{entry.name}" if rel_dir != "." else entry.name
+                    files.append(rel)
+        files.sort()
+        return cls(latex_dir, files, dirs)
+
+    def is_fresh(self) -> bool:
+        """Return True if no scanned directory has changed since the scan."""
+        for rel_dir, mtime in self.dirs.items():
+            try:
+                if (self.latex_dir / rel_dir).stat().st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def path(self, rel: str) -> Path:
+        """Absolute path of an indexed file."""
+        return self.latex_dir / rel
+
+    def find_numeric(self, key: tuple) -> Path | None:
+        """Find the file for a numeric target key."""
+        rel = self.by_key.get(key)
+        return self.path(rel) if rel else None
+
+    def find_name(self, name: str) -> list[Path]:
+        """Find files by exact name, falling back to name-* prefix matches."""
+        name = os.path.normcase(name)
+        matches = self.by_name.get(name) or self.by_prefix.get(name, [])
+        return [self.path(rel) for rel in matches]
+
+    def notation(self, path: Path) -> str | None:
+        """Numeric notation of an indexed file, or None."""
+        try:
+            rel = path.relative_to(self.latex_dir).as_posix()
+        except ValueError:
+            return None
+        key = self.key_of.get(rel)
+        return key_to_notation(key) if key else None
+
+    def keys(self) -> list[tuple]:
+        """All numeric target keys in the project."""
+        return list(self.by_key)
+
+    def to_json(self) -> dict:
+        """Serialisable form of the index (derived maps are rebuilt on load)."""
+        return {
+            "version": INDEX_VERSION,
+            "latex_dir": str(self.latex_dir),
+            "files": self.files,
+            "dirs": self.dirs,
+        }
+
+    def save(self, build_dir: Path) -> None:
+        """Persist the index to the build directory."""
+        build_dir.mkdir(parents=True, exist_ok=True)
+        path = build_dir / INDEX_FILENAME
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.to_json()), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, latex_dir: Path, build_dir: Path) -> "ProjectIndex | None":
+        """Load a persisted index, or None if it is missing or for another project."""
+        try:
+            data = json.loads((build_dir / INDEX_FILENAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION or data.get("latex_dir") != str(latex_dir):
+            return None
+        return cls(latex_dir, data["files"], data["dirs"])
+
+
+# Indexes already loaded by this process; a long-running process such as
+# book serve keeps them warm and only checks that they are still fresh
+_loaded: dict[Path, ProjectIndex] = {}
+
+
+def get_project_index(latex_dir: Path, build_dir: Path | None = None) -> ProjectIndex:
+    """Return an up-to-date index, loading it from build/ or rescanning if stale."""
+    if build_dir is None:
+        build_dir = latex_dir.parent / "build"
+
+    index = _loaded.get(latex_dir)
+    if index is not None and index.is_fresh():
+        return index
+
+    index = ProjectIndex.load(latex_dir, build_dir)
+    if index is None or not index.is_fresh():
+        index = ProjectIndex.scan(latex_dir)
+        try:
+            index.save(build_dir)
+        except OSError:
+            pass  # A read-only build directory only costs a rescan next time
+
+    _loaded[latex_dir] = index
+    return index
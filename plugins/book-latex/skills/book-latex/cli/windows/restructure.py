@@ -0,0 +1,604 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Move, swap and renumber parts, chapters, appendices and sections.
+
+Parts (partNN-slug/ with partNN.tex), chapters (chNN-slug/ or, in a part
+with roman chapter numbers, chi-slug/), appendices (appNN-slug/) and
+sections (secNN-slug.tex) are numbered by their position in the folder
+that contains them. An operation describes the new order of every
+affected folder; the plan derived from it renames each moved item and
+its aggregator file, renumbers its siblings (switching between roman and
+arabic chapter numbers where a chapter changes part) and rewrites the
+\\subfile lines of the aggregators to match.
+
+A plan is applied as one batch. Every renamed path is first moved into a
+staging folder and then to its new name, so renames that form a cycle
+(swapping ch02 and ch03) cannot collide. If any step fails, the steps
+already done are undone in reverse order.
+
+Can be used as:
+1. Module: from restructure import plan_move, plan_swap, plan_renumber, apply_plan
+2. Standalone: uv run restructure.py renumber [--dry-run]
+"""
+
+import argparse
+import difflib
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+
+BODYMATTER = "200-bodymatter"
+BACKMATTER = "300-backmatter"
+
+NODE_PATTERNS = {
+    "part": re.compile(r"^part(\d+)-(.+)$"),
+    "chapter": re.compile(r"^ch(\d+|[ivxlc]+)-(.+)$"),
+    "appendix": re.compile(r"^app(\d+)-(.+)$"),
+    "section": re.compile(r"^sec(\d+)-(.+)\.tex$"),
+}
+
+# What each kind of folder contains
+CHILD_KIND = {
+    "bodymatter": "part",
+    "part": "chapter",
+    "chapter": "section",
+    "appendix": "section",
+    "backmatter": "appendix",
+}
+
+SUBFILE_PATTERN = re.compile(r"\\subfile\s*\{([^{}]*)\}")
+# Lines right above a part's \subfile that belong to it and move with it
+ATTACHED_PATTERN = re.compile(r"^\s*\\(?:part|addpart|renewcommand|setcounter)\b")
+# Comment headers right above any node's block ("% Kapittel 2 - Title",
+# "% ============ DEL 1: TITLE ============"); commented-out \subfile
+# lines are not headers
+HEADER_PATTERN = re.compile(r"^\s*%(?!.*\\subfile)")
+# The number in a header: a word, then the number and a separator
+HEADER_NUMBER_PATTERN = re.compile(r"^(\s*%[\s=*-]*[^\W\d_]+\s+)(\d+|[ivxlc]+|[IVXLC]+)(?=\s*[:.-]|\s*$)")
+SUBFILES_CLASS_PATTERN = re.compile(r"(\\documentclass\s*\[)([^\]]*)(\]\s*\{subfiles\})")
+# New \subfile lines go before this line when a folder had none
+ANCHOR_PATTERN = re.compile(r"^\s*(?:\\ifSubfilesClassLoaded|\\end\{document\})")
+
+ROMAN_VALUES = [(100, "c"), (90, "xc"), (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i")]
+
+STAGING_PREFIX = ".restructure-"
+
+
+class RestructureError(Exception):
+    """Raised when an operation is not possible."""
+
+
+def to_roman(number: int) -> str:
+    """Lower-case roman numeral of a positive number."""
+    result = ""
+    for value, numeral in ROMAN_VALUES:
+        while number >= value:
+            result += numeral
+            number -= value
+    return result
+
+
+def from_roman(text: str) -> int | None:
+    """Value of a lower-case roman numeral, or None if it is not one."""
+    values = {numeral: value for value, numeral in ROMAN_VALUES if len(numeral) == 1}
+    total = 0
+    for i, char in enumerate(text):
+        value = values.get(char)
+        if value is None:
+            return None
+        following = values.get(text[i + 1], 0) if i + 1 < len(text) else 0
+        total += -value if value < following else value
+    return total if total and to_roman(total) == text else None
+
+
+class Node:
+    """A numbered part, chapter, appendix or section."""
+
+    def __init__(self, kind: str, path: Path, number: int, slug: str, roman: bool = False):
+        self.kind = kind
+        self.path = path
+        self.number = number
+        self.slug = slug
+        self.roman = roman
+
+    @property
+    def main_file(self) -> Path:
+        """The node's .tex file (its aggregator for folders)."""
+        if self.kind == "section":
+            return self.path
+        return self.path / main_file_name(self.kind, self.path.name, self.number)
+
+    def __repr__(self) -> str:
+        return f"Node({self.kind}, {self.path.name})"
+
+
+def entry_name(kind: str, number: int, slug: str, roman: bool = False) -> str:
+    """Folder or file name of a node at a position."""
+    if kind == "part":
+        return f"part{number:02d}-{slug}"
+    if kind == "chapter":
+        return f"ch{to_roman(number)}-{slug}" if roman else f"ch{number:02d}-{slug}"
+    if kind == "appendix":
+        return f"app{number:02d}-{slug}"
+    return f"sec{number:02d}-{slug}.tex"
+
+
+def main_file_name(kind: str, name: str, number: int) -> str:
+    """Name of the .tex file inside a part, chapter or appendix folder."""
+    return f"part{number:02d}.tex" if kind == "part" else f"{name}.tex"
+
+
+def parse_node(path: Path, kind: str) -> Node | None:
+    """Read a node of the given kind from its name, or None if it does not match."""
+    match = NODE_PATTERNS[kind].match(path.name)
+    if not match:
+        return None
+    digits, slug = match.groups()
+    if digits.isdigit():
+        return Node(kind, path, int(digits), slug)
+    number = from_roman(digits)
+    return Node(kind, path, number, slug, roman=True) if number else None
+
+
+def container_kind(path: Path, latex_dir: Path) -> str | None:
+    """Kind of a folder that holds numbered nodes, or None."""
+    if path == latex_dir / BODYMATTER:
+        return "bodymatter"
+    if path == latex_dir / BACKMATTER:
+        return "backmatter"
+    node = classify(path, latex_dir)
+    return node.kind if node and node.kind != "section" else None
+
+
+def classify(path: Path, latex_dir: Path) -> Node | None:
+    """The node at a path, given where it sits in the book, or None."""
+    kind = container_kind(path.parent, latex_dir) if path.parent != path else None
+    if kind is None:
+        return None
+    child_kind = CHILD_KIND[kind]
+    if (child_kind == "section") != path.is_file():
+        return None
+    return parse_node(path, child_kind)
+
+
+def children(container: Path, latex_dir: Path) -> list[Node]:
+    """Nodes of a folder in their current order."""
+    kind = container_kind(container, latex_dir)
+    if kind is None:
+        raise RestructureError(f"{container.relative_to(latex_dir)} does not hold parts, chapters or sections")
+    nodes = []
+    with os.scandir(container) as entries:
+        for entry in entries:
+            path = Path(entry.path)
+            if entry.name.startswith("."):
+                continue
+            if (CHILD_KIND[kind] == "section") != entry.is_file():
+                continue
+            node = parse_node(path, CHILD_KIND[kind])
+            if node is not None:
+                nodes.append(node)
+    nodes.sort(key=lambda node: (node.number, node.path.name))
+    return nodes
+
+
+def aggregator_path(container: Path, latex_dir: Path) -> Path:
+    """The .tex file that includes a folder's nodes."""
+    kind = container_kind(container, latex_dir)
+    if kind in ("bodymatter", "backmatter"):
+        return container / f"{kind}.tex"
+    return classify(container, latex_dir).main_file
+
+
+def node_of_file(tex_file: Path, latex_dir: Path) -> Node:
+    """The part, chapter, appendix or section a resolved .tex file stands for."""
+    node = classify(tex_file, latex_dir)
+    if node is not None:
+        return node
+    folder = classify(tex_file.parent, latex_dir)
+    if folder is not None and folder.main_file == tex_file:
+        return folder
+    raise RestructureError(f"{tex_file.relative_to(latex_dir)} is not a part, chapter, appendix or section")
+
+
+def container_of_file(tex_file: Path, latex_dir: Path) -> Path:
+    """The folder a .tex file aggregates (bodymatter.tex -> 200-bodymatter/)."""
+    if tex_file.parent in (latex_dir / BODYMATTER, latex_dir / BACKMATTER) and tex_file == aggregator_path(tex_file.parent, latex_dir):
+        return tex_file.parent
+    node = node_of_file(tex_file, latex_dir)
+    if node.kind == "section":
+        raise RestructureError(f"{tex_file.relative_to(latex_dir)} is a section, not a folder of sections")
+    return node.path
+
+
+def uses_roman(container: Path, nodes: list[Node], latex_dir: Path) -> bool:
+    """Whether the chapters of a part are numbered in roman numerals.
+
+    Decided by the chapters already in the part (moved-in chapters take
+    the part's scheme); a part without chapters is roman if it is part 1.
+    """
+    if container_kind(container, latex_dir) != "part":
+        return False
+    own = [node for node in nodes if node.path.parent == container]
+    if own:
+        return sum(node.roman for node in own) * 2 > len(own)
+    return classify(container, latex_dir).number == 1
+
+
+def _find_blocks(aggregator: Path, nodes: dict[Path, Node]) -> tuple[list[str], dict[Path, tuple[int, int, int]]]:
+    """
+    Lines of an aggregator and the block of each node it includes.
+
+    A block is (first line, subfile line, end) with end exclusive. It
+    starts at the comment header lines right above the \\subfile and, for
+    parts, the \\part (and \\renewcommand) lines among them.
+    """
+    try:
+        lines = aggregator.read_text(encoding="utf-8").splitlines(keepends=True)
+    except OSError:
+        return [], {}
+    by_file = {node.main_file: node for node in nodes.values()}
+    blocks = {}
+    previous_end = 0
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("%"):
+            continue
+        match = SUBFILE_PATTERN.search(line)
+        if not match:
+            continue
+        target = (aggregator.parent / match.group(1).strip())
+        if target.suffix != ".tex":
+            target = target.with_name(target.name + ".tex")
+        node = by_file.get(Path(os.path.normpath(target)))
+        if node is None or node.path in blocks:
+            continue
+        start = i
+        while start > previous_end and (
+            HEADER_PATTERN.match(lines[start - 1])
+            or node.kind == "part" and ATTACHED_PATTERN.match(lines[start - 1])
+        ):
+            start -= 1
+        blocks[node.path] = (start, i, i + 1)
+        previous_end = i + 1
+    return lines, blocks
+
+
+def build_plan(latex_dir: Path, layouts: dict[Path, list[Node]]) -> dict:
+    """
+    Derive the renames and aggregator edits that give folders a new order.
+
+    Args:
+        latex_dir: Path to the latex directory
+        layouts: For each affected folder, its nodes in the new order
+            (nodes moved from other folders included, so those folders
+            must be in layouts too)
+
+    Returns:
+        {"renames": [(old, new), ...], "rewrites": [{"old", "path", "before", "after"}, ...]}
+        with new paths as they are after the whole plan is applied
+    """
+    final: dict[Path, Path] = {}
+
+    def relocate(path: Path) -> Path:
+        for ancestor in (path, *path.parents):
+            if ancestor in final:
+                return final[ancestor] / path.relative_to(ancestor)
+        return path
+
+    renames: list[tuple[Path, Path]] = []
+    new_main: dict[Path, Path] = {}
+    # Parents first, so children are renamed inside their parent's new folder
+    for container in sorted(layouts, key=lambda path: len(path.parts)):
+        nodes = layouts[container]
+        target_dir = relocate(container)
+        roman = uses_roman(container, nodes, latex_dir)
+        for position, node in enumerate(nodes, 1):
+            name = entry_name(node.kind, position, node.slug, roman and node.kind == "chapter")
+            implicit = relocate(node.path)
+            new = target_dir / name
+            if new != implicit:
+                renames.append((node.path, new))
+            final[node.path] = new
+            if node.kind == "section":
+                new_main[node.path] = new
+                continue
+            old_file = node.main_file
+            new_file = new / main_file_name(node.kind, name, position)
+            if old_file.exists() and new_file != relocate(old_file):
+                renames.append((old_file, new_file))
+            final[old_file] = new_file
+            new_main[node.path] = new_file
+
+    targets = [new for _, new in renames]
+    if len(set(targets)) != len(targets):
+        raise RestructureError("Two items would get the same name")
+    reverse = {new: old for old, new in final.items()}
+    for old, new in renames:
+        # Where the new name is before the plan runs
+        current = new
+        for ancestor in new.parents:
+            if ancestor in reverse:
+                current = reverse[ancestor] / new.relative_to(ancestor)
+                break
+        if current != old and current not in final and current.exists():
+            raise RestructureError(f"{current.relative_to(latex_dir)} already exists")
+
+    # Blocks of every node in the aggregator it is included from now
+    sources: dict[Path, dict[Path, Node]] = {}
+    for nodes in layouts.values():
+        for node in nodes:
+            sources.setdefault(node.path.parent, {})[node.path] = node
+    parsed: dict[Path, tuple[list[str], dict]] = {}
+    blocks: dict[Path, list[str]] = {}
+    for container, nodes in sources.items():
+        lines, found = _find_blocks(aggregator_path(container, latex_dir), nodes)
+        parsed[container] = (lines, found)
+        for path, (start, subfile_line, end) in found.items():
+            blocks[path] = lines[start:end]
+
+    def render(node: Node, container: Path, position: int) -> list[str]:
+        block = list(blocks[node.path])
+        # Headers keep the number style they were written with
+        for i, header in enumerate(block[:-1]):
+            match = HEADER_NUMBER_PATTERN.match(header) if HEADER_PATTERN.match(header) else None
+            if match:
+                number = match.group(2)
+                if number.isdigit():
+                    new_number = str(position)
+                else:
+                    new_number = to_roman(position) if number.islower() else to_roman(position).upper()
+                block[i] = header[:match.start(2)] + new_number + header[match.end(2):]
+        line = block[-1]
+        match = SUBFILE_PATTERN.search(line)
+        rel = new_main[node.path].relative_to(relocate(container)).as_posix()
+        if not match.group(1).strip().endswith(".tex"):
+            rel = rel[:-len(".tex")]
+        line = line[:match.start(1)] + rel + line[match.end(1):]
+        block[-1] = line if line.endswith("\n") else line + "\n"
+        return block
+
+    rewrites = []
+    for container, nodes in layouts.items():
+        aggregator = aggregator_path(container, latex_dir)
+        lines, found = parsed.get(container) or _find_blocks(aggregator, {})
+        if not lines:
+            continue
+        slots = sorted((start, end) for start, _, end in found.values())
+        new_blocks = [render(node, container, position) for position, node in enumerate(nodes, 1) if node.path in blocks]
+
+        # Blocks fill the old blocks' places in order; extra blocks go after
+        # the last one, so lines between blocks stay where they were
+        out: list[str] = []
+        position = 0
+        for i, (start, end) in enumerate(slots):
+            out += lines[position:start]
+            for block in new_blocks[i:] if i == len(slots) - 1 else new_blocks[i:i + 1]:
+                out += block
+            position = end
+        rest = lines[position:]
+        if not slots and new_blocks:
+            anchor = next((i for i in range(len(rest) - 1, -1, -1) if ANCHOR_PATTERN.match(rest[i])), len(rest))
+            rest[anchor:anchor] = [line for block in new_blocks for line in block]
+        out += rest
+
+        before, after = "".join(lines), "".join(out)
+        if before != after:
+            rewrites.append({"old": aggregator, "path": relocate(aggregator), "before": before, "after": after})
+
+    # Files moved to another depth (a section into an appendix) need a new
+    # path to the main document
+    by_path = {rewrite["path"]: rewrite for rewrite in rewrites}
+    for old, new in renames:
+        if new.suffix != ".tex" or len(new.parts) == len(old.parts):
+            continue
+        rewrite = by_path.get(new)
+        if rewrite is None:
+            try:
+                text = old.read_text(encoding="utf-8")
+            except OSError:
+                continue
+            rewrite = {"old": old, "path": new, "before": text, "after": text}
+
+        def main_path(match: re.Match) -> str:
+            main = os.path.normpath(old.parent / match.group(2))
+            return match.group(1) + Path(os.path.relpath(main, new.parent)).as_posix() + match.group(3)
+
+        rewrite["after"] = SUBFILES_CLASS_PATTERN.sub(main_path, rewrite["after"], count=1)
+        if rewrite["after"] != rewrite["before"] and new not in by_path:
+            rewrites.append(rewrite)
+            by_path[new] = rewrite
+
+    return {"renames": renames, "rewrites": rewrites}
+
+
+def plan_move(latex_dir: Path, source: Path, dest: Path | None = None, position: int | None = None) -> dict:
+    """
+    Plan moving a node to another folder or position.
+
+    Args:
+        latex_dir: Path to the latex directory
+        source: .tex file of the part, chapter, appendix or section to move
+        dest: .tex file of the part, chapter or appendix to move it into
+            (default: where it is now)
+        position: 1-based position in the destination (default: last)
+    """
+    node = node_of_file(source, latex_dir)
+    source_dir = node.path.parent
+    dest_dir = container_of_file(dest, latex_dir) if dest is not None else source_dir
+    if CHILD_KIND[container_kind(dest_dir, latex_dir)] != node.kind:
+        raise RestructureError(f"A {node.kind} cannot be moved into {dest_dir.relative_to(latex_dir)}")
+
+    remaining = [other for other in children(source_dir, latex_dir) if other.path != node.path]
+    target = remaining if dest_dir == source_dir else children(dest_dir, latex_dir)
+    if position is None:
+        position = len(target) + 1
+    if not 1 <= position <= len(target) + 1:
+        raise RestructureError(f"Position must be between 1 and {len(target) + 1}")
+    target.insert(position - 1, node)
+    return build_plan(latex_dir, {source_dir: remaining, dest_dir: target})
+
+
+def plan_swap(latex_dir: Path, first: Path, second: Path) -> dict:
+    """Plan exchanging the positions of two nodes of the same kind."""
+    a = node_of_file(first, latex_dir)
+    b = node_of_file(second, latex_dir)
+    if a.kind != b.kind:
+        raise RestructureError(f"Cannot swap a {a.kind} with a {b.kind}")
+    if a.path == b.path:
+        raise RestructureError("Cannot swap an item with itself")
+
+    layouts = {}
+    for container in dict.fromkeys((a.path.parent, b.path.parent)):
+        layouts[container] = [
+            b if node.path == a.path else a if node.path == b.path else node
+            for node in children(container, latex_dir)
+        ]
+    return build_plan(latex_dir, layouts)
+
+
+def plan_renumber(latex_dir: Path, container: Path | None = None) -> dict:
+    """
+    Plan renumbering a folder's nodes 1, 2, 3... in their current order.
+
+    Without a folder, every part, chapter, appendix and section of the
+    book is renumbered.
+    """
+    if container is not None:
+        return build_plan(latex_dir, {container: children(container, latex_dir)})
+
+    layouts = {}
+    pending = [path for path in (latex_dir / BODYMATTER, latex_dir / BACKMATTER) if path.is_dir()]
+    while pending:
+        folder = pending.pop()
+        layouts[folder] = children(folder, latex_dir)
+        pending.extend(node.path for node in layouts[folder] if node.kind != "section")
+    return build_plan(latex_dir, layouts)
+
+
+def _rel(path: Path, latex_dir: Path) -> str:
+    rel = path.relative_to(latex_dir).as_posix()
+    return rel + "/" if path.suffix != ".tex" else rel
+
+
+def describe_plan(latex_dir: Path, plan: dict, echo=print) -> None:
+    """Print the renames and the changed aggregator lines of a plan."""
+    for old, new in plan["renames"]:
+        echo(f"rename  {_rel(old, latex_dir)} -> {_rel(new, latex_dir)}")
+    for rewrite in plan["rewrites"]:
+        echo(f"update  {_rel(rewrite['path'], latex_dir)}")
+        diff = difflib.unified_diff(
+            rewrite["before"].splitlines(), rewrite["after"].splitlines(), lineterm="", n=0
+        )
+        for line in diff:
+            if line[:1] in "+-" and not line.startswith(("+++", "---")):
+                echo(f"    {line}")
+
+
+def apply_plan(
+    latex_dir: Path,
+    plan: dict,
+    dry_run: bool = False,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Apply a plan as one batch, undoing every step if one fails.
+
+    Args:
+        latex_dir: Path to the latex directory
+        plan: Plan from plan_move, plan_swap or plan_renumber
+        dry_run: If True, only print what would change
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 on success, 1 if the plan could not be applied
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    renames, rewrites = plan["renames"], plan["rewrites"]
+    if not renames and not rewrites:
+        success_style("Nothing to change")
+        return 0
+    describe_plan(latex_dir, plan, echo)
+    if dry_run:
+        echo(f"Dry run: {len(renames)} rename(s), {len(rewrites)} file(s) to update")
+        return 0
+
+    staging = latex_dir / f"{STAGING_PREFIX}{os.getpid()}"
+    undo = []
+    try:
+        staging.mkdir()
+        # Write the new aggregators first, so a full disk fails before any rename
+        staged_text = []
+        for i, rewrite in enumerate(rewrites):
+            temp = staging / f"aggregator-{i}.tex"
+            temp.write_text(rewrite["after"], encoding="utf-8")
+            staged_text.append(temp)
+
+        # Deepest first out of the tree, then shallowest first into place
+        order = sorted(range(len(renames)), key=lambda i: -len(renames[i][0].parts))
+        for i in order:
+            old = renames[i][0]
+            os.rename(old, staging / str(i))
+            undo.append((staging / str(i), old))
+        for i in sorted(range(len(renames)), key=lambda i: len(renames[i][1].parts)):
+            new = renames[i][1]
+            os.rename(staging / str(i), new)
+            undo.append((new, staging / str(i)))
+
+        for temp, rewrite in zip(staged_text, rewrites):
+            os.replace(temp, rewrite["path"])
+            undo.append((rewrite["path"], rewrite["before"]))
+    except OSError as e:
+        error_style(f"Error: {e}")
+        for target, previous in reversed(undo):
+            try:
+                if isinstance(previous, str):
+                    target.write_text(previous, encoding="utf-8")
+                else:
+                    os.rename(target, previous)
+            except OSError as undo_error:
+                error_style(f"Could not undo a step ({target} -> {previous}): {undo_error}")
+        shutil.rmtree(staging, ignore_errors=True)
+        error_style("No changes were made" if not undo else "All changes were undone")
+        return 1
+
+    shutil.rmtree(staging, ignore_errors=True)
+    success_style(f"Renamed {len(renames)} path(s) and updated {len(rewrites)} file(s)")
+    echo("Labels are not changed; run `book refs` to check cross-references.")
+    return 0
+
+
+def main():
+    """Standalone entry point: renumber the whole book."""
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Renumber every part, chapter, appendix and section")
+    parser.add_argument("command", choices=["renumber"])
+    parser.add_argument("--dry-run", "-n", action="store_true", help="Only show what would change")
+    args = parser.parse_args()
+
+    try:
+        plan = plan_renumber(latex_dir)
+    except RestructureError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    sys.exit(apply_plan(latex_dir, plan, dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
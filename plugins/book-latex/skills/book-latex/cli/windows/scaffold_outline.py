@@ -0,0 +1,446 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pyyaml>=6.0",
+# ]
+# ///
+"""
+Create parts, chapters, appendices and sections from an outline file.
+
+The outline is a YAML file:
+
+    parts:
+      - title: Introduction
+        chapters:
+          - title: Key Concepts
+            sections: [Terminology, A Short History]
+      - title: Methods
+        slug: methods          # optional, derived from the title
+        roman: false           # optional, part 1 has roman chapters by default
+        chapters:
+          - Forecasting        # a title alone is enough
+    appendices:
+      - title: Data Sets
+        sections: [Tables]
+
+Nodes are named as the new-part/new-chapter/new-section workflows name
+them (partNN-slug/partNN.tex, chNN-slug/ or chi-slug/ in a roman part,
+secNN-slug.tex, appNN-slug/), numbered after the existing ones, and
+appended to their aggregators' \\subfile lists. A part, chapter or
+appendix whose slug already exists is filled in rather than created
+again, and existing sections are left alone, so the same outline can be
+applied again as it grows.
+
+The new tree is written to a staging folder and renamed into place as one
+batch with the aggregator updates; if a step fails, every step already
+done is undone.
+
+Can be used as:
+1. Module: from scaffold_outline import load_outline, plan_scaffold, write_scaffold
+2. Standalone: uv run scaffold_outline.py OUTLINE [--dry-run]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+
+import yaml
+
+from init_latex import (
+    APPENDIX_TEX,
+    CHAPTER_ENTRY,
+    CHAPTER_TEX,
+    PART_ENTRY,
+    PART_TEX,
+    SECTION_TEX,
+)
+from restructure import (
+    ANCHOR_PATTERN,
+    BACKMATTER,
+    BODYMATTER,
+    SUBFILE_PATTERN,
+    children,
+    describe_plan,
+    entry_name,
+    main_file_name,
+    uses_roman,
+)
+from search_index import normalize
+
+STAGING_PREFIX = ".scaffold-"
+
+SLUG_PATTERN = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+APPENDIX_REF_PATTERN = re.compile(r"^app\d+-")
+APPENDIX_COMMAND_PATTERN = re.compile(r"^\s*\\appendix\b", re.MULTILINE)
+
+# Children of each kind of node in the outline
+CHILD_KEYS = {"part": "chapters", "chapter": "sections", "appendix": "sections", "section": None}
+
+
+class OutlineError(Exception):
+    """Raised when an outline cannot be read or applied."""
+
+
+def slugify(title: str) -> str:
+    """Folder-name slug of a title: "Key Concepts" -> key-concepts."""
+    return "-".join(normalize(title).split())
+
+
+def _node(item, kind: str, where: str) -> dict:
+    """Validate one outline entry into {"title", "slug", "children", ...}."""
+    if isinstance(item, str):
+        item = {"title": item}
+    if not isinstance(item, dict) or not isinstance(item.get("title"), str) or not item["title"].strip():
+        raise OutlineError(f"{where}: expected a title or a mapping with a title")
+
+    title = item["title"].strip()
+    slug = str(item.get("slug") or slugify(title))
+    if not SLUG_PATTERN.match(slug):
+        raise OutlineError(f"{where}: slug {slug!r} must be lower-case letters, digits and dashes")
+    node = {"title": title, "slug": slug, "children": []}
+    if kind == "part" and "roman" in item:
+        node["roman"] = bool(item["roman"])
+
+    child_key = CHILD_KEYS[kind]
+    if child_key:
+        node["children"] = _nodes(item.get(child_key) or [], "section" if child_key == "sections" else "chapter", f"{where} > {title}")
+    return node
+
+
+def _nodes(items, kind: str, where: str) -> list[dict]:
+    if not isinstance(items, list):
+        raise OutlineError(f"{where}: expected a list")
+    nodes = [_node(item, kind, f"{where} #{i + 1}") for i, item in enumerate(items)]
+    slugs = [node["slug"] for node in nodes]
+    duplicates = sorted({slug for slug in slugs if slugs.count(slug) > 1})
+    if duplicates:
+        raise OutlineError(f"{where}: duplicate slug(s) {', '.join(duplicates)}")
+    return nodes
+
+
+def load_outline(path: Path) -> dict:
+    """Read and validate an outline file into {"parts": [...], "appendices": [...]}."""
+    try:
+        data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    except OSError as e:
+        raise OutlineError(f"Cannot read {path}: {e}") from e
+    except yaml.YAMLError as e:
+        raise OutlineError(f"{path} is not valid YAML: {e}") from e
+    if not isinstance(data, dict) or not (data.get("parts") or data.get("appendices")):
+        raise OutlineError(f"{path} must have a 'parts' and/or 'appendices' list")
+    unknown = sorted(set(data) - {"parts", "appendices"})
+    if unknown:
+        raise OutlineError(f"{path}: unknown key(s) {', '.join(unknown)}")
+    return {
+        "parts": _nodes(data.get("parts") or [], "part", "parts"),
+        "appendices": _nodes(data.get("appendices") or [], "appendix", "appendices"),
+    }
+
+
+def _fill(template: str, **values) -> str:
+    """Replace the <field> placeholders of a template (underscores become dashes)."""
+    for key, value in values.items():
+        template = template.replace(f"<{key.replace('_', '-')}>", str(value))
+    return template
+
+
+def _insert(text: str, block: str, separator: str = "\n", child: re.Pattern | None = None, before: re.Pattern = ANCHOR_PATTERN) -> str:
+    """
+    Add an entry to an aggregator.
+
+    It goes after the last \\subfile line (of a child matching the child
+    pattern), otherwise before the first line matching before and the
+    comment lines right above it, otherwise at the end.
+    """
+    lines = text.splitlines(keepends=True)
+    last = first = None
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("%"):
+            continue
+        match = SUBFILE_PATTERN.search(line)
+        if match and (child is None or child.match(match.group(1).strip())):
+            last = i
+        if first is None and before.search(line):
+            first = i
+    if last is not None:
+        lines.insert(last + 1, separator + block)
+    elif first is not None:
+        while first > 0 and lines[first - 1].lstrip().startswith("%"):
+            first -= 1
+        lines.insert(first, block + "\n")
+    else:
+        lines.append(block)
+    return "".join(lines)
+
+
+def plan_scaffold(latex_dir: Path, outline: dict) -> dict:
+    """
+    Work out the files to create and the aggregators to update.
+
+    Returns:
+        {"files": {path: text}, "dirs": [path], "rewrites": [{path, before,
+        after}], "existing": [path]} where existing lists the nodes of the
+        outline that are already there
+    """
+    bodymatter = latex_dir / BODYMATTER
+    backmatter = latex_dir / BACKMATTER
+    if outline["parts"] and not (bodymatter / "bodymatter.tex").is_file():
+        raise OutlineError(f"{bodymatter / 'bodymatter.tex'} not found; run book init first")
+    if outline["appendices"] and not (backmatter / "backmatter.tex").is_file():
+        raise OutlineError(f"{backmatter / 'backmatter.tex'} not found; run book init first")
+
+    files: dict[Path, str] = {}
+    dirs: list[Path] = []
+    originals: dict[Path, str] = {}
+    existing: list[Path] = []
+
+    def read(path: Path) -> str:
+        if path not in files:
+            originals[path] = files[path] = path.read_text(encoding="utf-8")
+        return files[path]
+
+    def existing_children(container: Path) -> list:
+        return children(container, latex_dir) if container.is_dir() else []
+
+    def add_sections(container: Path, aggregator: Path, label_slug: str, sections: list[dict]) -> None:
+        present = existing_children(container)
+        by_slug = {node.slug: node for node in present}
+        number = max((node.number for node in present), default=0)
+        main = Path(os.path.relpath(latex_dir / "main.tex", container)).as_posix()
+        for section in sections:
+            if section["slug"] in by_slug:
+                existing.append(by_slug[section["slug"]].path)
+                continue
+            number += 1
+            name = entry_name("section", number, section["slug"])
+            files[container / name] = _fill(SECTION_TEX, main=main, title=section["title"], slug=section["slug"], chapter_slug=label_slug)
+            read(aggregator)
+            files[aggregator] = _insert(files[aggregator], f"\\subfile{{{name}}}\n", separator="")
+
+    def add_chapters(part_dir: Path, aggregator: Path, roman: bool, chapters: list[dict]) -> None:
+        present = existing_children(part_dir)
+        by_slug = {node.slug: node for node in present}
+        number = max((node.number for node in present), default=0)
+        for chapter in chapters:
+            node = by_slug.get(chapter["slug"])
+            if node is not None:
+                existing.append(node.path)
+                add_sections(node.path, node.main_file, node.slug, chapter["children"])
+                continue
+            number += 1
+            name = entry_name("chapter", number, chapter["slug"], roman)
+            chapter_dir = part_dir / name
+            chapter_file = chapter_dir / main_file_name("chapter", name, number)
+            dirs.extend([chapter_dir, chapter_dir / "figures"])
+            files[chapter_file] = _fill(CHAPTER_TEX, title=chapter["title"], slug=chapter["slug"])
+            read(aggregator)
+            entry = _fill(CHAPTER_ENTRY, number=number, title=chapter["title"], path=f"{name}/{chapter_file.name}")
+            files[aggregator] = _insert(files[aggregator], entry)
+            add_sections(chapter_dir, chapter_file, chapter["slug"], chapter["children"])
+
+    if outline["parts"]:
+        present = existing_children(bodymatter)
+        by_slug = {node.slug: node for node in present}
+        number = max((node.number for node in present), default=0)
+        aggregator = bodymatter / "bodymatter.tex"
+        for part in outline["parts"]:
+            node = by_slug.get(part["slug"])
+            if node is not None:
+                existing.append(node.path)
+                roman = uses_roman(node.path, existing_children(node.path), latex_dir)
+                add_chapters(node.path, node.main_file, roman, part["children"])
+                continue
+            number += 1
+            roman = part.get("roman", number == 1)
+            name = entry_name("part", number, part["slug"])
+            part_dir = bodymatter / name
+            part_file = part_dir / main_file_name("part", name, number)
+            dirs.append(part_dir)
+            files[part_file] = PART_TEX
+            read(aggregator)
+            entry = _fill(
+                PART_ENTRY,
+                number=number,
+                TITLE=part["title"].upper(),
+                title=part["title"],
+                counter="\\setcounter{chapter}{0}\n" if number > 1 else "",
+                numbering="roman" if roman else "arabic",
+                path=f"{name}/{part_file.name}",
+            )
+            files[aggregator] = _insert(files[aggregator], entry)
+            add_chapters(part_dir, part_file, roman, part["children"])
+
+    if outline["appendices"]:
+        present = existing_children(backmatter)
+        by_slug = {node.slug: node for node in present}
+        number = max((node.number for node in present), default=0)
+        aggregator = backmatter / "backmatter.tex"
+        for appendix in outline["appendices"]:
+            node = by_slug.get(appendix["slug"])
+            if node is not None:
+                existing.append(node.path)
+                add_sections(node.path, node.main_file, node.slug, appendix["children"])
+                continue
+            number += 1
+            name = entry_name("appendix", number, appendix["slug"])
+            appendix_dir = backmatter / name
+            appendix_file = appendix_dir / main_file_name("appendix", name, number)
+            dirs.extend([appendix_dir, appendix_dir / "figures"])
+            files[appendix_file] = _fill(APPENDIX_TEX, title=appendix["title"], slug=appendix["slug"])
+            text = read(aggregator)
+            entry = f"\\subfile{{{name}/{appendix_file.name}}}\n"
+            if not APPENDIX_COMMAND_PATTERN.search(text):
+                entry = "\\appendix\n" + entry
+            # Appendices go after the existing ones, otherwise before the bibliography
+            files[aggregator] = _insert(text, entry, separator="", child=APPENDIX_REF_PATTERN, before=SUBFILE_PATTERN)
+            add_sections(appendix_dir, appendix_file, appendix["slug"], appendix["children"])
+
+    # What is left in files once the existing aggregators are taken out is new
+    rewrites = []
+    for path, before in originals.items():
+        after = files.pop(path)
+        if after != before:
+            rewrites.append({"path": path, "before": before, "after": after})
+    return {"files": files, "dirs": dirs, "rewrites": rewrites, "existing": existing}
+
+
+def write_scaffold(
+    latex_dir: Path,
+    plan: dict,
+    dry_run: bool = False,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Create the files of a plan and update the aggregators as one batch.
+
+    Args:
+        latex_dir: Path to the latex directory
+        plan: Plan from plan_scaffold
+        dry_run: If True, only print what would be created and changed
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 on success, 1 if the tree could not be written
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    files, dirs, rewrites = plan["files"], plan["dirs"], plan["rewrites"]
+    for path in plan["existing"]:
+        echo(f"exists  {path.relative_to(latex_dir).as_posix()}")
+    if not files and not dirs:
+        success_style("Nothing to create: every node of the outline already exists")
+        return 0
+    for path in files:
+        echo(f"create  {path.relative_to(latex_dir).as_posix()}")
+    describe_plan(latex_dir, {"renames": [], "rewrites": rewrites}, echo)
+    if dry_run:
+        echo(f"Dry run: {len(files)} file(s) to create, {len(rewrites)} file(s) to update")
+        return 0
+
+    # The topmost new folders and files; everything else is inside them
+    new_dirs = set(dirs)
+    tops = [path for path in [*dirs, *files] if path.parent not in new_dirs]
+
+    staging = latex_dir / f"{STAGING_PREFIX}{os.getpid()}"
+    undo = []
+    try:
+        staging.mkdir()
+        for path in dirs:
+            (staging / path.relative_to(latex_dir)).mkdir(parents=True, exist_ok=True)
+        for path, text in files.items():
+            staged = staging / path.relative_to(latex_dir)
+            staged.parent.mkdir(parents=True, exist_ok=True)
+            staged.write_text(text, encoding="utf-8")
+        staged_text = []
+        for i, rewrite in enumerate(rewrites):
+            temp = staging / f"aggregator-{i}.tex"
+            temp.write_text(rewrite["after"], encoding="utf-8")
+            staged_text.append(temp)
+
+        for path in tops:
+            if path.exists():
+                raise FileExistsError(f"{path} already exists")
+            os.rename(staging / path.relative_to(latex_dir), path)
+            undo.append((path, staging / path.relative_to(latex_dir)))
+        for temp, rewrite in zip(staged_text, rewrites):
+            os.replace(temp, rewrite["path"])
+            undo.append((rewrite["path"], rewrite["before"]))
+    except OSError as e:
+        error_style(f"Error: {e}")
+        for target, previous in reversed(undo):
+            try:
+                if isinstance(previous, str):
+                    target.write_text(previous, encoding="utf-8")
+                else:
+                    os.rename(target, previous)
+            except OSError as undo_error:
+                error_style(f"Could not undo a step ({target} -> {previous}): {undo_error}")
+        shutil.rmtree(staging, ignore_errors=True)
+        error_style("No changes were made" if not undo else "All changes were undone")
+        return 1
+
+    shutil.rmtree(staging, ignore_errors=True)
+    success_style(f"Created {len(files)} file(s) and updated {len(rewrites)} file(s)")
+    return 0
+
+
+def scaffold_outline(
+    latex_dir: Path,
+    outline_file: Path,
+    dry_run: bool = False,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Create the parts, chapters, appendices and sections of an outline file.
+
+    Args:
+        latex_dir: Path to the latex directory
+        outline_file: Path to the outline YAML file
+        dry_run: If True, only print what would be created and changed
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 on success, 1 on error
+    """
+    if error_style is None:
+        error_style = echo
+    try:
+        plan = plan_scaffold(latex_dir, load_outline(outline_file))
+    except OutlineError as e:
+        error_style(f"Error: {e}")
+        return 1
+    return write_scaffold(latex_dir, plan, dry_run=dry_run, echo=echo, success_style=success_style, error_style=error_style)
+
+
+def main():
+    """Standalone entry point."""
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Create parts, chapters and sections from an outline file")
+    parser.add_argument("outline", type=Path, help="Outline YAML file")
+    parser.add_argument("--dry-run", "-n", action="store_true", help="Only show what would be created")
+    args = parser.parse_args()
+
+    sys.exit(scaffold_outline(latex_dir, args.outline, dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
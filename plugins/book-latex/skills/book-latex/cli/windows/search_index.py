@@ -0,0 +1,250 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Fuzzy search over file slugs and chapter/section titles.
+
+Every .tex file of the project index is indexed by its slug (the name
+without the chNN-/secNN-/appNN- prefix) and the first \\part, \\chapter,
+\\section or \\subsection title inside it. Both are split into character
+trigrams, so a query matches despite typos, missing words or accents.
+Titles are cached in build/search-index.json with each file's size and
+mtime, together with the trigram postings, and only changed files are
+read again.
+
+Can be used as:
+1. Module: from search_index import search, confident_match
+2. Standalone: uv run search_index.py QUERY
+"""
+
+import json
+import os
+import re
+import sys
+import unicodedata
+from pathlib import Path
+
+from build_cache import strip_comments
+from project_index import get_project_index
+
+INDEX_VERSION = 1
+INDEX_FILENAME = "search-index.json"
+
+DEFAULT_LIMIT = 10
+
+# Minimum score of a result, and how far ahead of the runner-up a result
+# must be to be taken as the obvious fix for a typo
+MIN_SCORE = 0.2
+CONFIDENT_SCORE = 0.5
+CONFIDENT_MARGIN = 0.15
+
+PREFIX_PATTERN = re.compile(r"^(?:ch(?:\d+|[ivx]+)|sec\d+|app\d+|part\d+|\d+)-?")
+HEADING_PATTERN = re.compile(r"\\(part|chapter|section|subsection)\*?\s*(?:\[[^\]]*\])?\s*\{")
+COMMAND_PATTERN = re.compile(r"\\[A-Za-z@]+\*?")
+
+# Letters that Unicode does not decompose into a base letter and an accent
+TRANSLITERATIONS = str.maketrans({"ø": "o", "æ": "ae", "œ": "oe", "ß": "ss", "ð": "d", "þ": "th", "ł": "l"})
+
+
+def normalize(text: str) -> str:
+    """Lower-case ASCII words separated by single spaces."""
+    text = unicodedata.normalize("NFKD", text.casefold().translate(TRANSLITERATIONS))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.split(r"[^a-z0-9]+", text)).strip()
+
+
+def trigrams(text: str) -> set[str]:
+    """Character trigrams of the words of a normalized text, padded at word boundaries."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def slug_of(rel: str) -> str:
+    """File name without its numbering prefix: ch05-demand-forecasting -> demand-forecasting.
+
+    Aggregators named after their number only (part02.tex) take the slug of
+    their folder (part02-main -> main).
+    """
+    path = Path(rel)
+    slug = PREFIX_PATTERN.sub("", path.stem, count=1)
+    if not slug and path.parent.name:
+        slug = PREFIX_PATTERN.sub("", path.parent.name, count=1)
+    return slug or path.stem
+
+
+def heading_title(path: Path) -> str | None:
+    """The first part/chapter/section title in a file, without TeX markup."""
+    try:
+        text = strip_comments(path.read_text(encoding="utf-8", errors="replace"))
+    except OSError:
+        return None
+    match = HEADING_PATTERN.search(text)
+    if not match:
+        return None
+
+    # Read the balanced {...} argument
+    depth = 1
+    pos = match.end()
+    while pos < len(text) and depth:
+        if text[pos] == "\\":
+            pos += 2
+            continue
+        depth += {"{": 1, "}": -1}.get(text[pos], 0)
+        pos += 1
+    title = COMMAND_PATTERN.sub(" ", text[match.end():pos - 1])
+    return " ".join(title.replace("{", " ").replace("}", " ").replace("~", " ").split()) or None
+
+
+def load_search_index(latex_dir: Path, build_dir: Path | None = None) -> dict:
+    """
+    Return the search index, reading only files changed since it was cached.
+
+    The index has "files" (rel -> slug, title, notation, mtime_ns, size)
+    and "trigrams" (trigram -> list of rels).
+    """
+    if build_dir is None:
+        build_dir = latex_dir.parent / "build"
+    cache_file = build_dir / INDEX_FILENAME
+    try:
+        cache = json.loads(cache_file.read_text(encoding="utf-8"))
+        if cache.get("version") != INDEX_VERSION or cache.get("latex_dir") != str(latex_dir):
+            cache = None
+    except (OSError, ValueError):
+        cache = None
+    cached = cache["files"] if cache else {}
+
+    project = get_project_index(latex_dir, build_dir)
+    files = {}
+    changed = False
+    for rel in project.files:
+        path = latex_dir / rel
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        notation = project.notation(path)
+        entry = cached.get(rel)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size and entry["notation"] == notation:
+            files[rel] = entry
+            continue
+        files[rel] = {
+            "slug": slug_of(rel),
+            "title": heading_title(path),
+            "notation": notation,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+        }
+        changed = True
+
+    if cache and not changed and len(files) == len(cached):
+        return cache
+
+    postings: dict[str, list[str]] = {}
+    for rel, entry in files.items():
+        for gram in trigrams(normalize(entry["slug"])) | trigrams(normalize(entry["title"] or "")):
+            postings.setdefault(gram, []).append(rel)
+
+    index = {"version": INDEX_VERSION, "latex_dir": str(latex_dir), "files": files, "trigrams": postings}
+    try:
+        build_dir.mkdir(parents=True, exist_ok=True)
+        temp = cache_file.with_name(f"{INDEX_FILENAME}.{os.getpid()}.tmp")
+        temp.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(temp, cache_file)
+    except OSError:
+        pass  # A read-only build directory only costs a rebuild next time
+    return index
+
+
+def _similarity(query: str, query_grams: set[str], text: str) -> float:
+    """Trigram overlap of the query with a text, boosted for substring matches."""
+    if not text:
+        return 0.0
+    grams = trigrams(text)
+    shared = len(query_grams & grams)
+    # How much of the query is found, with a small penalty for long texts
+    score = shared / len(query_grams) - 0.1 * (1 - shared / len(grams))
+    if query in text:
+        score += 0.3
+    return max(0.0, min(score, 1.0))
+
+
+def search(latex_dir: Path, query: str, limit: int = DEFAULT_LIMIT) -> list[dict]:
+    """
+    Rank the project's files against a query.
+
+    Returns:
+        Up to limit results (best first) with file, notation, slug, title
+        and score (0-1)
+    """
+    index = load_search_index(latex_dir)
+    files = index["files"]
+    query = normalize(query)
+    query_grams = trigrams(query)
+    if not query_grams:
+        return []
+
+    candidates = set()
+    for gram in query_grams:
+        candidates.update(index["trigrams"].get(gram, ()))
+
+    results = []
+    for rel in candidates:
+        entry = files[rel]
+        score = max(
+            _similarity(query, query_grams, normalize(entry["slug"])),
+            _similarity(query, query_grams, normalize(entry["title"] or "")),
+            _similarity(query, query_grams, normalize(Path(rel).stem)),
+        )
+        if score >= MIN_SCORE:
+            results.append({
+                "file": rel,
+                "notation": entry["notation"],
+                "slug": entry["slug"],
+                "title": entry["title"],
+                "score": round(score, 3),
+            })
+
+    # Ties go to shallower files (chapters before their sections)
+    results.sort(key=lambda r: (-r["score"], r["file"].count("/"), r["file"]))
+    return results[:limit]
+
+
+def confident_match(results: list[dict]) -> dict | None:
+    """The top result if it is clearly the one meant, otherwise None."""
+    if not results or results[0]["score"] < CONFIDENT_SCORE:
+        return None
+    if len(results) > 1 and results[0]["score"] - results[1]["score"] < CONFIDENT_MARGIN:
+        return None
+    return results[0]
+
+
+def format_result(result: dict) -> str:
+    """One line per result: notation, file and title."""
+    notation = result["notation"] or "-"
+    title = f"  \"{result['title']}\"" if result["title"] else ""
+    return f"{notation:<8} {result['file']}{title}"
+
+
+def main():
+    """Standalone entry point."""
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+    if len(sys.argv) < 2:
+        print("Usage: uv run search_index.py QUERY")
+        sys.exit(1)
+
+    results = search(latex_dir, " ".join(sys.argv[1:]))
+    for result in results:
+        print(f"{result['score']:.2f}  {format_result(result)}")
+    sys.exit(0 if results else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,575 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Split compile: build the chapters of a book in parallel and assemble a preview.
+
+Each chapter aggregator is compiled on its own, in build/split/<target>/,
+with the part, chapter and page counters it had in the last full build and
+the labels of every other chapter, both taken from build/main.aux. The
+chapter PDFs are then merged (pdfpages) into build/split/preview.pdf.
+
+Where a chapter may be numbered or paginated differently from a full build
+(an earlier chapter changed length, chapters were added or removed, or it
+refers to labels whose numbers changed) it is marked as stale in the
+preview and in build/split/preview.json, and a full build of main.tex is
+started in the background so the next split compile has fresh offsets.
+
+Can be used as:
+1. Module: from split_compile import split_compile
+2. Standalone: uv run split_compile.py [--bib] [--jobs N]
+"""
+
+import argparse
+import ctypes
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from build_cache import collect_dependencies, strip_comments
+from compile_latex import (
+    DEFAULT_MAX_PASSES,
+    LATEX_ENGINES,
+    compile_worker,
+    get_build_dir,
+    select_engine,
+)
+from latex_log import output_stats, read_log
+from latex_refs import scan_tex_file
+from project_index import ROMAN_NUMERALS, get_project_index, key_to_notation
+
+SPLIT_DIR = "split"
+
+CONTENTSLINE_PATTERN = re.compile(r"\\@writefile\{toc\}\{\\contentsline\s*\{(part|chapter)\}")
+NEWLABEL_PATTERN = re.compile(r"^\\newlabel\{")
+NUMBERLINE_PATTERN = re.compile(r"\\numberline\s*\{([^{}]*)\}")
+ANCHOR_NUMBER_PATTERN = re.compile(r"^(?:part|chapter|appendix)\*?\.(\d+)$")
+CHAPTER_PATTERN = re.compile(r"\\chapter\*?\s*(?:\[[^\]]*\])?\s*\{")
+
+# Written into the chapter setup file and the preview
+TEX_SPECIALS = {"\\": r"\textbackslash{}", "{": r"\{", "}": r"\}", "_": r"\_", "#": r"\#",
+                "%": r"\%", "&": r"\&", "$": r"\$", "^": r"\^{}", "~": r"\~{}"}
+
+# Full build started in the background by this process
+_background: subprocess.Popen | None = None
+
+
+def split_dir(latex_dir: Path) -> Path:
+    """Directory of split builds and the preview."""
+    return get_build_dir(latex_dir) / SPLIT_DIR
+
+
+def brace_groups(text: str, pos: int, count: int) -> tuple[list[str], int]:
+    """Read up to count balanced {...} groups starting at pos (whitespace between them is skipped)."""
+    groups = []
+    while len(groups) < count:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos >= len(text) or text[pos] != "{":
+            break
+        depth = 0
+        start = pos
+        while pos < len(text):
+            char = text[pos]
+            if char == "\\":
+                pos += 2
+                continue
+            if char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+            pos += 1
+        groups.append(text[start + 1:pos])
+        pos += 1
+    return groups, pos
+
+
+def normalize_title(title: str) -> str:
+    """Reduce a title to its letters and digits, so .tex and .aux titles compare equal."""
+    title = re.sub(r"\\numberline\s*\{[^{}]*\}", "", title)
+    title = re.sub(r"\\[A-Za-z@]+\*?", "", title)
+    return re.sub(r"[\W_]", "", title).casefold()
+
+
+def parse_main_aux(aux_file: Path) -> tuple[list[dict], list[tuple[str, str, int | None]]]:
+    """
+    Read the part/chapter TOC entries and the labels of a full build.
+
+    Returns:
+        (entries, labels) where entries are dicts with level, number, title,
+        page and anchor in document order, and labels are (key, line, owner)
+        with owner the index of the chapter entry the label was defined in
+    """
+    entries: list[dict] = []
+    labels: list[tuple[str, str, int | None]] = []
+    owner = None
+    for line in read_log(aux_file).splitlines():
+        match = CONTENTSLINE_PATTERN.match(line)
+        if match:
+            groups, _ = brace_groups(line, match.end(), 3)
+            if len(groups) < 2:
+                continue
+            number = NUMBERLINE_PATTERN.search(groups[0])
+            entries.append({
+                "level": match.group(1),
+                "number": number.group(1).strip() if number else None,
+                "title": groups[0],
+                "page": groups[1].strip(),
+                "anchor": groups[2].strip() if len(groups) > 2 else None,
+            })
+            owner = len(entries) - 1 if match.group(1) == "chapter" else None
+        elif NEWLABEL_PATTERN.match(line):
+            groups, _ = brace_groups(line, len(r"\newlabel"), 2)
+            if len(groups) == 2:
+                labels.append((groups[0], line, owner))
+    return entries, labels
+
+
+def label_values(aux_file: Path) -> dict[str, tuple[str, ...]]:
+    """Map label keys to their number and page in an .aux file."""
+    values = {}
+    for line in read_log(aux_file).splitlines():
+        if NEWLABEL_PATTERN.match(line):
+            groups, _ = brace_groups(line, len(r"\newlabel"), 2)
+            if len(groups) == 2:
+                fields, _ = brace_groups(groups[1], 0, 2)
+                values[groups[0]] = tuple(fields)
+    return values
+
+
+def chapter_title(tex_file: Path) -> str | None:
+    """The title of the first \\chapter in a file."""
+    try:
+        text = strip_comments(tex_file.read_text(encoding="utf-8", errors="replace"))
+    except OSError:
+        return None
+    match = CHAPTER_PATTERN.search(text)
+    if not match:
+        return None
+    groups, _ = brace_groups(text, match.end() - 1, 1)
+    return groups[0] if groups else None
+
+
+def chapter_targets(latex_dir: Path) -> list[tuple[str, Path]]:
+    """All chapter aggregators (N.M and A.N) in book order."""
+    index = get_project_index(latex_dir, get_build_dir(latex_dir))
+    keys = [k for k in index.keys() if (k[0] == "body" and k[2] and not k[3]) or (k[0] == "back" and not k[2])]
+    keys.sort(key=lambda k: (k[0] != "body", k[1:]))
+    return [(key_to_notation(k), index.find_numeric(k)) for k in keys]
+
+
+def match_entries(chapters: list[tuple[str, Path]], entries: list[dict]) -> list[int | None]:
+    """Find each chapter's TOC entry: by title, then in order among the numbered rest."""
+    chapter_entries = [i for i, e in enumerate(entries) if e["level"] == "chapter"]
+    by_title: dict[str, list[int]] = {}
+    for i in chapter_entries:
+        by_title.setdefault(normalize_title(entries[i]["title"]), []).append(i)
+
+    matched: list[int | None] = []
+    used: set[int] = set()
+    for _, tex_file in chapters:
+        title = chapter_title(tex_file)
+        candidates = [i for i in by_title.get(normalize_title(title), []) if i not in used] if title else []
+        matched.append(candidates[0] if candidates else None)
+        if candidates:
+            used.add(candidates[0])
+
+    # Titles that changed since the full build: pair up the rest in order
+    rest = iter(i for i in chapter_entries if i not in used and entries[i]["number"])
+    last = -1
+    for position, entry in enumerate(matched):
+        if entry is None:
+            candidate = next(rest, None)
+            if candidate is not None and candidate > last:
+                matched[position] = candidate
+                used.add(candidate)
+        if matched[position] is not None:
+            last = matched[position]
+    return matched
+
+
+def _part_number(entry: dict, count: int) -> int:
+    """Part counter value of a part TOC entry."""
+    anchor = ANCHOR_NUMBER_PATTERN.match(entry["anchor"] or "")
+    if anchor:
+        return int(anchor.group(1))
+    number = (entry["number"] or "").lower()
+    if number.isdigit():
+        return int(number)
+    return ROMAN_NUMERALS.get(number, count)
+
+
+def chapter_counters(entries: list[dict], entry_index: int) -> dict:
+    """Counters at the start of a chapter: part, chapter, appendix, page."""
+    parts = 0
+    part = 0
+    for entry in entries[:entry_index]:
+        if entry["level"] == "part":
+            parts += 1
+            part = _part_number(entry, parts)
+
+    entry = entries[entry_index]
+    number = entry["number"] or ""
+    counters = {"part": part, "chapter": None, "appendix": False, "page": None}
+    if number.isdigit():
+        counters["chapter"] = int(number)
+    elif len(number) == 1 and number.isalpha():
+        counters["chapter"] = ord(number.upper()) - ord("A") + 1
+        counters["appendix"] = True
+    if entry["page"].isdigit():
+        counters["page"] = int(entry["page"])
+    return counters
+
+
+def chapter_setup(counters: dict | None, label_lines: list[str]) -> str:
+    """TeX code that gives a chapter the labels and counters of the full book."""
+    lines = ["% Generated by book compile --split", r"\makeatletter"]
+    lines += label_lines
+    if counters:
+        body = []
+        if counters["appendix"]:
+            body.append(r"\appendix")
+        if counters["part"]:
+            body.append(rf"\@ifundefined{{c@part}}{{}}{{\setcounter{{part}}{{{counters['part']}}}}}")
+        if counters["chapter"]:
+            body.append(rf"\setcounter{{chapter}}{{{counters['chapter'] - 1}}}")
+        if counters["page"]:
+            body.append(rf"\setcounter{{page}}{{{counters['page']}}}")
+        lines.append(r"\AtBeginDocument{" + "%\n  ".join([""] + body) + "}")
+    lines.append(r"\makeatother")
+    return "\n".join(lines) + "\n"
+
+
+def referenced_keys(tex_file: Path, latex_dir: Path) -> set[str]:
+    """Label keys referenced anywhere in a chapter."""
+    keys = set()
+    for dep in collect_dependencies(tex_file, latex_dir):
+        if dep.suffix == ".tex" and dep.is_file():
+            keys.update(key for key, *_ in scan_tex_file(dep)["refs"])
+    return keys
+
+
+def tex_escape(text: str) -> str:
+    """Escape text for use in a LaTeX document."""
+    return "".join(TEX_SPECIALS.get(char, char) for char in text)
+
+
+def _process_alive(pid: int) -> bool:
+    """Return True if a process with this id is running."""
+    if os.name == "nt":
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def schedule_full_build(latex_dir: Path, bib: bool = False, engine: str = "auto", echo=print) -> bool:
+    """
+    Start a full build of main.tex in the background.
+
+    Output goes to build/split/full-build.log. Returns False if a full build
+    started earlier is still running.
+    """
+    global _background
+    out_dir = split_dir(latex_dir)
+    pid_file = out_dir / "full-build.pid"
+
+    running = _background is not None and _background.poll() is None
+    if not running and _background is None:
+        try:
+            running = _process_alive(int(pid_file.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            running = False
+    if running:
+        echo("A full build is already running in the background")
+        return False
+
+    cmd = [sys.executable, str(Path(__file__).with_name("compile_latex.py")), "main", "--quiet", "--engine", engine]
+    if bib:
+        cmd.append("--bib")
+    if os.name == "nt":
+        detach = {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        detach = {"start_new_session": True}
+
+    log_file = out_dir / "full-build.log"
+    with open(log_file, "w", encoding="utf-8") as log:
+        _background = subprocess.Popen(
+            cmd, cwd=latex_dir.parent, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **detach
+        )
+    pid_file.write_text(str(_background.pid), encoding="utf-8")
+    echo(f"Started a full build of main.tex in the background (log: {log_file})")
+    return True
+
+
+def build_preview(out_dir: Path, chapters: list[dict], engine_name: str, stdout=subprocess.DEVNULL) -> Path | None:
+    """Merge the chapter PDFs into preview.pdf, stamping stale chapters."""
+    lines = [
+        r"\documentclass{article}",
+        r"\usepackage{pdfpages}",
+        r"\usepackage{color}",
+        r"\newcommand{\stale}[1]{\put(12,12){\colorbox{yellow}{\footnotesize\textbf{Stale:} #1}}}",
+        r"\begin{document}",
+    ]
+    for chapter in chapters:
+        if not chapter["pdf"]:
+            continue
+        options = "pages=-"
+        if chapter["stale"]:
+            options += ",picturecommand={\\stale{" + tex_escape("; ".join(chapter["stale"])) + "}}"
+        lines.append(rf"\includepdf[{options}]{{{chapter['pdf']}}}")
+    lines.append(r"\end{document}")
+
+    preview_tex = out_dir / "preview.tex"
+    preview_tex.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    executable = engine_name if engine_name in LATEX_ENGINES else "pdflatex"
+    try:
+        result = subprocess.run(
+            [executable, "-interaction=nonstopmode", preview_tex.name],
+            cwd=out_dir, stdout=stdout, stderr=stdout
+        )
+    except OSError:
+        return None
+    preview_pdf = out_dir / "preview.pdf"
+    return preview_pdf if result.returncode == 0 and preview_pdf.exists() else None
+
+
+def split_compile(
+    latex_dir: Path,
+    jobs: int | None = None,
+    bib: bool = False,
+    force: bool = False,
+    max_passes: int = DEFAULT_MAX_PASSES,
+    engine: str = "auto",
+    full_build: bool = True,
+    lint: bool = True,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Compile every chapter in parallel and assemble a whole-book preview.
+
+    Args:
+        latex_dir: Path to the latex directory
+        jobs: Number of worker processes (default: CPU count)
+        bib: If True, run biber for each chapter (otherwise the
+            bibliography of the last full build is reused)
+        force: If True, compile chapters even when they are up to date
+        max_passes: Maximum number of LaTeX passes per chapter
+        engine: Engine name, or "auto" to choose one
+        full_build: If True, start a full build in the background when the
+            preview has stale chapters
+        lint: If False, do not lint each chapter's sources before compiling
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 if every chapter compiled, otherwise the first non-zero return code
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    build_root = get_build_dir(latex_dir)
+    out_dir = split_dir(latex_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    chapters = chapter_targets(latex_dir)
+    if not chapters:
+        error_style("Error: no chapters found (expected chNN-/appNN- folders)")
+        return 1
+
+    main_aux = build_root / "main.aux"
+    entries, labels = parse_main_aux(main_aux)
+    if not entries:
+        echo("No full build found (build/main.aux); chapters are compiled without book numbering")
+    matched = match_entries(chapters, entries) if entries else [None] * len(chapters)
+
+    selected, engine_reason = select_engine(latex_dir, engine)
+    echo(f"Split compile of {len(chapters)} chapter(s) with {jobs or os.cpu_count()} job(s)")
+    echo(f"Engine: {selected.name} ({engine_reason})")
+    echo("-" * 50)
+
+    # Counters and the labels of every other chapter from the full build
+    main_bbl = build_root / "main.bbl"
+    info = []
+    setups = {}
+    for (notation, tex_file), entry_index in zip(chapters, matched):
+        counters = chapter_counters(entries, entry_index) if entry_index is not None else None
+        external = [line for _, line, owner in labels if owner is None or owner != entry_index]
+        setups[tex_file] = chapter_setup(counters, external)
+
+        chapter_dir = out_dir / notation
+        chapter_dir.mkdir(parents=True, exist_ok=True)
+        if not bib and main_bbl.exists():
+            bbl = chapter_dir / (tex_file.stem + ".bbl")
+            if not bbl.exists() or bbl.stat().st_mtime < main_bbl.stat().st_mtime:
+                shutil.copy2(main_bbl, bbl)
+        info.append({
+            "target": notation,
+            "file": tex_file.relative_to(latex_dir).as_posix(),
+            "entry": entry_index,
+            "counters": counters,
+            "build_dir": chapter_dir,
+            "tex_file": tex_file,
+        })
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                compile_worker, c["tex_file"], latex_dir, c["build_dir"], bib, force, max_passes,
+                False, False, selected.name, setups[c["tex_file"]], lint=lint
+            ): c["tex_file"]
+            for c in info
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[result["tex_file"]] = result
+            style = error_style if result["return_code"] else echo
+            style(f"  {result['status']:<10} {result['tex_file'].relative_to(latex_dir)}")
+
+    # Mark chapters whose numbering or references may differ from a full build
+    old_values = label_values(main_aux)
+    changed_labels = set()
+    for c in info:
+        stem = c["tex_file"].stem
+        result = results[c["tex_file"]]
+        c["status"] = result["status"]
+        pdf = c["build_dir"] / (stem + ".pdf")
+        c["pdf"] = pdf.relative_to(out_dir).as_posix() if result["return_code"] == 0 and pdf.exists() else None
+        c["pages"], _ = output_stats(read_log(c["build_dir"] / (stem + ".log")))
+        c["labels"] = label_values(c["build_dir"] / (stem + ".aux"))
+        changed_labels |= {key for key, value in c["labels"].items() if old_values.get(key) != value}
+
+    removed = [
+        i for i, e in enumerate(entries)
+        if e["level"] == "chapter" and e["number"] and i not in matched
+    ]
+    drift = "no full build yet" if not entries else None
+    for c in info:
+        c["stale"] = []
+        entry_index = c["entry"]
+        if drift:
+            c["stale"].append(drift)
+        if entry_index is None:
+            if entries:
+                c["stale"].append("not in the last full build")
+                drift = drift or f"chapter {c['target']} was added"
+        else:
+            if not drift and any(i < entry_index for i in removed):
+                drift = "a chapter was removed"
+                c["stale"].append(drift)
+            # The pages up to the next part or chapter in the full build
+            following = next((e for e in entries[entry_index + 1:]), None)
+            start = entries[entry_index]["page"]
+            if not drift and c["pages"] and following and start.isdigit() and following["page"].isdigit():
+                span = int(following["page"]) - int(start)
+                if c["pages"] not in (span, span - 1):
+                    drift = f"chapter {c['target']} changed length ({span} to {c['pages']} pages)"
+
+        changed_refs = (referenced_keys(c["tex_file"], latex_dir) & changed_labels) - set(c["labels"])
+        if changed_refs:
+            c["stale"].append("refers to changed labels " + ", ".join(sorted(changed_refs)[:3]))
+
+    preview = build_preview(out_dir, info, selected.name)
+
+    report = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "full_build": str(main_aux) if entries else None,
+        "preview": str(preview) if preview else None,
+        "chapters": [
+            {
+                "target": c["target"],
+                "file": c["file"],
+                "status": c["status"],
+                "pdf": c["pdf"],
+                "start_page": c["counters"]["page"] if c["counters"] else None,
+                "pages": c["pages"],
+                "stale": c["stale"],
+            }
+            for c in info
+        ],
+    }
+    (out_dir / "preview.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    rows = [("Target", "Status", "Start", "Pages", "Stale")]
+    for c in info:
+        rows.append((
+            c["target"],
+            c["status"],
+            str(c["counters"]["page"]) if c["counters"] and c["counters"]["page"] else "-",
+            str(c["pages"]) if c["pages"] is not None else "-",
+            "; ".join(c["stale"]) or "-",
+        ))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    echo("-" * 50)
+    for i, row in enumerate(rows):
+        echo("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+        if i == 0:
+            echo("  ".join("-" * width for width in widths))
+    echo("-" * 50)
+
+    stale = [c for c in info if c["stale"]]
+    if stale and full_build:
+        schedule_full_build(latex_dir, bib=bib, engine=selected.name, echo=echo)
+
+    failed = [results[c["tex_file"]] for c in info if results[c["tex_file"]]["return_code"] != 0]
+    if preview:
+        success_style(f"Preview: {preview} ({len(stale)} stale chapter(s))")
+    else:
+        error_style(f"Could not assemble the preview (see {out_dir / 'preview.log'})")
+    if failed:
+        error_style(f"{len(failed)} of {len(info)} chapter(s) failed")
+        return failed[0]["return_code"]
+    return 0 if preview else 1
+
+
+def main():
+    """Standalone entry point."""
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Compile the chapters in parallel and assemble a whole-book preview")
+    parser.add_argument("--bib", "-b", action="store_true", help="Run biber for each chapter")
+    parser.add_argument("--force", "-f", action="store_true", help="Compile chapters even if they are up to date")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Parallel jobs (default: CPU count)")
+    parser.add_argument("--max-passes", type=int, default=DEFAULT_MAX_PASSES, help="Maximum number of LaTeX passes")
+    parser.add_argument("--engine", "-e", default="auto", help="TeX engine")
+    parser.add_argument("--no-full-build", dest="full_build", action="store_false", help="Do not start a background full build")
+    args = parser.parse_args()
+
+    sys.exit(split_compile(
+        latex_dir, jobs=args.jobs, bib=args.bib, force=args.force, max_passes=args.max_passes,
+        engine=args.engine, full_build=args.full_build
+    ))
+
+
+if __name__ == "__main__":
+    main()
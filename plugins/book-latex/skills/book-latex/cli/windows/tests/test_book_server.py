@@ -0,0 +1,99 @@
+"""book serve runs commands as the client would: its environment and stdin."""
+
+import io
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from book_server import END_MARKER, _read_request, connect, request, socket_path, stop_server, supported
+from init_latex import scaffold_latex
+
+pytestmark = pytest.mark.skipif(not supported(), reason="book serve needs Unix sockets and fork")
+
+CLI_DIR = Path(__file__).resolve().parent.parent
+
+# Leaves a PDF and an empty log like pdflatex
+FAKE_PDFLATEX = """\
+#!{python}
+import sys
+from pathlib import Path
+output = next(arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("-output-directory="))
+Path(output, "main.pdf").write_bytes(b"%PDF")
+Path(output, "main.log").write_text("")
+"""
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def server(tmp_path: Path):
+    """A server for a new project, started without the fake engine on PATH."""
+    assert scaffold_latex(tmp_path, echo=quiet)
+    process = subprocess.Popen(
+        [sys.executable, str(CLI_DIR / "book_cli.py"), "serve"],
+        cwd=tmp_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env={**os.environ, "PATH": os.path.dirname(sys.executable)},
+    )
+    deadline = time.monotonic() + 30
+    while not socket_path(tmp_path).exists():
+        assert process.poll() is None and time.monotonic() < deadline, "the server did not start"
+        time.sleep(0.1)
+    yield tmp_path
+    stop_server(tmp_path)
+    process.wait(timeout=30)
+
+
+def served(project_dir: Path, argv: list[str], env: dict) -> tuple[int, str]:
+    out = io.BytesIO()
+    sock = connect(project_dir)
+    assert sock is not None
+    return_code = request(sock, argv, project_dir, color=False, out=out, env=env)
+    return return_code, out.getvalue().decode("utf-8")
+
+
+def test_served_command_uses_the_client_environment(server: Path, tmp_path: Path):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    engine = bin_dir / "pdflatex"
+    engine.write_text(FAKE_PDFLATEX.format(python=sys.executable), encoding="utf-8")
+    engine.chmod(0o755)
+    argv = ["compile", "main", "--engine", "pdflatex", "--no-fmt", "--no-lint"]
+
+    # The server's own PATH has no pdflatex
+    return_code, output = served(server, argv, {**os.environ, "PATH": os.path.dirname(sys.executable)})
+    assert return_code == 1
+    assert "pdflatex not found" in output
+
+    return_code, output = served(server, argv, {**os.environ, "PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"})
+    assert return_code == 0, output
+    assert (server / "build" / "main.pdf").exists()
+
+
+def test_request_passes_stdin_and_environment():
+    client, server = socket.socketpair()
+    read_end, write_end = os.pipe()
+    os.write(write_end, b"from the client\n")
+    os.close(write_end)
+
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(code=request(
+        client, ["find", "x"], Path("/"), color=False, out=io.BytesIO(), env={"BOOK_TEST": "1"}, stdin=read_end
+    )))
+    thread.start()
+    req = _read_request(server)
+    assert req["env"] == {"BOOK_TEST": "1"}
+    with os.fdopen(req["stdin"], "rb") as stdin:
+        assert stdin.read() == b"from the client\n"
+    server.sendall(END_MARKER + b'{"return_code": 3}\n')
+    server.close()
+    thread.join(timeout=10)
+    os.close(read_end)
+    assert result["code"] == 3
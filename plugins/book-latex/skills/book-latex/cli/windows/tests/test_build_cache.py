@@ -0,0 +1,99 @@
+"""The build cache: dependencies, manifests and the biber fingerprint."""
+
+from pathlib import Path
+
+import pytest
+
+from build_cache import check_manifest, collect_dependencies, write_manifest
+from init_latex import scaffold_latex
+from scaffold_outline import load_outline, plan_scaffold, write_scaffold
+
+OUTLINE = """\
+parts:
+  - title: Methods
+    chapters:
+      - title: Forecasting
+        sections: [Trends]
+"""
+
+OPTIONS = {"engine": "pdflatex"}
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def latex_dir(tmp_path: Path) -> Path:
+    assert scaffold_latex(tmp_path, echo=quiet)
+    latex_dir = tmp_path / "latex"
+    outline = tmp_path / "outline.yaml"
+    outline.write_text(OUTLINE, encoding="utf-8")
+    assert write_scaffold(latex_dir, plan_scaffold(latex_dir, load_outline(outline)), echo=quiet) == 0
+    return latex_dir
+
+
+@pytest.fixture
+def chapter(latex_dir: Path) -> Path:
+    """The template chapter, including figures/plot.png by its bare name."""
+    chapter = latex_dir / "200-bodymatter" / "part01-methods" / "chi-forecasting" / "chi-forecasting.tex"
+    text = chapter.read_text(encoding="utf-8")
+    chapter.write_text(text.replace("% Chapter introduction", "\\includegraphics{plot}"), encoding="utf-8")
+    (chapter.parent / "figures" / "plot.png").write_bytes(b"first version")
+    return chapter
+
+
+def built(tex_file: Path, latex_dir: Path, build_dir: Path) -> None:
+    """Record a successful compile of the target, as run_compile does."""
+    up_to_date, fingerprint = check_manifest(build_dir, tex_file, latex_dir, OPTIONS)
+    build_dir.mkdir(exist_ok=True)
+    (build_dir / f"{tex_file.stem}.pdf").write_bytes(b"%PDF")
+    write_manifest(build_dir, tex_file, latex_dir, OPTIONS, fingerprint)
+
+
+def test_figures_are_found_through_graphicspath(latex_dir: Path, chapter: Path):
+    figure = chapter.parent / "figures" / "plot.png"
+    assert figure in collect_dependencies(chapter, latex_dir)
+    # The whole book reaches the figure through the chapter's subfile
+    assert figure in collect_dependencies(latex_dir / "main.tex", latex_dir)
+
+
+def test_changed_graphicspath_figure_triggers_a_rebuild(latex_dir: Path, chapter: Path, tmp_path: Path):
+    build_dir = tmp_path / "build"
+    built(chapter, latex_dir, build_dir)
+    assert check_manifest(build_dir, chapter, latex_dir, OPTIONS)[0]
+
+    (chapter.parent / "figures" / "plot.png").write_bytes(b"second version")
+    assert not check_manifest(build_dir, chapter, latex_dir, OPTIONS)[0]
+
+
+def test_unchanged_sources_skip_the_build(latex_dir: Path, chapter: Path, tmp_path: Path):
+    build_dir = tmp_path / "build"
+    assert not check_manifest(build_dir, chapter, latex_dir, OPTIONS)[0]
+    built(chapter, latex_dir, build_dir)
+    assert check_manifest(build_dir, chapter, latex_dir, OPTIONS)[0]
+    # Touching a file without changing it is not a change
+    chapter.write_text(chapter.read_text(encoding="utf-8"), encoding="utf-8")
+    assert check_manifest(build_dir, chapter, latex_dir, OPTIONS)[0]
+
+
+@pytest.mark.parametrize("name", [
+    "200-bodymatter/part01-methods/chi-forecasting/chi-forecasting.tex",
+    "200-bodymatter/part01-methods/chi-forecasting/sec01-trends.tex",
+    "localsettings.tex",
+    "bib/references.bib",
+])
+def test_changed_source_or_bib_triggers_a_rebuild(latex_dir: Path, chapter: Path, tmp_path: Path, name: str):
+    build_dir = tmp_path / "build"
+    built(chapter, latex_dir, build_dir)
+    path = latex_dir / name
+    path.write_text(path.read_text(encoding="utf-8") + "% edited\n", encoding="utf-8")
+    assert not check_manifest(build_dir, chapter, latex_dir, OPTIONS)[0]
+
+
+def test_other_options_or_a_missing_pdf_trigger_a_rebuild(latex_dir: Path, chapter: Path, tmp_path: Path):
+    build_dir = tmp_path / "build"
+    built(chapter, latex_dir, build_dir)
+    assert not check_manifest(build_dir, chapter, latex_dir, {"engine": "lualatex"})[0]
+    (build_dir / f"{chapter.stem}.pdf").unlink()
+    assert not check_manifest(build_dir, chapter, latex_dir, OPTIONS)[0]
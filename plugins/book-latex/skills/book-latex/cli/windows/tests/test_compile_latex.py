@@ -0,0 +1,156 @@
+"""Engine backends and passes."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from compile_latex import (
+    ENGINE_NAMES,
+    BuildProcesses,
+    Engine,
+    _build_processes,
+    get_engine,
+    run_passes,
+    run_streamed,
+)
+from latex_log import LogParser
+
+# Prints what pdflatex prints for an undefined command on line 7 of main.tex
+FAKE_ENGINE = "; ".join([
+    'print("(./main.tex")',
+    'print("! Undefined control sequence.")',
+    r'print("l.7 \\foo")',
+    'print("LaTeX Warning: Reference `fig:x\' on page 1 undefined on input line 9.")',
+    'print(")")',
+])
+
+
+# Writes a .bcf that cites the keys listed in main.tex and names refs.bib
+FAKE_BIBLATEX_ENGINE = "; ".join([
+    "from pathlib import Path",
+    "keys = Path('main.tex').read_text()",
+    "Path('../build/main.bcf').write_text("
+    "f'<bcf:citekey>{keys}</bcf:citekey><bcf:datasource type=\"file\">refs.bib</bcf:datasource>')",
+])
+
+# Counts its runs and leaves a .bbl
+FAKE_BIBER = """\
+#!{python}
+from pathlib import Path
+runs = Path({runs!r})
+runs.write_text(str(int(runs.read_text()) + 1) if runs.exists() else "1")
+Path({build_dir!r}, "main.bbl").write_text("")
+"""
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def test_run_passes_parses_each_pass_as_it_streams(tmp_path: Path):
+    latex_dir = tmp_path / "latex"
+    latex_dir.mkdir()
+    tex_file = latex_dir / "main.tex"
+    tex_file.write_text("", encoding="utf-8")
+    build_dir = tmp_path / "build"
+    build_dir.mkdir()
+
+    parser = LogParser(latex_dir, latex_dir)
+    return_code, steps = run_passes(
+        [sys.executable, "-c", FAKE_ENGINE], tex_file, build_dir,
+        echo=quiet, stdout=subprocess.DEVNULL, log_parser=parser
+    )
+
+    assert return_code == 0
+    assert len(steps) == 1
+    report = parser.report()
+    assert report["errors"] == [{"file": "main.tex", "line": 7, "message": "Undefined control sequence."}]
+    assert report["undefined_references"] == [{"key": "fig:x", "file": "main.tex", "line": 9}]
+
+
+def test_engine_without_run_cannot_be_created():
+    class Incomplete(Engine):
+        name = executable = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    for name in ENGINE_NAMES:
+        get_engine(name, Path("."))
+
+
+def test_cancelled_build_starts_no_process(tmp_path: Path):
+    processes = BuildProcesses()
+    processes.terminate()
+    marker = tmp_path / "started"
+    token = _build_processes.set(processes)
+    try:
+        result = run_streamed([sys.executable, "-c", f"open({str(marker)!r}, 'w')"], tmp_path)
+    finally:
+        _build_processes.reset(token)
+    assert result.returncode == 1
+    assert not marker.exists()
+
+
+def test_cancel_stops_running_process_of_its_build_only(tmp_path: Path):
+    sleep = [sys.executable, "-c", "import time; time.sleep(30)"]
+    cancelled, other = BuildProcesses(), BuildProcesses()
+    results = {}
+
+    def run(name, processes):
+        token = _build_processes.set(processes)
+        try:
+            results[name] = run_streamed(sleep if name == "cancelled" else [sys.executable, "-c", ""], tmp_path)
+        finally:
+            _build_processes.reset(token)
+
+    thread = threading.Thread(target=run, args=("cancelled", cancelled))
+    thread.start()
+    time.sleep(0.5)
+    cancelled.terminate()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert results["cancelled"].returncode != 0
+
+    run("other", other)
+    assert results["other"].returncode == 0
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the fake biber is a script with a shebang")
+def test_biber_is_skipped_while_citations_and_bib_are_unchanged(tmp_path: Path, monkeypatch):
+    latex_dir = tmp_path / "latex"
+    latex_dir.mkdir()
+    tex_file = latex_dir / "main.tex"
+    tex_file.write_text("knuth84", encoding="utf-8")
+    bib_file = latex_dir / "refs.bib"
+    bib_file.write_text("@book{knuth84}", encoding="utf-8")
+    build_dir = tmp_path / "build"
+    build_dir.mkdir()
+
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    runs = tmp_path / "biber-runs"
+    biber = bin_dir / "biber"
+    biber.write_text(FAKE_BIBER.format(python=sys.executable, runs=str(runs), build_dir=str(build_dir)), encoding="utf-8")
+    biber.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    def biber_steps() -> list[str]:
+        _, steps = run_passes(
+            [sys.executable, "-c", FAKE_BIBLATEX_ENGINE], tex_file, build_dir,
+            bib=True, echo=quiet, stdout=subprocess.DEVNULL
+        )
+        return [reason for tool, reason, _ in steps if tool == "biber"]
+
+    assert biber_steps() == ["no bibliography yet"]
+    assert biber_steps() == []
+    bib_file.write_text("@book{knuth84, title={TeX}}", encoding="utf-8")
+    assert biber_steps() == ["refs.bib changed"]
+    tex_file.write_text("knuth84,lamport94", encoding="utf-8")
+    assert biber_steps() == ["citation list changed"]
+    assert biber_steps() == []
+    assert runs.read_text() == "3"
@@ -0,0 +1,58 @@
+"""compile_with_status reports how a compile came to its result."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from compile_latex import compile_worker, default_build_dir
+from init_latex import scaffold_latex
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="the fake engine is a script with a shebang")
+
+# Leaves a PDF and an empty log like pdflatex
+FAKE_PDFLATEX = """\
+#!{python}
+import sys
+from pathlib import Path
+output = next(arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("-output-directory="))
+jobname = next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("-jobname=")), "main")
+Path(output, jobname + ".pdf").write_bytes(b"%PDF")
+Path(output, jobname + ".log").write_text("")
+"""
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def latex_dir(tmp_path: Path, monkeypatch) -> Path:
+    assert scaffold_latex(tmp_path, echo=quiet)
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    engine = bin_dir / "pdflatex"
+    engine.write_text(FAKE_PDFLATEX.format(python=sys.executable), encoding="utf-8")
+    engine.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return tmp_path / "latex"
+
+
+def work(latex_dir: Path, **options) -> dict:
+    return compile_worker(
+        latex_dir / "main.tex", latex_dir, default_build_dir(latex_dir), bib=False, force=False, max_passes=1,
+        use_fmt=False, draft=False, engine="pdflatex", lint=False, **options
+    )
+
+
+def test_worker_status_comes_from_the_compile(latex_dir: Path):
+    assert work(latex_dir)["status"] == "built"
+    assert work(latex_dir)["status"] == "up to date"
+    assert work(latex_dir, queue=None)["status"] == "up to date"
+
+
+def test_missing_engine_is_a_failure(latex_dir: Path, monkeypatch):
+    monkeypatch.setenv("PATH", os.path.dirname(sys.executable))
+    result = work(latex_dir)
+    assert (result["return_code"], result["status"]) == (1, "failed")
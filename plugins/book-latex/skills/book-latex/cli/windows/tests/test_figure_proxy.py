@@ -0,0 +1,84 @@
+"""Preview builds read the downscaled figure proxies."""
+
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+from compile_latex import run_compile
+from init_latex import scaffold_latex
+from scaffold_outline import load_outline, plan_scaffold, write_scaffold
+
+PIL = pytest.importorskip("PIL.Image")
+
+OUTLINE = """\
+parts:
+  - title: Methods
+    chapters: [Forecasting]
+"""
+
+# Records how it was run, then leaves a PDF and a log like pdflatex
+FAKE_PDFLATEX = """\
+#!{python}
+import json, os, sys
+from pathlib import Path
+output = next(arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("-output-directory="))
+jobname = next(arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("-jobname="))
+Path({calls!r}).write_text(json.dumps({{"argv": sys.argv, "cwd": os.getcwd(), "texinputs": os.environ.get("TEXINPUTS", "")}}))
+Path(output, jobname + ".pdf").write_bytes(b"%PDF")
+Path(output, jobname + ".log").write_text("")
+"""
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def chapter(tmp_path: Path, monkeypatch) -> Path:
+    """A template chapter that includes a large figures/plot.png by its bare name."""
+    assert scaffold_latex(tmp_path, echo=quiet)
+    latex_dir = tmp_path / "latex"
+    outline = tmp_path / "outline.yaml"
+    outline.write_text(OUTLINE, encoding="utf-8")
+    assert write_scaffold(latex_dir, plan_scaffold(latex_dir, load_outline(outline)), echo=quiet) == 0
+
+    chapter = latex_dir / "200-bodymatter" / "part01-methods" / "chi-forecasting" / "chi-forecasting.tex"
+    text = chapter.read_text(encoding="utf-8")
+    chapter.write_text(text.replace("% Chapter introduction", "\\includegraphics{plot}"), encoding="utf-8")
+    PIL.new("RGB", (3000, 2000), "white").save(chapter.parent / "figures" / "plot.png")
+
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    engine = bin_dir / "pdflatex"
+    engine.write_text(FAKE_PDFLATEX.format(python=sys.executable, calls=str(tmp_path / "calls.json")), encoding="utf-8")
+    engine.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return chapter
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the fake engine is a script with a shebang")
+def test_preview_of_template_chapter_reads_the_proxy(chapter: Path, tmp_path: Path):
+    latex_dir = tmp_path / "latex"
+    assert run_compile(
+        chapter, latex_dir, preview=True, engine="pdflatex", use_fmt=False, queue=None, echo=quiet
+    ) == 0
+
+    call = json.loads((tmp_path / "calls.json").read_text(encoding="utf-8"))
+    assert call["cwd"] == str(chapter.parent)
+    build_dir = tmp_path / "build" / "preview"
+    setup = re.match(r"\\input\{([^}]+)\}", call["argv"][-1])
+    assert setup is not None
+    setup_code = (build_dir / setup.group(1)).read_text(encoding="utf-8")
+
+    # graphicx tries <mirror dir> + <\graphicspath entry> + name + extension;
+    # the template's entry is \subfix{./figures/}
+    mirror_dir = re.search(r"\\def\\bookproxy@dir\{([^}]*)\}", setup_code).group(1)
+    proxy = Path(mirror_dir + "./figures/plot.png")
+    assert proxy.is_file()
+    with PIL.open(proxy) as image:
+        assert max(image.size) < 3000
+    assert call["texinputs"].startswith(str(build_dir / "figures"))
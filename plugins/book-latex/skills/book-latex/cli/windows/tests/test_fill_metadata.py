@@ -0,0 +1,88 @@
+"""book fill: config.yaml applied to the placeholders of an existing project."""
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+from fill_metadata import CONFIG_FILENAME, ConfigError, fill_file, fill_project, load_config, write_config
+from init_latex import render_placeholders, scaffold_latex
+
+FRONTPAGE = Path("100-frontmatter") / "100-frontpage.tex"
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def project_root(tmp_path: Path) -> Path:
+    assert scaffold_latex(tmp_path, echo=quiet)
+    assert write_config(tmp_path, {})
+    return tmp_path
+
+
+def configure(project_root: Path, **metadata) -> None:
+    config_file = project_root / CONFIG_FILENAME
+    config = yaml.safe_load(config_file.read_text(encoding="utf-8"))
+    config_file.write_text(yaml.safe_dump({**config, **metadata}), encoding="utf-8")
+
+
+def test_placeholders_are_rendered_in_one_pass():
+    values = {"Book Title": "[PROMPT: Subtitle or description]", "Subtitle or description": "Subtitle", "babel": "norsk"}
+    content = "[PROMPT: Book Title] / [PROMPT: Subtitle or description] / [PROMPT: Other] / \\usepackage[english]{babel}"
+    # A value that looks like a placeholder is not rendered again
+    assert render_placeholders(content, values) == (
+        "[PROMPT: Subtitle or description] / Subtitle / [PROMPT: Other] / \\usepackage[norsk]{babel}"
+    )
+
+
+def test_fill_applies_the_config(project_root: Path):
+    latex_dir = project_root / "latex"
+    configure(project_root, title="Forecasting", authors=["Ada Lovelace", "Alan Turing"], language="norsk")
+    untouched = latex_dir / "300-backmatter" / "110-index.tex"
+    mtime_ns = untouched.stat().st_mtime_ns
+
+    output = []
+    assert fill_project(project_root, echo=output.append) == 0
+    frontpage = (latex_dir / FRONTPAGE).read_text(encoding="utf-8")
+    assert "{\\LARGE\\bfseries Forecasting\\par}" in frontpage
+    assert "Ada Lovelace and Alan Turing" in frontpage
+    # The subtitle has no value yet
+    assert "[PROMPT: Subtitle or description]" in frontpage
+    assert any("[norsk]{babel}" in path.read_text(encoding="utf-8") for path in latex_dir.rglob("*.tex"))
+    assert f"  Updated: latex/{FRONTPAGE.as_posix()}" in output
+    assert untouched.stat().st_mtime_ns == mtime_ns
+
+    output.clear()
+    assert fill_project(project_root, echo=output.append) == 0
+    assert output[-1].startswith("Nothing to fill")
+
+
+def test_dry_run_changes_nothing(project_root: Path):
+    configure(project_root, title="Forecasting")
+    frontpage = project_root / "latex" / FRONTPAGE
+    before = frontpage.read_text(encoding="utf-8")
+    output = []
+    assert fill_project(project_root, dry_run=True, echo=output.append) == 0
+    assert frontpage.read_text(encoding="utf-8") == before
+    assert f"  Would update: latex/{FRONTPAGE.as_posix()}" in output
+
+
+def test_line_endings_are_kept(tmp_path: Path):
+    path = tmp_path / "file.tex"
+    path.write_bytes(b"[PROMPT: Book Title]\r\nText\r\n")
+    assert fill_file(path, {"Book Title": "Forecasting"}) == (True, 0)
+    assert path.read_bytes() == b"Forecasting\r\nText\r\n"
+
+
+def test_config_errors(project_root: Path):
+    assert not write_config(project_root, {"title": "Other"})
+    configure(project_root, colour="blue")
+    with pytest.raises(ConfigError, match="unknown key"):
+        load_config(project_root)
+    assert fill_project(project_root, echo=quiet) == 1
+
+    (project_root / CONFIG_FILENAME).unlink()
+    with pytest.raises(ConfigError, match="not found"):
+        load_config(project_root)
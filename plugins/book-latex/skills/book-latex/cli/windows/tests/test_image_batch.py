@@ -0,0 +1,135 @@
+"""book image batch: manifest jobs run concurrently, with retries and resumable progress."""
+
+import io
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import image_batch
+from image_batch import batch_images, load_progress, progress_file
+
+PIL = pytest.importorskip("PIL.Image")
+
+MANIFEST = """\
+concurrency: 2
+images:
+  - path: figures/flowchart.png
+    prompt: A process flowchart
+  - path: figures/flowchart.png
+    action: edit
+    prompt: Add a legend
+  - path: figures/chart.png
+    prompt: A bar chart
+  - path: figures/map.png
+    prompt: A map
+"""
+
+
+class HTTPError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class Generator:
+    """Stands in for request_image: answers with a small PNG, or with the errors it is given."""
+
+    def __init__(self, errors: dict[str, list[int]] | None = None, delay: float = 0.0):
+        self.errors = errors or {}
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.most_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, client, contents, resolution):
+        prompt = contents if isinstance(contents, str) else contents[-1]
+        with self.lock:
+            self.calls.append((prompt, resolution))
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        try:
+            time.sleep(self.delay)
+            if self.errors.get(prompt):
+                raise HTTPError(self.errors[prompt].pop(0))
+            data = io.BytesIO()
+            PIL.new("RGB", (8, 8), "white").save(data, format="PNG")
+            return SimpleNamespace(parts=[SimpleNamespace(text=None, inline_data=SimpleNamespace(data=data.getvalue()))])
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def manifest(tmp_path: Path) -> Path:
+    manifest = tmp_path / "figures.yaml"
+    manifest.write_text(MANIFEST, encoding="utf-8")
+    return manifest
+
+
+def run(manifest: Path, generator: Generator, monkeypatch, **options) -> int:
+    monkeypatch.setattr(image_batch, "request_image", generator)
+    return batch_images(manifest, client=object(), base_delay=0.0, echo=quiet, **options)
+
+
+def test_batch_runs_each_job_once(manifest: Path, monkeypatch):
+    generator = Generator()
+    assert run(manifest, generator, monkeypatch) == 0
+    assert sorted(prompt for prompt, _ in generator.calls) == ["A bar chart", "A map", "A process flowchart", "Add a legend"]
+    # The edit runs after the image it edits was generated
+    prompts = [prompt for prompt, _ in generator.calls]
+    assert prompts.index("A process flowchart") < prompts.index("Add a legend")
+    assert ("A map", "1K") in generator.calls
+    for name in ("flowchart.png", "chart.png", "map.png"):
+        assert (manifest.parent / "figures" / name).is_file()
+    assert len(load_progress(progress_file(manifest))) == 4
+
+    generator = Generator()
+    assert run(manifest, generator, monkeypatch) == 0
+    assert generator.calls == []
+
+
+def test_changed_job_reruns_the_later_jobs_on_its_path(manifest: Path, monkeypatch):
+    assert run(manifest, Generator(), monkeypatch) == 0
+    manifest.write_text(MANIFEST.replace("A process flowchart", "A swimlane flowchart"), encoding="utf-8")
+
+    generator = Generator()
+    assert run(manifest, generator, monkeypatch) == 0
+    assert [prompt for prompt, _ in generator.calls] == ["A swimlane flowchart", "Add a legend"]
+
+
+def test_rate_limits_are_retried(manifest: Path, monkeypatch):
+    generator = Generator(errors={"A map": [429, 503]})
+    assert run(manifest, generator, monkeypatch) == 0
+    assert [prompt for prompt, _ in generator.calls].count("A map") == 3
+
+
+def test_failed_job_skips_the_later_jobs_on_its_path(manifest: Path, monkeypatch):
+    generator = Generator(errors={"A process flowchart": [400]})
+    assert run(manifest, generator, monkeypatch) == 1
+    prompts = [prompt for prompt, _ in generator.calls]
+    assert prompts.count("A process flowchart") == 1
+    assert "Add a legend" not in prompts
+    assert not (manifest.parent / "figures" / "flowchart.png").exists()
+
+    # The next run only retries what failed
+    generator = Generator()
+    assert run(manifest, generator, monkeypatch) == 0
+    assert [prompt for prompt, _ in generator.calls] == ["A process flowchart", "Add a legend"]
+
+
+def test_concurrency_is_bounded(manifest: Path, monkeypatch):
+    generator = Generator(delay=0.2)
+    assert run(manifest, generator, monkeypatch) == 0
+    assert generator.most_running == 2
+
+    generator = Generator(delay=0.2)
+    assert run(manifest, generator, monkeypatch, force=True, concurrency=1) == 0
+    assert generator.most_running == 1
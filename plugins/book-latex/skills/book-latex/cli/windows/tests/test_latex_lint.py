@@ -0,0 +1,84 @@
+"""book lint: braces, environments and subfile structure, checked before compiling."""
+
+from pathlib import Path
+
+import pytest
+
+from init_latex import scaffold_latex
+from latex_lint import lint_files, run_lint, scan_file
+from scaffold_outline import load_outline, plan_scaffold, write_scaffold
+
+OUTLINE = """\
+parts:
+  - title: Methods
+    chapters:
+      - title: Forecasting
+        sections: [Trends]
+"""
+
+CHAPTER = Path("200-bodymatter") / "part01-methods" / "chi-forecasting"
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def latex_dir(tmp_path: Path) -> Path:
+    assert scaffold_latex(tmp_path, echo=quiet)
+    latex_dir = tmp_path / "latex"
+    outline = tmp_path / "outline.yaml"
+    outline.write_text(OUTLINE, encoding="utf-8")
+    assert write_scaffold(latex_dir, plan_scaffold(latex_dir, load_outline(outline)), echo=quiet) == 0
+    return latex_dir
+
+
+def issues_of(tmp_path: Path, text: str) -> list:
+    path = tmp_path / "file.tex"
+    path.write_text(text, encoding="utf-8")
+    return scan_file(path)["issues"]
+
+
+@pytest.mark.parametrize("text, issues", [
+    ("\\textbf{a\n", [[1, "Unclosed {"]]),
+    ("a}\n", [[1, "Unmatched }"]]),
+    ("\\begin{itemize}\n\\item a\n", [[1, "\\begin{itemize} is never closed"]]),
+    ("\\end{itemize}\n", [[1, "\\end{itemize} without \\begin{itemize}"]]),
+    (
+        "\\begin{figure}\n\\begin{center}\n\\end{figure}\n",
+        [[2, "\\begin{center} is not closed before \\end{figure} at line 3"]],
+    ),
+])
+def test_structural_errors(tmp_path: Path, text: str, issues: list):
+    assert issues_of(tmp_path, text) == issues
+
+
+@pytest.mark.parametrize("text", [
+    "\\{ \\} \\\\ 100\\% {a {b} c}\n",
+    "% { \\begin{itemize} in a comment\n",
+    "\\verb|{| and \\verb*+\\end{x}+\n",
+    "\\begin{verbatim}\n{ \\begin{itemize}\n\\end{verbatim}\n",
+    "\\documentclass{book}\n\\newcommand{\\bq}{\\begin{quote}}\n\\begin{document}\n\\end{document}\n",
+])
+def test_valid_tex_has_no_issues(tmp_path: Path, text: str):
+    assert issues_of(tmp_path, text) == []
+
+
+def test_scaffolded_book_is_clean(latex_dir: Path):
+    assert run_lint(latex_dir, echo=quiet) == 0
+
+
+def test_subfile_structure(latex_dir: Path):
+    chapter = latex_dir / CHAPTER / "chi-forecasting.tex"
+    section = latex_dir / CHAPTER / "sec01-trends.tex"
+    chapter.write_text(chapter.read_text(encoding="utf-8") + "\\subfile{sec02-missing}\n", encoding="utf-8")
+    section_text = section.read_text(encoding="utf-8")
+    section.write_text(section_text.replace("\\documentclass[", "\\documentclass[../"), encoding="utf-8")
+
+    messages = [issue["message"] for issue in lint_files(latex_dir, [chapter])]
+    assert any(m.startswith("\\subfile{sec02-missing}: ") and m.endswith("sec02-missing.tex not found") for m in messages)
+    assert any("parent document not found" in m for m in messages)
+
+    section.write_text(section_text.replace("\\documentclass[", "%\\documentclass["), encoding="utf-8")
+    messages = [issue["message"] for issue in lint_files(latex_dir, [chapter])]
+    assert any("does not start with \\documentclass[../../../main.tex]{subfiles}" in m for m in messages)
@@ -0,0 +1,82 @@
+"""book refs: undefined, duplicate and orphaned labels, checked without compiling."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from latex_refs import INDEX_FILENAME, analyze_refs, check_refs, load_refs_index
+
+MAIN = """\
+\\documentclass{book}
+\\begin{document}
+\\chapter{Methods}\\label{ch:methods}
+See \\cref{sec:trends} and \\eqref{eq:missing}, citing \\cite{knuth84,lamport94}.
+\\subfile{chapter}
+\\end{document}
+"""
+
+CHAPTER = """\
+\\section{Trends}\\label{sec:trends}
+% \\label{sec:commented} is not a label
+\\section{Seasonality}\\label{sec:seasons}
+\\section{More trends}\\label{sec:trends}
+"""
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def latex_dir(tmp_path: Path) -> Path:
+    latex_dir = tmp_path / "latex"
+    latex_dir.mkdir()
+    (latex_dir / "main.tex").write_text(MAIN, encoding="utf-8")
+    (latex_dir / "chapter.tex").write_text(CHAPTER, encoding="utf-8")
+    (latex_dir / "refs.bib").write_text("@book{knuth84,\n  title = {The TeXbook},\n}\n", encoding="utf-8")
+    return latex_dir
+
+
+def test_undefined_duplicate_and_orphaned_labels(latex_dir: Path):
+    report = analyze_refs(load_refs_index(latex_dir))
+
+    assert report["undefined"] == [{"key": "eq:missing", "file": "main.tex", "line": 4, "command": "eqref"}]
+    assert report["duplicates"] == [{"key": "sec:trends", "definitions": [
+        {"file": "chapter.tex", "line": 1}, {"file": "chapter.tex", "line": 4},
+    ]}]
+    assert [(item["key"], item["file"], item["line"]) for item in report["orphaned"]] == [
+        ("ch:methods", "main.tex", 3), ("sec:seasons", "chapter.tex", 3),
+    ]
+    assert [item["key"] for item in report["undefined_citations"]] == ["lamport94"]
+
+
+def test_check_fails_on_undefined_or_duplicate_labels_only(latex_dir: Path):
+    assert check_refs(latex_dir, echo=quiet) == 1
+
+    main = latex_dir / "main.tex"
+    main.write_text(main.read_text(encoding="utf-8").replace(" and \\eqref{eq:missing}", "").replace(",lamport94", ""), encoding="utf-8")
+    chapter = latex_dir / "chapter.tex"
+    chapter.write_text(chapter.read_text(encoding="utf-8").replace("trends}\\label{sec:trends}", "trends}\\label{sec:more}"), encoding="utf-8")
+
+    output = []
+    assert check_refs(latex_dir, echo=output.append) == 0
+    assert "Orphaned label: sec:more (chapter.tex:4)" in output
+
+
+def test_only_changed_files_are_rescanned(latex_dir: Path):
+    load_refs_index(latex_dir)
+    cache_file = latex_dir.parent / "build" / INDEX_FILENAME
+    cache = json.loads(cache_file.read_text(encoding="utf-8"))
+    # A stale entry with the current size and mtime is trusted
+    cache["files"]["chapter.tex"]["labels"] = [["sec:cached", 1]]
+    cache_file.write_text(json.dumps(cache), encoding="utf-8")
+    assert load_refs_index(latex_dir)["chapter.tex"]["labels"] == [["sec:cached", 1]]
+
+    chapter = latex_dir / "chapter.tex"
+    stat = chapter.stat()
+    chapter.write_text(CHAPTER + "\\label{sec:new}\n", encoding="utf-8")
+    os.utime(chapter, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    labels = [key for key, _ in load_refs_index(latex_dir)["chapter.tex"]["labels"]]
+    assert labels == ["sec:trends", "sec:seasons", "sec:trends", "sec:new"]
@@ -0,0 +1,42 @@
+"""The precompiled preamble is keyed by everything the preamble loads."""
+
+from pathlib import Path
+
+import pytest
+
+from init_latex import scaffold_latex
+from preamble_format import preamble_hash
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def latex_dir(tmp_path: Path) -> Path:
+    """A new book whose localsettings.tex loads a macro file and a local package."""
+    assert scaffold_latex(tmp_path, echo=quiet)
+    latex_dir = tmp_path / "latex"
+    localsettings = latex_dir / "localsettings.tex"
+    localsettings.write_text(
+        localsettings.read_text(encoding="utf-8") + "\\input{macros}\n\\usepackage{amsmath,bookstyle}\n",
+        encoding="utf-8"
+    )
+    (latex_dir / "macros.tex").write_text("\\newcommand{\\R}{\\mathbb{R}}\n", encoding="utf-8")
+    (latex_dir / "bookstyle.sty").write_text("\\ProvidesPackage{bookstyle}\n", encoding="utf-8")
+    return latex_dir
+
+
+@pytest.mark.parametrize("name", ["localsettings.tex", "macros.tex", "bookstyle.sty"])
+def test_editing_a_loaded_file_changes_the_hash(latex_dir: Path, name: str):
+    before = preamble_hash(latex_dir)
+    path = latex_dir / name
+    path.write_text(path.read_text(encoding="utf-8") + "% edited\n", encoding="utf-8")
+    assert preamble_hash(latex_dir) != before
+
+
+def test_editing_the_document_body_keeps_the_hash(latex_dir: Path):
+    before = preamble_hash(latex_dir)
+    main = latex_dir / "main.tex"
+    main.write_text(main.read_text(encoding="utf-8").replace("\\end{document}", "Text.\n\\end{document}"), encoding="utf-8")
+    assert preamble_hash(latex_dir) == before
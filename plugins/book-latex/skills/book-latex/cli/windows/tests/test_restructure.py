@@ -0,0 +1,97 @@
+"""book mv/swap keep the comment headers of the aggregators with their blocks."""
+
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from cli_restructure import mv
+from init_latex import scaffold_latex
+from restructure import apply_plan, plan_move, plan_swap
+from scaffold_outline import load_outline, plan_scaffold, write_scaffold
+
+OUTLINE = """\
+parts:
+  - title: Introduction
+    chapters: [Key Concepts]
+  - title: Methods
+    chapters: [Forecasting, Regression]
+"""
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def latex_dir(tmp_path: Path) -> Path:
+    assert scaffold_latex(tmp_path, echo=quiet)
+    latex_dir = tmp_path / "latex"
+    outline = tmp_path / "outline.yaml"
+    outline.write_text(OUTLINE, encoding="utf-8")
+    assert write_scaffold(latex_dir, plan_scaffold(latex_dir, load_outline(outline)), echo=quiet) == 0
+    return latex_dir
+
+
+def block_lines(text: str, subfile: str) -> list[str]:
+    """The subfile line of a block and the comment header right above it."""
+    lines = text.splitlines()
+    i = next(i for i, line in enumerate(lines) if line.startswith(f"\\subfile{{{subfile}"))
+    start = i
+    while start > 0 and lines[start - 1].strip() and not lines[start - 1].startswith("\\subfile"):
+        start -= 1
+    return lines[start:i + 1]
+
+
+def test_swap_chapters_moves_and_renumbers_headers(latex_dir: Path):
+    part = latex_dir / "200-bodymatter" / "part02-methods"
+    plan = plan_swap(latex_dir, part / "ch01-forecasting" / "ch01-forecasting.tex", part / "ch02-regression" / "ch02-regression.tex")
+    assert apply_plan(latex_dir, plan, echo=quiet) == 0
+
+    text = (part / "part02.tex").read_text(encoding="utf-8")
+    assert block_lines(text, "ch01-regression") == ["% Kapittel 1 - Regression", "\\subfile{ch01-regression/ch01-regression.tex}"]
+    assert block_lines(text, "ch02-forecasting") == ["% Kapittel 2 - Forecasting", "\\subfile{ch02-forecasting/ch02-forecasting.tex}"]
+
+
+def test_move_chapter_to_another_part_takes_its_header(latex_dir: Path):
+    body = latex_dir / "200-bodymatter"
+    plan = plan_move(
+        latex_dir,
+        body / "part02-methods" / "ch01-forecasting" / "ch01-forecasting.tex",
+        body / "part01-introduction" / "part01.tex",
+        position=1,
+    )
+    assert apply_plan(latex_dir, plan, echo=quiet) == 0
+
+    part01 = (body / "part01-introduction" / "part01.tex").read_text(encoding="utf-8")
+    assert block_lines(part01, "chi-forecasting") == ["% Kapittel 1 - Forecasting", "\\subfile{chi-forecasting/chi-forecasting.tex}"]
+    assert block_lines(part01, "chii-key-concepts") == ["% Kapittel 2 - Key Concepts", "\\subfile{chii-key-concepts/chii-key-concepts.tex}"]
+
+    part02 = (body / "part02-methods" / "part02.tex").read_text(encoding="utf-8")
+    assert "Forecasting" not in part02
+    assert block_lines(part02, "ch01-regression") == ["% Kapittel 1 - Regression", "\\subfile{ch01-regression/ch01-regression.tex}"]
+
+
+def test_swap_parts_moves_and_renumbers_headers(latex_dir: Path):
+    body = latex_dir / "200-bodymatter"
+    plan = plan_swap(latex_dir, body / "part01-introduction" / "part01.tex", body / "part02-methods" / "part02.tex")
+    assert apply_plan(latex_dir, plan, echo=quiet) == 0
+
+    text = (body / "bodymatter.tex").read_text(encoding="utf-8")
+    methods = block_lines(text, "part01-methods")
+    introduction = block_lines(text, "part02-introduction")
+    assert methods[0] == "% ============ DEL 1: METHODS ============"
+    assert methods[1] == "\\part{Methods}"
+    assert introduction[0] == "% ============ DEL 2: INTRODUCTION ============"
+    assert introduction[1] == "\\part{Introduction}"
+    assert text.index("DEL 1: METHODS") < text.index("DEL 2: INTRODUCTION")
+
+
+def test_misspelt_target_is_not_guessed(latex_dir: Path, monkeypatch):
+    monkeypatch.chdir(latex_dir.parent)
+    result = CliRunner().invoke(mv, ["forcasting", "1"])
+
+    assert result.exit_code == 1
+    assert "Did you mean" in result.output
+    assert "ch01-forecasting" in result.output
+    assert (latex_dir / "200-bodymatter" / "part02-methods" / "ch01-forecasting").is_dir()
@@ -0,0 +1,116 @@
+"""book init --from-outline: parts, chapters, appendices and sections from a YAML outline."""
+
+import re
+from pathlib import Path
+
+import pytest
+
+from init_latex import scaffold_latex
+from latex_lint import run_lint
+from scaffold_outline import OutlineError, load_outline, plan_scaffold, scaffold_outline, write_scaffold
+
+OUTLINE = """\
+parts:
+  - title: Introduction
+    chapters:
+      - title: Key Concepts
+        sections: [Terminology]
+  - title: Methods
+    chapters: [Forecasting]
+appendices:
+  - title: Data Sets
+    sections: [Tables]
+"""
+
+BODYMATTER = Path("200-bodymatter")
+BACKMATTER = Path("300-backmatter")
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def latex_dir(tmp_path: Path) -> Path:
+    assert scaffold_latex(tmp_path, echo=quiet)
+    return tmp_path / "latex"
+
+
+def outline_file(tmp_path: Path, text: str) -> Path:
+    path = tmp_path / "outline.yaml"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def read(latex_dir: Path, rel: Path | str) -> str:
+    return (latex_dir / rel).read_text(encoding="utf-8")
+
+
+def test_outline_creates_linked_nodes(latex_dir: Path, tmp_path: Path):
+    assert scaffold_outline(latex_dir, outline_file(tmp_path, OUTLINE), echo=quiet) == 0
+
+    part1 = BODYMATTER / "part01-introduction"
+    chapter = part1 / "chi-key-concepts"
+    appendix = BACKMATTER / "app01-data-sets"
+    assert "\\subfile{part01-introduction/part01.tex}" in read(latex_dir, BODYMATTER / "bodymatter.tex")
+    assert "\\subfile{part02-methods/part02.tex}" in read(latex_dir, BODYMATTER / "bodymatter.tex")
+    # Part 1 has roman chapter numbers, later parts arabic ones
+    assert "\\subfile{chi-key-concepts/chi-key-concepts.tex}" in read(latex_dir, part1 / "part01.tex")
+    assert "\\subfile{ch01-forecasting/ch01-forecasting.tex}" in read(latex_dir, BODYMATTER / "part02-methods" / "part02.tex")
+    assert "\\subfile{sec01-terminology.tex}" in read(latex_dir, chapter / "chi-key-concepts.tex")
+    assert read(latex_dir, chapter / "sec01-terminology.tex").startswith("\\documentclass[../../../main.tex]{subfiles}")
+
+    backmatter = read(latex_dir, BACKMATTER / "backmatter.tex")
+    assert backmatter.index("\\subfile{app01-data-sets/app01-data-sets.tex}") < backmatter.index("\\subfile{100-bibliography.tex}")
+    assert "\\subfile{sec01-tables.tex}" in read(latex_dir, appendix / "app01-data-sets.tex")
+
+    assert run_lint(latex_dir, echo=quiet) == 0
+    assert not list(latex_dir.glob(".scaffold-*"))
+
+
+def test_outline_can_be_applied_again_as_it_grows(latex_dir: Path, tmp_path: Path):
+    assert scaffold_outline(latex_dir, outline_file(tmp_path, OUTLINE), echo=quiet) == 0
+    bodymatter = read(latex_dir, BODYMATTER / "bodymatter.tex")
+
+    plan = plan_scaffold(latex_dir, load_outline(outline_file(tmp_path, OUTLINE)))
+    assert plan["files"] == {} and plan["rewrites"] == []
+
+    grown = OUTLINE.replace("sections: [Terminology]", "sections: [Terminology, A Short History]")
+    assert scaffold_outline(latex_dir, outline_file(tmp_path, grown), echo=quiet) == 0
+    chapter = BODYMATTER / "part01-introduction" / "chi-key-concepts"
+    assert (latex_dir / chapter / "sec02-a-short-history.tex").is_file()
+    text = read(latex_dir, chapter / "chi-key-concepts.tex")
+    assert text.index("\\subfile{sec01-terminology.tex}") < text.index("\\subfile{sec02-a-short-history.tex}")
+    assert read(latex_dir, BODYMATTER / "bodymatter.tex") == bodymatter
+
+
+def test_dry_run_writes_nothing(latex_dir: Path, tmp_path: Path):
+    before = sorted(latex_dir.rglob("*"))
+    output = []
+    assert scaffold_outline(latex_dir, outline_file(tmp_path, OUTLINE), dry_run=True, echo=output.append) == 0
+    assert sorted(latex_dir.rglob("*")) == before
+    assert "create  200-bodymatter/part01-introduction/part01.tex" in output
+
+
+def test_failed_write_is_undone(latex_dir: Path, tmp_path: Path):
+    bodymatter = read(latex_dir, BODYMATTER / "bodymatter.tex")
+    plan = plan_scaffold(latex_dir, load_outline(outline_file(tmp_path, OUTLINE)))
+    # Appears between planning and writing
+    (latex_dir / BACKMATTER / "app01-data-sets").mkdir()
+
+    assert write_scaffold(latex_dir, plan, echo=quiet) == 1
+    assert not (latex_dir / BODYMATTER / "part01-introduction").exists()
+    assert read(latex_dir, BODYMATTER / "bodymatter.tex") == bodymatter
+    assert not list(latex_dir.glob(".scaffold-*"))
+
+
+@pytest.mark.parametrize("text, error", [
+    ("chapters: [A]\n", "must have a 'parts' and/or 'appendices' list"),
+    ("parts: [A]\nchapters: [B]\n", "unknown key(s) chapters"),
+    ("parts:\n  - title: A\n  - title: a\n", "duplicate slug(s) a"),
+    ("parts:\n  - title: A\n    slug: Not A Slug\n", "must be lower-case letters"),
+    ("parts:\n  - chapters: [A]\n", "expected a title"),
+])
+def test_invalid_outlines_are_rejected(tmp_path: Path, text: str, error: str):
+    with pytest.raises(OutlineError, match=re.escape(error)):
+        load_outline(outline_file(tmp_path, text))
@@ -0,0 +1,93 @@
+"""book find: trigram search over slugs and titles, and typo handling of targets."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from cli_compile import resolve
+from init_latex import scaffold_latex
+from scaffold_outline import load_outline, plan_scaffold, write_scaffold
+from search_index import CONFIDENT_MARGIN, CONFIDENT_SCORE, INDEX_FILENAME, confident_match, search
+
+OUTLINE = """\
+parts:
+  - title: Methods
+    chapters:
+      - title: Demand Forecasting with Regression
+        sections: [Trend Models]
+      - title: Scenario Analysis
+"""
+
+PART = Path("200-bodymatter") / "part01-methods"
+FORECASTING = (PART / "chi-demand-forecasting-with-regression" / "chi-demand-forecasting-with-regression.tex").as_posix()
+SCENARIOS = (PART / "chii-scenario-analysis" / "chii-scenario-analysis.tex").as_posix()
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def latex_dir(tmp_path: Path) -> Path:
+    assert scaffold_latex(tmp_path, echo=quiet)
+    latex_dir = tmp_path / "latex"
+    outline = tmp_path / "outline.yaml"
+    outline.write_text(OUTLINE, encoding="utf-8")
+    assert write_scaffold(latex_dir, plan_scaffold(latex_dir, load_outline(outline)), echo=quiet) == 0
+    return latex_dir
+
+
+def retitle(path: Path, old: str, new: str) -> None:
+    """Change a chapter title, making sure the file's mtime moves on."""
+    stat = path.stat()
+    path.write_text(path.read_text(encoding="utf-8").replace(old, new), encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_typo_finds_the_file(latex_dir: Path):
+    assert search(latex_dir, "forcasting")[0]["file"] == FORECASTING
+    assert search(latex_dir, "scenario analysys")[0]["file"] == SCENARIOS
+
+
+def test_missing_words_find_the_file(latex_dir: Path):
+    assert search(latex_dir, "demand regression")[0]["file"] == FORECASTING
+
+
+def test_accents_are_ignored(latex_dir: Path):
+    retitle(latex_dir / SCENARIOS, "Scenario Analysis", "Prognosér for etterspørsel")
+    assert search(latex_dir, "prognoser ettersporsel")[0]["file"] == SCENARIOS
+    assert search(latex_dir, "prognosér")[0]["file"] == SCENARIOS
+
+
+def test_title_edit_invalidates_the_cache(latex_dir: Path):
+    assert search(latex_dir, "scenario analysis")[0]["file"] == SCENARIOS
+    cache_file = latex_dir.parent / "build" / INDEX_FILENAME
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["files"][SCENARIOS]["title"] == "Scenario Analysis"
+
+    retitle(latex_dir / SCENARIOS, "Scenario Analysis", "Stress Testing")
+    assert search(latex_dir, "stress testing")[0]["file"] == SCENARIOS
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["files"][SCENARIOS]["title"] == "Stress Testing"
+
+
+def test_confident_match_needs_a_margin():
+    top = {"file": "a.tex", "score": CONFIDENT_SCORE + 0.3}
+    assert confident_match([top]) is top
+    assert confident_match([top, {"file": "b.tex", "score": top["score"] - CONFIDENT_MARGIN - 0.01}]) is top
+    assert confident_match([top, {"file": "b.tex", "score": top["score"] - CONFIDENT_MARGIN / 2}]) is None
+    assert confident_match([{"file": "a.tex", "score": CONFIDENT_SCORE - 0.01}]) is None
+    assert confident_match([]) is None
+
+
+def test_resolve_lists_suggestions_instead_of_guessing(latex_dir: Path, monkeypatch):
+    monkeypatch.chdir(latex_dir.parent)
+    result = CliRunner().invoke(resolve, ["forcasting"])
+    assert result.exit_code == 1
+    assert "Did you mean" in result.output
+    assert "book resolve 1.1" in result.output
+
+    result = CliRunner().invoke(resolve, ["1.1"])
+    assert result.exit_code == 0
+    assert result.output.strip() == f"latex/{FORECASTING}"
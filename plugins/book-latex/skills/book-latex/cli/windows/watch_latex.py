@@ -0,0 +1,323 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Watch the latex directory and recompile the affected subfile on change.
+
+Uses inotify on Linux and falls back to polling elsewhere. Bursts of saves
+are merged into one build, and only the smallest compilable subfile that
+contains the changes is recompiled (section -> chapter -> part -> main).
+
+Can be used as:
+1. Module: from watch_latex import watch
+2. Standalone: uv run watch_latex.py [--bib] [--poll]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from compile_latex import run_compile
+from project_index import SKIP_DIRS
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Editor swap/backup files that should not trigger a build
+IGNORED_FILE_PATTERN = re.compile(r"(^\.|^#.*#$|~$|\.swp$|\.swx$|\.tmp$|^4913$)")
+
+SUBFILES_CLASS_PATTERN = re.compile(r"\\documentclass\s*\[[^\]]*\]\s*\{subfiles\}")
+PART_AGGREGATOR_PATTERN = re.compile(r"^part\d+\.tex$")
+
+# Files whose changes affect every target
+PREAMBLE_FILES = {"main.tex", "localsettings.tex"}
+
+
+def is_ignored(path: Path, latex_dir: Path) -> bool:
+    """Return True for build output, hidden folders and editor temp files."""
+    try:
+        rel = path.relative_to(latex_dir)
+    except ValueError:
+        return True
+    if any(part in SKIP_DIRS or part.startswith(".") for part in rel.parts[:-1]):
+        return True
+    return bool(IGNORED_FILE_PATTERN.search(path.name))
+
+
+def is_compilable(tex_file: Path) -> bool:
+    """Return True if a .tex file can be compiled on its own."""
+    if tex_file.suffix != ".tex" or not tex_file.is_file():
+        return False
+    if tex_file.name == "main.tex":
+        return True
+    try:
+        with open(tex_file, encoding="utf-8", errors="replace") as f:
+            head = f.read(2048)
+    except OSError:
+        return False
+    return bool(SUBFILES_CLASS_PATTERN.search(head))
+
+
+def aggregator_for_dir(directory: Path) -> Path | None:
+    """Return the aggregator of a chapter, appendix, part or matter folder."""
+    candidates = [directory / f"{directory.name}.tex"]
+    candidates += sorted(p for p in directory.glob("part*.tex") if PART_AGGREGATOR_PATTERN.match(p.name))
+    candidates += sorted(directory.glob("*matter.tex"))
+    for candidate in candidates:
+        if is_compilable(candidate):
+            return candidate
+    return None
+
+
+def enclosing_target(directory: Path, latex_dir: Path) -> Path:
+    """Walk up from a folder to the nearest aggregator, ending at main.tex."""
+    while directory != latex_dir and latex_dir in directory.parents:
+        aggregator = aggregator_for_dir(directory)
+        if aggregator is not None:
+            return aggregator
+        directory = directory.parent
+    return latex_dir / "main.tex"
+
+
+def affected_target(changed: Path, latex_dir: Path) -> Path:
+    """Map a changed file to the smallest compilable file that contains it."""
+    if changed.parent == latex_dir and changed.name in PREAMBLE_FILES:
+        return latex_dir / "main.tex"
+    if is_compilable(changed):
+        return changed
+    return enclosing_target(changed.parent, latex_dir)
+
+
+def target_for_changes(changes: set[Path], latex_dir: Path) -> Path:
+    """Choose one target covering all changed files.
+
+    A single affected subfile is compiled directly. Changes spread over
+    several subfiles compile the aggregator of their common folder.
+    """
+    targets = {affected_target(path, latex_dir) for path in changes}
+    if len(targets) == 1:
+        return targets.pop()
+
+    if latex_dir / "main.tex" in targets:
+        return latex_dir / "main.tex"
+    common = Path(os.path.commonpath([t.parent for t in targets]))
+    return enclosing_target(common, latex_dir)
+
+
+class PollingWatcher:
+    """Detect changes by comparing file mtimes at a fixed interval."""
+
+    def __init__(self, latex_dir: Path, interval: float = DEFAULT_POLL_INTERVAL):
+        self.latex_dir = latex_dir
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        files = {}
+        for root, dirs, names in os.walk(self.latex_dir):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+            for name in names:
+                path = Path(root) / name
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        """Return changed paths, or an empty set if none changed within timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if remaining > 0:
+                time.sleep(remaining)
+            current = self._scan()
+            changed = {
+                path for path in current.keys() | self.snapshot.keys()
+                if current.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = current
+            changed = {p for p in changed if not is_ignored(p, self.latex_dir)}
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Detect changes with Linux inotify, watching every folder under latex/."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_ISDIR = 0x40000000
+    IN_Q_OVERFLOW = 0x00004000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, latex_dir: Path):
+        self.latex_dir = latex_dir
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: dict[int, Path] = {}
+        self._add_tree(latex_dir)
+
+    def _add_watch(self, directory: Path) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+
+    def _add_tree(self, root: Path) -> None:
+        for directory, dirs, _ in os.walk(root):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+            self._add_watch(Path(directory))
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        """Return changed paths, or an empty set if none changed within timeout."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were lost; treat it as a change to the whole book
+                changed.add(self.latex_dir / "main.tex")
+                continue
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / name
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and name not in SKIP_DIRS and not name.startswith("."):
+                    self._add_tree(path)
+                continue
+            if not is_ignored(path, self.latex_dir):
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def create_watcher(latex_dir: Path, poll: bool = False, interval: float = DEFAULT_POLL_INTERVAL):
+    """Return an inotify watcher on Linux, otherwise a polling watcher."""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(latex_dir)
+        except (OSError, AttributeError):
+            pass  # No inotify support (or too many watches): fall back to polling
+    return PollingWatcher(latex_dir, interval)
+
+
+def watch(
+    latex_dir: Path,
+    bib: bool = False,
+    debounce: float = DEFAULT_DEBOUNCE,
+    poll: bool = False,
+    interval: float = DEFAULT_POLL_INTERVAL,
+    draft: bool = False,
+    preview: bool = False,
+    echo=print,
+    success_style=None,
+    error_style=None
+) -> int:
+    """
+    Watch latex_dir and recompile the affected subfile after each burst of saves.
+
+    Args:
+        latex_dir: Path to the latex directory
+        bib: If True, run biber for bibliography processing
+        debounce: Seconds without further changes before a build starts
+        poll: If True, use polling even where inotify is available
+        interval: Polling interval in seconds
+        draft: If True, make fast draft builds into build/draft/
+        preview: If True, build into build/preview/ with figure proxies
+        echo: Function for normal output
+        success_style: Function for success messages
+        error_style: Function for error messages
+
+    Returns:
+        0 when stopped with Ctrl+C
+    """
+    if success_style is None:
+        success_style = echo
+    if error_style is None:
+        error_style = echo
+
+    watcher = create_watcher(latex_dir, poll=poll, interval=interval)
+    mode = "inotify" if isinstance(watcher, InotifyWatcher) else f"polling every {interval}s"
+    echo(f"Watching {latex_dir} ({mode}). Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            changes = watcher.wait(None)
+            if not changes:
+                continue
+            # Merge a burst of saves into one build
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changes |= more
+
+            target = target_for_changes(changes, latex_dir)
+            echo("=" * 50)
+            for path in sorted(changes)[:5]:
+                echo(f"Changed: {path.relative_to(latex_dir)}")
+            if len(changes) > 5:
+                echo(f"... and {len(changes) - 5} more")
+            run_compile(target, latex_dir, bib=bib, draft=draft, preview=preview, echo=echo, success_style=success_style, error_style=error_style)
+    except KeyboardInterrupt:
+        echo("Stopped watching.")
+    finally:
+        watcher.close()
+    return 0
+
+
+def main():
+    """Standalone entry point."""
+    latex_dir = Path.cwd() / "latex"
+    if not latex_dir.exists():
+        print(f"Error: latex directory not found at {latex_dir}")
+        print("Make sure you run this command from the project root.")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Recompile the affected subfile whenever latex/ changes")
+    parser.add_argument("--bib", "-b", action="store_true", help="Also compile bibliography with biber")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE, help="Seconds to wait for more changes before building")
+    parser.add_argument("--poll", action="store_true", help="Use polling instead of inotify")
+    parser.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL, help="Polling interval in seconds")
+    parser.add_argument("--draft", "-d", action="store_true", help="Make fast draft builds into build/draft/")
+    parser.add_argument("--preview", "-p", action="store_true", help="Build into build/preview/ with low-resolution figure proxies")
+    args = parser.parse_args()
+
+    sys.exit(watch(latex_dir, bib=args.bib, debounce=args.debounce, poll=args.poll, interval=args.interval, draft=args.draft, preview=args.preview))
+
+
+if __name__ == "__main__":
+    main()